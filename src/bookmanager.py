@@ -0,0 +1,210 @@
+"""Command line interface to the library, running the core services without Qt.
+
+    python bookmanager.py add "Book title" [--cover cover.png]
+    python bookmanager.py add-page "Book title" [--title T] [--position N] [FILE]
+    python bookmanager.py list ["Book title"]
+    python bookmanager.py import PATH...
+    python bookmanager.py search WORDS...
+    python bookmanager.py export library.zip
+    python bookmanager.py compress [--threshold BYTES] [--vacuum]
+    python bookmanager.py covers [--workers N]
+
+Page content is read from FILE, or from standard input when FILE is omitted or `-`.
+Every command accepts `--database PATH`, `--compression-threshold BYTES` (see
+`database.config`) and `--json` for machine-readable output.
+"""
+import sys
+import json
+import argparse
+
+from core import BookService, PageService, BookManagerError, SNIPPET_START, SNIPPET_END
+from database import config, compression, covers
+from database.database import init_db, get_engine, session_scope
+
+DEFAULT_COMPRESSION_THRESHOLD = 1024  # Bytes, for `compress` when no threshold is configured.
+
+def print_rows(args, rows, columns):
+    """Print records as JSON lines with --json, as tab-separated columns otherwise."""
+    for row in rows:
+        if args.json:
+            print(json.dumps(row._asdict(), ensure_ascii=False))
+        else:
+            print('\t'.join('' if getattr(row, column) is None else str(getattr(row, column)) for column in columns))
+
+def add(args):
+    with session_scope() as session:
+        book = BookService(session).create(args.title, args.cover)
+    print_rows(args, [book], ('id', 'title'))
+
+def add_page(args):
+    if args.file in (None, '-'):
+        content = sys.stdin.read()
+    else:
+        with open(args.file, encoding='utf-8') as file:
+            content = file.read()
+
+    with session_scope() as session:
+        book = BookService(session).require(args.book)
+        pages = PageService(session)
+        if args.position is None:
+            page = pages.append(book.id, args.title, content)
+        else:
+            page = pages.insert(book.id, args.position, args.title, content)
+    print_rows(args, [page], ('id', 'number', 'title'))
+
+def list_(args):
+    with session_scope() as session:
+        if args.book is None:
+            print_rows(args, BookService(session).list(), ('id', 'title', 'cover_path'))
+            return
+
+        # Walk the book a window at a time so huge books print in constant memory.
+        book = BookService(session).require(args.book)
+        pages = PageService(session)
+        last = None
+        while True:
+            window = pages.window(book.id, last.number if last else 0, 1000, after_id=last.id if last else None)
+            print_rows(args, window, ('id', 'number', 'title'))
+            if len(window) < 1000:
+                break
+            last = window[-1]
+
+def search(args):
+    with session_scope() as session:
+        hits = PageService(session).search(' '.join(args.words), args.limit)
+    if args.json:
+        print_rows(args, hits, ())
+        return
+    for hit in hits:
+        snippet = hit.snippet.replace(SNIPPET_START, '').replace(SNIPPET_END, '').replace('\n', ' ')
+        print(f"{hit.book_title}\t{hit.page_number}\t{hit.page_title or ''}\t{snippet}")
+
+def import_(args):
+    from database.importer import import_paths
+    result = import_paths(args.paths, batch_size=args.batch_size, workers=args.workers)
+    if args.json:
+        print(json.dumps(result._asdict()))
+    else:
+        print(f"{result.books} books, {result.pages} pages imported")
+
+def export(args):
+    from database.exporter import export_library
+    result = export_library(args.destination)
+    if args.json:
+        print(json.dumps(result._asdict()))
+    else:
+        print(f"{result.books} books, {result.pages} pages exported to {args.destination}")
+
+def compress(args):
+    threshold = args.threshold or config.compression_threshold() or DEFAULT_COMPRESSION_THRESHOLD
+    engine = get_engine()
+    stored_before = compression.stored_bytes(engine)
+
+    def report(pages):
+        if not args.json:
+            print(f"\r{pages} pages compressed", end='', file=sys.stderr, flush=True)
+    compressed = compression.compress_pages(engine, threshold, progress=report)
+    if not args.json:
+        print(file=sys.stderr)
+
+    if args.vacuum:
+        with engine.connect() as connection:
+            connection.exec_driver_sql('VACUUM')
+
+    stats, timings = compression.measure(engine, args.samples)
+    if args.json:
+        print(json.dumps({
+            'compressed_now': compressed,
+            'stored_bytes_before': stored_before,
+            **stats._asdict(),
+            'ratio': round(stats.text_bytes / stats.stored_bytes, 3) if stats.stored_bytes else None,
+            'decode': timings._asdict() if timings is not None else None,
+        }))
+        return
+
+    print(f"{compressed} pages compressed now, {stats.compressed} of {stats.pages} pages stored compressed")
+    if stats.stored_bytes:
+        print(f"Page text: {stats.text_bytes / 1024 / 1024:.1f} MiB, stored: {stored_before / 1024 / 1024:.1f} MiB before, "
+              f"{stats.stored_bytes / 1024 / 1024:.1f} MiB now (ratio {stats.text_bytes / stats.stored_bytes:.2f})")
+    if timings is not None:
+        print(f"Decoding a compressed page ({timings.samples} samples): mean {timings.mean_us:.0f} µs, "
+              f"median {timings.median_us:.0f} µs, p95 {timings.p95_us:.0f} µs, max {timings.max_us:.0f} µs")
+    if not args.vacuum:
+        print("Run with --vacuum to give the freed space back to the file system.")
+
+def covers_(args):
+    result = covers.migrate_legacy(get_engine(), workers=args.workers)
+    if args.json:
+        print(json.dumps(result._asdict()))
+        return
+    print(f"{result.stored} of {result.books} covers moved into {config.covers_path()}")
+    if result.failed:
+        print(f"{result.failed} cover files are missing or not images; those books keep their old path.")
+
+def build_parser():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--database', help=f'database file (default: ${config.ENVIRONMENT_VARIABLE} or {config.DEFAULT_PATH})')
+    common.add_argument('--compression-threshold', type=int, metavar='BYTES',
+                        help=f'compress page bodies written from this size on, 0 for never (default: ${config.COMPRESSION_ENVIRONMENT_VARIABLE} or never)')
+    common.add_argument('--json', action='store_true', help='print JSON lines instead of tab-separated text')
+
+    parser = argparse.ArgumentParser(description='Manage the Book Manager library from the command line.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    command = commands.add_parser('add', parents=[common], help='add a book')
+    command.add_argument('title')
+    command.add_argument('--cover', help='cover image path')
+    command.set_defaults(run=add)
+
+    command = commands.add_parser('add-page', parents=[common], help='add a page to a book')
+    command.add_argument('book', help='title of the book')
+    command.add_argument('file', nargs='?', help='file with the page content (default: standard input)')
+    command.add_argument('--title', help='page title')
+    command.add_argument('--position', type=int, help='insert as this page number instead of appending')
+    command.set_defaults(run=add_page)
+
+    command = commands.add_parser('list', parents=[common], help='list the books, or the pages of a book')
+    command.add_argument('book', nargs='?', help='title of the book whose pages to list')
+    command.set_defaults(run=list_)
+
+    command = commands.add_parser('import', parents=[common], help='import text, Markdown, JSONL or exported zip files')
+    command.add_argument('paths', nargs='+', help='files or directories to import')
+    command.add_argument('--batch-size', type=int, default=10000, help='pages inserted per transaction')
+    command.add_argument('--workers', type=int, help='processes scaling the covers (default: one per CPU)')
+    command.set_defaults(run=import_)
+
+    command = commands.add_parser('search', parents=[common], help='full-text search over the pages')
+    command.add_argument('words', nargs='+')
+    command.add_argument('--limit', type=int, default=50)
+    command.set_defaults(run=search)
+
+    command = commands.add_parser('export', parents=[common], help='export the library to .zip or .jsonl')
+    command.add_argument('destination')
+    command.set_defaults(run=export)
+
+    command = commands.add_parser('compress', parents=[common], help='compress the page bodies already stored, in place')
+    command.add_argument('--threshold', type=int, metavar='BYTES',
+                         help=f'compress bodies of at least this size (default: --compression-threshold or {DEFAULT_COMPRESSION_THRESHOLD})')
+    command.add_argument('--samples', type=int, default=1000, help='compressed pages decoded to time decompression')
+    command.add_argument('--vacuum', action='store_true', help='rebuild the database file afterwards to shrink it')
+    command.set_defaults(run=compress)
+
+    command = commands.add_parser('covers', parents=[common], help='copy covers still referenced by file path into the cover store')
+    command.add_argument('--workers', type=int, help='processes scaling the covers (default: one per CPU)')
+    command.set_defaults(run=covers_)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    config.set_database_path(args.database)
+    config.set_compression_threshold(args.compression_threshold)
+    try:
+        init_db()
+        args.run(args)
+    except (BookManagerError, OSError) as e:
+        print(f"bookmanager: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
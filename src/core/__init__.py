@@ -0,0 +1,25 @@
+"""Qt-free core of Book Manager: typed services over the books database.
+
+The GUI runs these services on its database worker, and scripts can use them
+directly without a QApplication:
+
+    from database.database import init_db, session_scope
+    from core import BookService, PageService
+
+    init_db()
+    with session_scope() as session:
+        book = BookService(session).create('Notes')
+        PageService(session).append(book.id, 'First page', 'Hello')
+"""
+from .errors import BookManagerError, BookNotFound, DuplicateTitle, InvalidCover
+from .models import BookSummary, BookListing, PageSummary, PageRecord, PageHead, Splice, SearchHit
+from .pagination import PageCursor
+from .title_index import TitleIndex
+from .services import BookService, PageService, SNIPPET_START, SNIPPET_END, fts_query
+
+__all__ = [
+    'BookManagerError', 'BookNotFound', 'DuplicateTitle', 'InvalidCover',
+    'BookSummary', 'BookListing', 'PageSummary', 'PageRecord', 'PageHead', 'Splice', 'SearchHit',
+    'PageCursor', 'TitleIndex',
+    'BookService', 'PageService', 'SNIPPET_START', 'SNIPPET_END', 'fts_query',
+]
@@ -0,0 +1,17 @@
+class BookManagerError(Exception):
+    """Base class of the errors raised by the core services, with a message fit for the user."""
+
+class BookNotFound(BookManagerError):
+    def __init__(self, book):
+        super().__init__(f"No book {book!r}")
+        self.book = book
+
+class DuplicateTitle(BookManagerError):
+    def __init__(self, title):
+        super().__init__(f"A book titled {title!r} already exists")
+        self.title = title
+
+class InvalidCover(BookManagerError):
+    def __init__(self, path, reason):
+        super().__init__(f"Cannot use {path!r} as a cover: {reason}")
+        self.path = path
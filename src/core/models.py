@@ -0,0 +1,49 @@
+from typing import NamedTuple, Optional
+
+class BookSummary(NamedTuple):
+    id: int
+    title: str
+    cover_path: Optional[str]
+
+class BookListing(NamedTuple):
+    """A book as listed in the book grid."""
+    id: int
+    title: str
+    cover_path: Optional[str]
+    pages: int  # Number of pages.
+
+class PageSummary(NamedTuple):
+    """A page without its content, as shown in the page list."""
+    id: int
+    number: int
+    title: Optional[str]
+
+class PageRecord(NamedTuple):
+    id: int
+    book_id: int
+    number: int
+    title: Optional[str]
+    content: str
+
+class PageHead(NamedTuple):
+    """A page with only the start of its content, for loading long pages in chunks."""
+    id: int
+    book_id: int
+    number: int
+    title: Optional[str]
+    content: str  # The first characters of the content.
+    length: int  # Length of the whole content, in characters.
+
+class Splice(NamedTuple):
+    """An edit of page content: `removed` characters from `position` replaced by `text`."""
+    position: int
+    removed: int
+    text: str
+
+class SearchHit(NamedTuple):
+    book_id: int
+    book_title: str
+    page_id: int
+    page_number: int
+    page_title: Optional[str]
+    snippet: str  # Matched terms are wrapped in SNIPPET_START / SNIPPET_END.
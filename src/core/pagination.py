@@ -0,0 +1,46 @@
+from .services import PageService
+
+class PageCursor:
+    """Fetches the pages of a book one window at a time using keyset pagination.
+
+    Instead of loading every page and slicing out the next window, each call asks
+    only for the rows after the last page already seen:
+
+        WHERE book_id = ? AND position > (position of the last page seen) ORDER BY position LIMIT page_size
+
+    so loading the next window costs the same no matter how long the book is. Only
+    the (id, title) of each page is selected and numbered from the last page's; the
+    content is fetched when the page is opened.
+
+    The last page is kept by id and its position looked up when the query runs, so
+    pages inserted or deleted meanwhile don't make the window skip or repeat pages.
+    `fetch_next` only reads the cursor and may run on another thread; the caller hands
+    the window to `receive` on the thread that owns the cursor.
+    """
+    def __init__(self, book_id, page_size=40):
+        self.book_id = book_id
+        self.page_size = page_size
+        self.last_id = None  # Id of the last page handed out, None before the first window...
+        self.last_number = 0  # ...and its number, kept up to date by the caller as pages are inserted or deleted.
+        self.exhausted = False  # True once a window came back short, i.e. the end of the book was reached.
+        self.loading = False  # True while a window is being fetched.
+
+    def fetch_next(self, session):
+        """Return the next window of `PageSummary` rows ordered by number (may be empty)."""
+        return PageService(session).window(self.book_id, self.last_number, self.page_size, after_id=self.last_id)
+
+    def receive(self, pages):
+        """Move the cursor past a window returned by `fetch_next` and return the window
+        numbered on from `last_number`, which takes in the pages the caller was told were
+        inserted or deleted while the window was read."""
+        pages = [page._replace(number=number) for number, page in enumerate(pages, self.last_number + 1)]
+        self.loading = False
+        if pages:
+            self.advance(pages[-1].id, pages[-1].number)
+        self.exhausted = len(pages) < self.page_size
+        return pages
+
+    def advance(self, page_id, page_number):
+        """Mark a page that was added after the last one outside of `fetch_next` as seen."""
+        self.last_id = page_id
+        self.last_number = page_number
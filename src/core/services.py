@@ -0,0 +1,402 @@
+"""Services for books and pages.
+
+Each service wraps an open session (see `database.database.session_scope`) and
+returns the plain records from `core.models`, which stay usable after the session
+is closed, so the same calls work from the GUI's database worker and from scripts.
+Methods that change data commit before returning.
+"""
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, update, delete, text as sql_text
+from sqlalchemy.orm import Session
+
+from database import config
+from database.compression import decompress
+from database.covers import CoverStore, is_key
+from database.database import Book, Page, POSITION_STEP
+from .errors import BookNotFound, DuplicateTitle, InvalidCover
+from .models import BookSummary, BookListing, PageSummary, PageRecord, PageHead, Splice, SearchHit
+
+DELETE_CHUNK_SIZE = 10000  # Ids per DELETE, below SQLite's limit on bound parameters.
+
+# Characters of a page body and its length, decompressing only the bodies stored compressed.
+_CONTENT_SUBSTR = ("CASE typeof(content) WHEN 'blob' THEN substr(decompress(content), {start}, {count})"
+                   " ELSE substr(content, {start}, {count}) END")
+_CONTENT_LENGTH = "CASE typeof(content) WHEN 'blob' THEN length(decompress(content)) ELSE length(content) END"
+# The number of a page: its rank in the book, counted in the (book_id, position) index.
+_PAGE_NUMBER = ("(SELECT count(*) FROM pages AS earlier"
+                " WHERE earlier.book_id = pages.book_id AND earlier.position <= pages.position)")
+
+SNIPPET_START = '\x02'  # Markers around matched terms in search snippets; the view turns them into
+SNIPPET_END = '\x03'  # highlighting after escaping the rest of the text.
+
+class BookService:
+    """Create, find, list and delete books. Covers are copied into `covers`, the
+    configured cover store by default."""
+    def __init__(self, session: Session, covers: Optional[CoverStore] = None):
+        self.session = session
+        self.covers = covers if covers is not None else CoverStore()
+
+    def list(self) -> List[BookSummary]:
+        """Return every book."""
+        return [BookSummary(*row) for row in self.session.query(Book.id, Book.title, Book.cover_path)]
+
+    def listing(self) -> List[BookListing]:
+        """Return every book with its number of pages, counted from the (book_id, number) index."""
+        counts = (
+            self.session.query(Page.book_id, func.count().label('pages'))
+            .group_by(Page.book_id)
+            .subquery()
+        )
+        rows = (
+            self.session.query(Book.id, Book.title, Book.cover_path, func.coalesce(counts.c.pages, 0))
+            .outerjoin(counts, counts.c.book_id == Book.id)
+        )
+        return [BookListing(*row) for row in rows]
+
+    def get(self, book_id: int) -> Optional[BookSummary]:
+        row = self.session.query(Book.id, Book.title, Book.cover_path).filter(Book.id == book_id).first()
+        return BookSummary(*row) if row is not None else None
+
+    def find(self, title: str) -> Optional[BookSummary]:
+        """Return the book with the given title, or None."""
+        row = self.session.query(Book.id, Book.title, Book.cover_path).filter(Book.title == title).first()
+        return BookSummary(*row) if row is not None else None
+
+    def require(self, title: str) -> BookSummary:
+        """Return the book with the given title, raising `BookNotFound` if there is none."""
+        book = self.find(title)
+        if book is None:
+            raise BookNotFound(title)
+        return book
+
+    def create(self, title: str, cover_path: Optional[str] = None) -> BookSummary:
+        """Add a book. Titles are unique, a taken one raises `DuplicateTitle`.
+
+        The cover image is copied into the cover store and the book refers to it by
+        its key; an image that can't be read raises `InvalidCover`."""
+        if self.find(title) is not None:
+            raise DuplicateTitle(title)
+
+        if cover_path and not is_key(cover_path):
+            try:
+                cover_path = self.covers.add(cover_path)
+            except (OSError, ValueError) as e:
+                raise InvalidCover(cover_path, e) from None
+
+        book = Book(title=title, cover_path=cover_path)
+        self.session.add(book)
+        self.session.commit()
+        return BookSummary(book.id, title, cover_path)
+
+    def delete(self, book_id: int) -> None:
+        """Delete a book and all of its pages."""
+        self.delete_many([book_id])
+
+    def delete_many(self, book_ids: Iterable[int]) -> None:
+        """Delete several books in one transaction; SQLite removes their pages (ON DELETE CASCADE).
+
+        Nothing is loaded, each chunk of ids is a single DELETE ... WHERE id IN (...)."""
+        book_ids = list(book_ids)
+        for start in range(0, len(book_ids), DELETE_CHUNK_SIZE):
+            self.session.execute(
+                delete(Book)
+                .where(Book.id.in_(book_ids[start:start + DELETE_CHUNK_SIZE]))
+                .execution_options(synchronize_session=False)
+            )
+        self.session.commit()
+
+class PageService:
+    """List, add, edit, renumber, delete and search pages.
+
+    Pages are ordered by `Page.position`, a sort key with gaps between consecutive pages,
+    and numbered by their rank. Inserting a page takes a position between its neighbours
+    and deleting one leaves a gap, so neither rewrites the pages after it; the numbers
+    shown for those pages change by themselves. A book is only renumbered when two
+    neighbours have no position left between them."""
+    def __init__(self, session: Session):
+        self.session = session
+
+    def window(self, book_id: int, after_number: int = 0, limit: Optional[int] = None,
+               after_id: Optional[int] = None) -> List[PageSummary]:
+        """Return the pages of a book numbered after `after_number`, in order, at most `limit` of them.
+
+        With `after_id` the window starts after that page, wherever it is when the query
+        runs, and `after_number` is taken as its number, so pages inserted or deleted in
+        front of it since it was seen don't shift the window. If the page itself was
+        deleted, the pages after it moved up to its number and the window starts there.
+
+        Keyset pagination: after a page given by id, the cost does not depend on how far
+        into the book the window is. Without one the pages in front are counted."""
+        start = None
+        if after_id is not None:
+            start = self.session.query(Page.position).filter(Page.id == after_id, Page.book_id == book_id).scalar()
+            if start is None:
+                after_number -= 1
+        if start is None and after_number > 0:
+            start = self._position_of(book_id, after_number)
+            if start is None:
+                return []
+
+        query = self.session.query(Page.id, Page.title).filter(Page.book_id == book_id).order_by(Page.position)
+        if start is not None:
+            query = query.filter(Page.position > start)
+        if limit is not None:
+            query = query.limit(limit)
+        return [PageSummary(page_id, after_number + index, title)
+                for index, (page_id, title) in enumerate(query, 1)]
+
+    def last_number(self, book_id: int) -> int:
+        """Return the number of the last page of a book, 0 if it has no pages.
+
+        The pages are counted in the (book_id, position) index without touching the rows."""
+        return self.session.query(func.count()).select_from(Page).filter(Page.book_id == book_id).scalar()
+
+    def get(self, page_id: int) -> Optional[PageRecord]:
+        """Return the page with the given id, content included, or None."""
+        row = (
+            self.session.query(Page.id, Page.book_id, Page.position, Page.title, Page.content)
+            .filter(Page.id == page_id)
+            .first()
+        )
+        if row is None:
+            return None
+        return PageRecord(row.id, row.book_id, self._number(row.book_id, row.position), row.title, row.content)
+
+    def head(self, page_id: int, length: int) -> Optional[PageHead]:
+        """Return a page with only the first `length` characters of its content, or None.
+
+        Plain bodies are cut with substr() inside SQLite, so the rest never reaches Python."""
+        row = self.session.execute(
+            sql_text(
+                f"SELECT id, book_id, {_PAGE_NUMBER}, title,"
+                f" {_CONTENT_SUBSTR.format(start=':start', count=':count')}, {_CONTENT_LENGTH}"
+                " FROM pages WHERE id = :id"
+            ),
+            {'id': page_id, 'start': 1, 'count': length},
+        ).first()
+        return PageHead(*row) if row is not None else None
+
+    def heads(self, book_id: int, first: int, last: int, length: int,
+              near: Optional[Tuple[int, int]] = None) -> List[PageHead]:
+        """Return the pages of a book numbered `first` to `last`, in order, each with only
+        the first `length` characters of its content. Used to prefetch the pages around
+        the one being read, in a single range scan of the (book_id, position) index.
+
+        `near` is the (id, number) of a page close to `first`, e.g. the one being read;
+        page `first` is then found by counting from there instead of from the front."""
+        start = self._position_of(book_id, first, near)
+        if start is None:
+            return []
+        rows = self.session.execute(
+            sql_text(
+                "SELECT id, book_id, title,"
+                f" {_CONTENT_SUBSTR.format(start=':start', count=':count')}, {_CONTENT_LENGTH}"
+                " FROM pages WHERE book_id = :book_id AND position >= :position ORDER BY position LIMIT :limit"
+            ),
+            {'book_id': book_id, 'position': start, 'limit': last - first + 1, 'start': 1, 'count': length},
+        )
+        return [PageHead(page_id, book_id, number, title, content, content_length)
+                for number, (page_id, book_id, title, content, content_length) in enumerate(rows, first)]
+
+    def read(self, page_id: int, start: int, count: int = -1) -> str:
+        """Return `count` characters of a page's content from `start` (0-based), or the rest if `count` is negative.
+
+        A plain body is cut with substr() inside SQLite. A compressed one is cut here from
+        its text, which `decompress` keeps for the next chunk of the same body."""
+        count = count if count >= 0 else 2 ** 31 - 1
+        row = self.session.execute(
+            sql_text("SELECT typeof(content) = 'blob',"
+                     " CASE typeof(content) WHEN 'blob' THEN content ELSE substr(content, :start, :count) END"
+                     " FROM pages WHERE id = :id"),
+            {'id': page_id, 'start': start + 1, 'count': count},
+        ).first()
+        if row is None:
+            return ''
+        compressed, value = row
+        return decompress(value)[start:start + count] if compressed else value or ''
+
+    def splice(self, page_id: int, edits: Iterable[Splice]) -> bool:
+        """Apply edits to the content of a page in order. Return False if the page does not exist.
+
+        A plain body is edited in a temporary table with substr(), one statement per edit,
+        and written back to the page once, so neither the body nor the search index is
+        rewritten per edit and the full text only passes through Python if the edits take
+        it past the compression threshold. A compressed body has to be decompressed to edit
+        it, which is done here."""
+        edits = list(edits)
+        stored = self.session.execute(
+            sql_text("SELECT typeof(content) FROM pages WHERE id = :id"), {'id': page_id}).scalar()
+        if stored is None:
+            return False
+        if stored == 'blob':
+            content = decompress(self.session.execute(
+                sql_text("SELECT content FROM pages WHERE id = :id"), {'id': page_id}).scalar())
+            for edit in edits:
+                content = content[:edit.position] + edit.text + content[edit.position + edit.removed:]
+            return self.update_content(page_id, content)
+
+        self.session.execute(sql_text("CREATE TEMP TABLE IF NOT EXISTS page_edit (content TEXT)"))
+        self.session.execute(sql_text("DELETE FROM temp.page_edit"))
+        self.session.execute(
+            sql_text("INSERT INTO temp.page_edit (content) SELECT content FROM pages WHERE id = :id"), {'id': page_id})
+        for edit in edits:
+            self.session.execute(
+                sql_text("UPDATE temp.page_edit SET content ="
+                         " substr(content, 1, :position) || :text || substr(content, :position + :removed + 1)"),
+                edit._asdict(),
+            )
+
+        # A body that grew past the compression threshold is saved compressed, like a new one.
+        threshold = config.compression_threshold()
+        if threshold is not None and self.session.execute(
+                sql_text("SELECT length(CAST(content AS BLOB)) >= :threshold FROM temp.page_edit"),
+                {'threshold': threshold}).scalar():
+            content = self.session.execute(sql_text("SELECT content FROM temp.page_edit")).scalar()
+            self.session.execute(sql_text("DELETE FROM temp.page_edit"))
+            return self.update_content(page_id, content)
+
+        self.session.execute(
+            sql_text("UPDATE pages SET content = (SELECT content FROM temp.page_edit) WHERE id = :id"), {'id': page_id})
+        self.session.execute(sql_text("DELETE FROM temp.page_edit"))
+        self.session.commit()
+        return True
+
+    def append(self, book_id: int, title: Optional[str], content: str) -> PageSummary:
+        """Add a page at the end of a book."""
+        last = self.session.query(func.max(Page.position)).filter(Page.book_id == book_id).scalar()
+        number = self.last_number(book_id) + 1
+        return self._add(book_id, (last or 0) + POSITION_STEP, number, title, content)
+
+    def insert(self, book_id: int, position: int, title: Optional[str], content: str,
+               near: Optional[Tuple[int, int]] = None) -> PageSummary:
+        """Insert a page so it gets number `position`; the pages from there on move back by one.
+
+        The position is clamped to the range of the book (past the end appends). The page
+        takes a sort key between those of its neighbours, so no other row is written unless
+        they have none left between them: then the book is renumbered first, which happens
+        at most once every ten inserts at the same place. `near` is as for `heads`."""
+        number = max(position, 1)
+        following = self._position_of(book_id, number, near)
+        if following is None:
+            return self.append(book_id, title, content)
+
+        previous = (
+            self.session.query(func.max(Page.position))
+            .filter(Page.book_id == book_id, Page.position < following)
+            .scalar()
+        )
+        if previous is None:
+            return self._add(book_id, following - POSITION_STEP, number, title, content)
+        if following - previous < 2:
+            self._respace(book_id)
+            return self.insert(book_id, number, title, content, near)
+        return self._add(book_id, (previous + following) // 2, number, title, content)
+
+    def update_content(self, page_id: int, content: str) -> bool:
+        """Replace the content of a page. Return False if the page does not exist."""
+        updated = self.session.execute(
+            update(Page).where(Page.id == page_id).values(content=content)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        self.session.commit()
+        return updated > 0
+
+    def delete(self, page_id: int) -> Optional[int]:
+        """Delete a page; the pages after it move up by one, without writing them.
+
+        Return the number the page had, or None if it does not exist."""
+        page = self.session.query(Page.book_id, Page.position).filter(Page.id == page_id).first()
+        if page is None:
+            return None
+
+        number = self._number(page.book_id, page.position)
+        self.session.execute(delete(Page).where(Page.id == page_id).execution_options(synchronize_session=False))
+        self.session.commit()
+        return number
+
+    def search(self, text: str, limit: int = 50) -> List[SearchHit]:
+        """Full-text search over page titles and content, best matches first."""
+        query = fts_query(text)
+        if query is None:
+            return []
+
+        rows = self.session.execute(
+            sql_text(
+                f"SELECT books.id, books.title, pages.id, {_PAGE_NUMBER}, pages.title,"
+                " snippet(pages_fts, -1, :start, :end, '…', 16)"
+                " FROM pages_fts"
+                " JOIN pages ON pages.id = pages_fts.rowid"
+                " JOIN books ON books.id = pages.book_id"
+                " WHERE pages_fts MATCH :query"
+                " ORDER BY bm25(pages_fts, 4.0, 1.0)"  # Matches in the title weigh more than in the body.
+                " LIMIT :limit"
+            ),
+            {'query': query, 'start': SNIPPET_START, 'end': SNIPPET_END, 'limit': limit},
+        )
+        return [SearchHit(*row) for row in rows]
+
+    def _add(self, book_id, position, number, title, content):
+        if self.session.get(Book, book_id) is None:
+            raise BookNotFound(book_id)
+        page = Page(position=position, content=content, title=title, book_id=book_id)
+        self.session.add(page)
+        self.session.commit()
+        return PageSummary(page.id, number, title)
+
+    def _number(self, book_id, position):
+        """Return the number of the page of a book at `position`."""
+        return (
+            self.session.query(func.count()).select_from(Page)
+            .filter(Page.book_id == book_id, Page.position <= position)
+            .scalar()
+        )
+
+    def _position_of(self, book_id, number, near=None):
+        """Return the position of page `number` of a book, or None if there is no such page.
+
+        The pages are counted from the front of the book, or from the page `near` (an
+        (id, number) pair) if it is given and still in the book."""
+        if number < 1:
+            return None
+        query = self.session.query(Page.position).filter(Page.book_id == book_id)
+        if near is not None:
+            near_id, near_number = near
+            anchor = self.session.query(Page.position).filter(Page.id == near_id, Page.book_id == book_id).scalar()
+            if anchor is not None and number >= near_number:
+                return (query.filter(Page.position >= anchor).order_by(Page.position)
+                        .offset(number - near_number).limit(1).scalar())
+            if anchor is not None:
+                return (query.filter(Page.position < anchor).order_by(Page.position.desc())
+                        .offset(near_number - number - 1).limit(1).scalar())
+        return query.order_by(Page.position).offset(number - 1).limit(1).scalar()
+
+    def _respace(self, book_id):
+        """Renumber the positions of a book's pages `POSITION_STEP` apart, keeping their order."""
+        self.session.execute(sql_text(
+            "CREATE TEMP TABLE IF NOT EXISTS page_order (id INTEGER PRIMARY KEY, position INTEGER NOT NULL)"))
+        self.session.execute(sql_text("DELETE FROM temp.page_order"))
+        self.session.execute(
+            sql_text("INSERT INTO temp.page_order (id, position)"
+                     " SELECT id, :step * row_number() OVER (ORDER BY position) FROM pages WHERE book_id = :book_id"),
+            {'step': POSITION_STEP, 'book_id': book_id},
+        )
+        self.session.execute(
+            sql_text("UPDATE pages SET position ="
+                     " (SELECT page_order.position FROM temp.page_order WHERE page_order.id = pages.id)"
+                     " WHERE book_id = :book_id"),
+            {'book_id': book_id},
+        )
+        self.session.execute(sql_text("DELETE FROM temp.page_order"))
+
+def fts_query(text):
+    """Turn free text typed by the user into an FTS5 query matching all of its words.
+
+    Every word is quoted so punctuation can't be read as FTS5 syntax, and the last one
+    matches as a prefix so results show up while the user is still typing."""
+    words = [word.replace('"', '""') for word in text.split()]
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
@@ -0,0 +1,120 @@
+"""In-memory index of book titles for filtering as the user types.
+
+Titles are folded to lower case and split into words. A query matches a title when
+every one of its words does: words of three characters or more anywhere in the
+title (through a trigram index), shorter ones at the start of a word of the title
+(through an index of one and two character word prefixes).
+
+A query only looks at the books listed under its rarest trigram or prefix and
+checks those against the folded titles, so its cost depends on how many titles
+could match rather than on the size of the library. Removed books are dropped from
+the posting lists lazily, the next time they get too stale.
+"""
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+_WORD = re.compile(r'\w+')
+
+def fold(text: str) -> str:
+    """Return the searchable form of a title or query: its words, lower-cased, separated by single spaces."""
+    return ' '.join(_WORD.findall(text.casefold()))
+
+@lru_cache(maxsize=64 * 1024)  # Titles share most of their words.
+def _word_keys(word: str) -> Tuple[str, ...]:
+    return (word[:1], word[:2], *(word[i:i + 3] for i in range(len(word) - 2)))
+
+def _keys(text: str) -> set:
+    """Return the prefixes and trigrams a folded title is listed under."""
+    return set().union(*map(_word_keys, text.split()))
+
+class TitleIndex:
+    """Book ids by title, answering `search(query)` with the ids of the matching titles."""
+    def __init__(self, books: Iterable[Tuple[int, str]] = ()):
+        self.titles: Dict[int, str] = {}  # book id -> ' ' + folded title
+        self.postings: Dict[str, List[int]] = {}  # prefix or trigram -> book ids, stale ones included
+        self.stale = 0  # Postings of removed or renamed books still in the lists.
+        self.removed = set()  # Ids with stale postings...
+        self.reused = set()  # ...and those of them indexed again, whose stale postings now look valid.
+        self.update(books)
+
+    def __len__(self):
+        return len(self.titles)
+
+    def add(self, book_id: int, title: str) -> None:
+        """Index a book, replacing the title it had."""
+        self.update([(book_id, title)])
+
+    def update(self, books: Iterable[Tuple[int, str]]) -> None:
+        """Index several (id, title) pairs at once."""
+        titles, postings = self.titles, self.postings
+        for book_id, title in books:
+            if book_id in titles:
+                self.remove(book_id)
+            if book_id in self.removed:
+                self.reused.add(book_id)
+            text = fold(title)
+            titles[book_id] = ' ' + text
+            for key in _keys(text):
+                ids = postings.get(key)
+                if ids is None:
+                    postings[key] = [book_id]
+                else:
+                    ids.append(book_id)
+
+    def remove(self, book_id: int) -> None:
+        text = self.titles.pop(book_id, None)
+        if text is None:
+            return
+        self.stale += len(_keys(text[1:]))
+        self.removed.add(book_id)
+        if self.stale > len(self.titles) * 8:
+            self.compact()
+
+    def compact(self) -> None:
+        """Drop the postings of removed books and the old titles of renamed ones from the lists."""
+        titles = self.titles
+        current = {book_id: _keys(titles[book_id][1:]) for book_id in self.reused if book_id in titles}
+        for key, ids in list(self.postings.items()):  # In place, `update` may be holding the dict.
+            ids[:] = [book_id for book_id in ids
+                      if book_id in titles and (book_id not in current or key in current[book_id])]
+            if not ids:
+                del self.postings[key]
+        self.stale = 0
+        self.removed.clear()
+        self.reused.clear()
+
+    def matches(self, book_id: int, query: str) -> bool:
+        """Return whether an indexed book matches `query`, without looking at the other books."""
+        title = self.titles.get(book_id)
+        return title is not None and all(
+            (word if len(word) >= 3 else ' ' + word) in title for word in fold(query).split())
+
+    def search(self, query: str) -> Optional[set]:
+        """Return the ids of the books matching `query`, or None if it has no words (everything matches)."""
+        words = fold(query).split()
+        if not words:
+            return None
+
+        # Candidates come from the shortest posting list of any word; every word is
+        # then checked against the title itself.
+        candidates = None
+        for word in words:
+            keys = [word[i:i + 3] for i in range(len(word) - 2)] if len(word) >= 3 else [word]
+            for key in keys:
+                ids = self.postings.get(key)
+                if ids is None:
+                    return set()
+                if candidates is None or len(ids) < len(candidates):
+                    candidates = ids
+
+        if len(words) == 1 and len(words[0]) <= 3 and not self.reused:
+            # The list of a single prefix or trigram is the exact answer, less the removed books.
+            return set(candidates).intersection(self.titles) if self.stale else set(candidates)
+
+        needles = [word if len(word) >= 3 else ' ' + word for word in words]
+        titles = self.titles
+        return {
+            book_id for book_id in candidates
+            if (title := titles.get(book_id)) is not None and all(needle in title for needle in needles)
+        }
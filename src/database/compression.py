@@ -0,0 +1,153 @@
+"""Optional zlib compression of page bodies at rest.
+
+`Page.content` is a `CompressedText` column: bodies of at least
+`config.compression_threshold()` bytes are written as a BLOB holding a one byte
+codec marker followed by the zlib stream, shorter bodies (and every body while
+compression is off) stay plain TEXT. Reading decompresses transparently, so code
+using the ORM sees strings either way.
+
+SQLite itself only sees the stored values. `register_functions` adds a
+`decompress(content)` SQL function to every connection, which the search index
+uses to read the page text through the `pages_text` view. `compress_pages`
+compresses the bodies already in a database in place, and `measure` reports the
+compression ratio and the time it takes to decode a body.
+"""
+import time
+import zlib
+import statistics
+from collections import namedtuple
+
+from sqlalchemy import String
+from sqlalchemy.types import TypeDecorator
+
+from . import config
+
+ZLIB = b'z'  # Marker in front of zlib compressed bodies, leaving room for other codecs.
+LEVEL = 6
+
+CompressionStats = namedtuple('CompressionStats', 'pages compressed text_bytes stored_bytes')
+DecodeTimings = namedtuple('DecodeTimings', 'samples mean_us median_us p95_us max_us')
+
+def compress(text, threshold):
+    """Return the value to store for `text`: compressed if it is at least `threshold` bytes
+    long (and compression saves space), else the text itself."""
+    if threshold is None:
+        return text
+    data = text.encode('utf-8')
+    if len(data) < threshold:
+        return text
+    compressed = ZLIB + zlib.compress(data, LEVEL)
+    return compressed if len(compressed) < len(data) else text
+
+_last_decoded = (None, None)  # (stored value, text) of the body decompressed last.
+
+def decompress(value):
+    """Return the text of a stored body, compressed or not.
+
+    The text of the last compressed body is kept along with its stored value, so reading
+    a long page a chunk at a time decompresses it once instead of once per chunk."""
+    global _last_decoded
+    if isinstance(value, bytes):
+        stored, text = _last_decoded
+        if value == stored:
+            return text
+        if value[:1] != ZLIB:
+            raise ValueError("Unknown page content encoding")
+        text = zlib.decompress(value[1:]).decode('utf-8')
+        _last_decoded = (value, text)  # Replaced as a whole, other threads see either pair.
+        return text
+    return value
+
+class CompressedText(TypeDecorator):
+    """A string column compressing long values with `compress` and reading them back with `decompress`."""
+    impl = String
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return compress(value, config.compression_threshold())
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return decompress(value)
+
+def register_functions(dbapi_connection, connection_record=None):
+    """Connect event listener adding the `decompress()` SQL function to a DB-API connection."""
+    dbapi_connection.create_function('decompress', 1, decompress, deterministic=True)
+
+def compress_pages(engine, threshold, batch_size=1000, progress=None):
+    """Compress every plain page body of at least `threshold` bytes, in place.
+
+    Pages are rewritten `batch_size` at a time, each batch in its own transaction, so
+    the command can be interrupted and run again. The search index is left alone, the
+    text of the pages does not change. Return the number of pages compressed."""
+    compressed = 0
+    last_id = 0
+    with engine.connect() as connection:
+        while True:
+            rows = connection.exec_driver_sql(
+                "SELECT id, content FROM pages"
+                " WHERE id > ? AND typeof(content) = 'text' AND length(CAST(content AS BLOB)) >= ?"
+                " ORDER BY id LIMIT ?",
+                (last_id, threshold, batch_size),
+            ).all()
+            if not rows:
+                break
+
+            updates = []
+            for page_id, content in rows:
+                value = compress(content, threshold)
+                if value is not content:
+                    updates.append((value, page_id))
+            if updates:
+                connection.exec_driver_sql("UPDATE pages SET content = ? WHERE id = ?", updates)
+            connection.commit()
+
+            compressed += len(updates)
+            last_id = rows[-1][0]
+            if progress is not None:
+                progress(compressed)
+    return compressed
+
+def stored_bytes(engine):
+    """Return the bytes taken by the page bodies as stored."""
+    with engine.connect() as connection:
+        return connection.exec_driver_sql("SELECT coalesce(sum(length(CAST(content AS BLOB))), 0) FROM pages").scalar()
+
+def measure(engine, samples=1000):
+    """Return the `CompressionStats` of a database and the `DecodeTimings` of up to
+    `samples` compressed bodies (None if no body is compressed)."""
+    with engine.connect() as connection:
+        stats = CompressionStats(*connection.exec_driver_sql(
+            "SELECT count(*), coalesce(sum(typeof(content) = 'blob'), 0),"
+            " coalesce(sum(length(CAST(decompress(content) AS BLOB))), 0),"
+            " coalesce(sum(length(CAST(content AS BLOB))), 0)"
+            " FROM pages"
+        ).one())
+
+        # Spread the samples over the whole table rather than timing the first pages only.
+        step = max(1, stats.compressed // max(1, samples))
+        values = [value for (value,) in connection.exec_driver_sql(
+            "SELECT content FROM (SELECT content, row_number() OVER (ORDER BY id) AS n"
+            " FROM pages WHERE typeof(content) = 'blob') WHERE n % ? = 0 LIMIT ?",
+            (step, samples),
+        )]
+
+    if not values:
+        return stats, None
+
+    timings = []
+    for value in values:
+        start = time.perf_counter()
+        decompress(value)
+        timings.append((time.perf_counter() - start) * 1e6)
+    timings.sort()
+    return stats, DecodeTimings(
+        len(timings),
+        round(statistics.fmean(timings), 1),
+        round(statistics.median(timings), 1),
+        round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 1),
+        round(timings[-1], 1),
+    )
@@ -0,0 +1,93 @@
+"""Where the database file lives and how its connections are set up.
+
+The path is taken from, in order: `set_database_path()` (the `--database` option of
+the application and the command line tools), the `BOOK_MANAGER_DATABASE` environment
+variable, and `books.db` in the working directory.
+
+Every new SQLite connection gets the pragmas in `PRAGMAS`: write-ahead logging so
+the worker thread can write while other connections read, `synchronous=NORMAL`
+(safe with WAL, and skips an fsync per transaction), and larger page cache and
+memory-mapped I/O windows for big libraries. Foreign keys are enforced, which SQLite
+leaves off by default.
+
+Page bodies are stored as plain text unless compression is turned on, with
+`set_compression_threshold()` (the `--compression-threshold` option) or the
+`BOOK_MANAGER_COMPRESSION` environment variable: bodies of at least that many bytes
+are then written zlib-compressed. Compressed and plain bodies are read alike, so
+turning it off again only affects pages written afterwards.
+
+Book covers are copied into a store directory (see `database.covers`), by default
+`covers` next to the database file, so a library moves along with its covers. Use
+`set_covers_path()` or the `BOOK_MANAGER_COVERS` environment variable to keep
+them elsewhere.
+"""
+import os
+
+ENVIRONMENT_VARIABLE = 'BOOK_MANAGER_DATABASE'
+DEFAULT_PATH = 'books.db'
+COMPRESSION_ENVIRONMENT_VARIABLE = 'BOOK_MANAGER_COMPRESSION'  # Threshold in bytes, or "off".
+COVERS_ENVIRONMENT_VARIABLE = 'BOOK_MANAGER_COVERS'
+
+PRAGMAS = (
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('cache_size', -32 * 1024),  # Negative sizes are in KiB: 32 MiB of page cache per connection.
+    ('mmap_size', 256 * 1024 * 1024),
+    ('busy_timeout', 5000),  # Milliseconds to wait for a lock before failing with "database is locked".
+    ('foreign_keys', 'ON'),  # Enforce the foreign keys, deleting a book cascades to its pages.
+)
+
+_path = None
+_compression_threshold = None
+_covers_path = None
+
+def set_database_path(path):
+    """Use the database file at `path` (None goes back to the environment or the default)."""
+    global _path
+    _path = path
+
+def database_path():
+    return _path or os.environ.get(ENVIRONMENT_VARIABLE) or DEFAULT_PATH
+
+def database_url(path=None):
+    """Return the SQLAlchemy URL of the database file at `path`, or of the configured one."""
+    path = path or database_path()
+    if path == ':memory:':
+        return 'sqlite://'
+    return 'sqlite:///' + os.path.abspath(os.path.expanduser(path))
+
+def set_compression_threshold(threshold):
+    """Compress page bodies of at least `threshold` bytes (None goes back to the environment, 0 turns it off)."""
+    global _compression_threshold
+    _compression_threshold = threshold
+
+def compression_threshold():
+    """Return the size in bytes from which page bodies are compressed, or None if they are stored as is."""
+    threshold = _compression_threshold
+    if threshold is None:
+        setting = os.environ.get(COMPRESSION_ENVIRONMENT_VARIABLE, 'off').strip().lower()
+        threshold = 0 if setting in ('', 'off', '0') else int(setting)
+    return threshold if threshold > 0 else None
+
+def set_covers_path(path):
+    """Keep the cover store in the directory `path` (None goes back to the environment or the default)."""
+    global _covers_path
+    _covers_path = path
+
+def covers_path():
+    """Return the absolute path of the cover store directory."""
+    path = _covers_path or os.environ.get(COVERS_ENVIRONMENT_VARIABLE)
+    if path:
+        return os.path.abspath(os.path.expanduser(path))
+    database = database_path()
+    base = os.getcwd() if database == ':memory:' else os.path.dirname(os.path.abspath(os.path.expanduser(database)))
+    return os.path.join(base, 'covers')
+
+def apply_pragmas(dbapi_connection, connection_record=None):
+    """Connect event listener setting `PRAGMAS` on a new DB-API connection."""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in PRAGMAS:
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
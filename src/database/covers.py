@@ -0,0 +1,169 @@
+"""Content-addressed store for book covers.
+
+A cover is copied into the store when its book is added or imported, so moving or
+deleting the original file no longer breaks the card. Files are named after the
+SHA-256 of the image bytes, two hex digits of it naming a subdirectory:
+
+    <store>/3f/3fa1...e9.jpg      the original, as picked by the user
+    <store>/3f/3fa1...e9@1x.png   scaled to the card size (`CARD_SIZE`)
+    <store>/3f/3fa1...e9@2x.png   scaled to twice that, for high-DPI screens
+
+An image used by several books is stored (and scaled) once. `Book.cover_path`
+holds the key of a stored cover, its path relative to the store (`3f/3fa1...e9.jpg`,
+see `is_key`); the cards only decode the small PNGs and never scale anything.
+Paths saved before the store existed keep working and are moved into it by
+`migrate_legacy` (`python bookmanager.py covers`).
+
+Images are decoded and scaled with Qt's `QImageReader`, which needs no
+QApplication, and imported on first use. `CoverStore.add_many` and the bulk
+importer scale the covers on a pool of processes, one cover per task.
+"""
+import os
+import re
+import shutil
+import hashlib
+from collections import namedtuple
+
+from . import config
+
+CARD_SIZE = (110, 150)  # Cover size on a book card, in device-independent pixels.
+SCALES = (1, 2)
+HASH_BLOCK_SIZE = 1024 * 1024
+
+_KEY = re.compile(r'[0-9a-f]{2}/[0-9a-f]{64}(\.[0-9a-z]+)?\Z')
+
+MigrationResult = namedtuple('MigrationResult', 'books stored failed')
+
+def is_key(cover_path):
+    """Return whether a `cover_path` value is the key of a stored cover rather than a file path."""
+    return bool(cover_path) and _KEY.match(cover_path) is not None
+
+def file_digest(path):
+    """Return the SHA-256 of a file as hex, reading it a block at a time."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def scaled_name(digest, scale):
+    return f"{digest}@{scale}x.png"
+
+def store_cover(root, source):
+    """Copy the image at `source` into the store at `root`, write its scaled variants
+    and return its key. Storing an image that is already there only hashes it.
+
+    Raises OSError if the file can't be read or written and ValueError if it is not
+    an image Qt can decode. Runs in the pool processes of `add_many` as well."""
+    digest = file_digest(source)
+    key = f"{digest[:2]}/{digest}{os.path.splitext(source)[1].lower()}"
+    directory = os.path.join(root, digest[:2])
+    original = os.path.join(root, *key.split('/'))
+    scaled = [os.path.join(directory, scaled_name(digest, scale)) for scale in SCALES]
+    if all(os.path.exists(path) for path in [original] + scaled):
+        return key
+
+    write_scaled(source, scaled)
+    temp_path = f"{original}.{os.getpid()}.tmp"
+    shutil.copyfile(source, temp_path)
+    os.replace(temp_path, original)
+    return key
+
+def write_scaled(source, destinations):
+    """Write the image at `source` scaled to each of `SCALES` times `CARD_SIZE` as PNG.
+
+    The largest variant is decoded at its size straight from the file (JPEG decoders
+    scale while reading), the smaller ones are scaled down from it."""
+    from PyQt5.QtCore import Qt, QSize
+    from PyQt5.QtGui import QImageReader
+
+    width, height = CARD_SIZE
+    reader = QImageReader(source)
+    reader.setAutoTransform(True)
+    reader.setScaledSize(QSize(width * max(SCALES), height * max(SCALES)))
+    image = reader.read()
+    if image.isNull():
+        raise ValueError(f"{source}: not a supported image ({reader.errorString()})")
+
+    os.makedirs(os.path.dirname(destinations[0]), exist_ok=True)
+    for scale, destination in sorted(zip(SCALES, destinations), reverse=True):
+        size = QSize(width * scale, height * scale)
+        if image.size() != size:
+            image = image.scaled(size, Qt.AspectRatioMode.IgnoreAspectRatio, Qt.TransformationMode.SmoothTransformation)
+        # Written under a temporary name first: several processes may store the same image at once.
+        temp_path = f"{destination}.{os.getpid()}.tmp"
+        if not image.save(temp_path, 'PNG'):
+            raise OSError(f"Could not write {destination}")
+        os.replace(temp_path, destination)
+
+def executor(workers=None):
+    """Return a process pool for `store_cover`. Processes are spawned rather than forked,
+    the GUI may call this with Qt threads running."""
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    return ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'))
+
+class CoverStore:
+    """The cover store at `root`, or at `config.covers_path()` (looked up on every use) if None."""
+    def __init__(self, root=None):
+        self.root = root
+
+    def directory(self):
+        return self.root or config.covers_path()
+
+    def path(self, key, scale=None):
+        """Return the file of a stored cover: the original, or the variant scaled `scale` times."""
+        prefix, name = key.split('/')
+        if scale is not None:
+            name = scaled_name(os.path.splitext(name)[0], scale)
+        return os.path.join(self.directory(), prefix, name)
+
+    def resolve(self, cover_path):
+        """Return the image file of a `cover_path` value, stored or not."""
+        return self.path(cover_path) if is_key(cover_path) else cover_path
+
+    def add(self, source):
+        """Store the image at `source` and return its key."""
+        return store_cover(self.directory(), source)
+
+    def add_many(self, sources, workers=None):
+        """Store several images on a process pool (`workers` processes, default one per
+        CPU). Return ({source: key}, {source: error}) for the stored and failed ones."""
+        sources = list(dict.fromkeys(sources))
+        root = self.directory()
+        keys, errors = {}, {}
+        if len(sources) < 2:
+            # Starting processes costs more than scaling a single cover.
+            for source in sources:
+                try:
+                    keys[source] = store_cover(root, source)
+                except (OSError, ValueError) as e:
+                    errors[source] = e
+            return keys, errors
+
+        with executor(workers) as pool:
+            futures = {source: pool.submit(store_cover, root, source) for source in sources}
+            for source, future in futures.items():
+                try:
+                    keys[source] = future.result()
+                except (OSError, ValueError) as e:
+                    errors[source] = e
+        return keys, errors
+
+def migrate_legacy(engine, store=None, workers=None):
+    """Move every cover still referenced by its file path into the store and point
+    the books at the keys. Files that are missing or not images are left as they
+    are. Return a `MigrationResult`."""
+    store = store if store is not None else CoverStore()
+    with engine.connect() as connection:
+        legacy = [
+            (book_id, cover_path) for book_id, cover_path in connection.exec_driver_sql(
+                "SELECT id, cover_path FROM books WHERE cover_path IS NOT NULL AND cover_path != ''")
+            if not is_key(cover_path)
+        ]
+        keys, _ = store.add_many((cover_path for _, cover_path in legacy), workers)
+        updates = [(keys[cover_path], book_id) for book_id, cover_path in legacy if cover_path in keys]
+        if updates:
+            connection.exec_driver_sql("UPDATE books SET cover_path = ? WHERE id = ?", updates)
+        connection.commit()
+    return MigrationResult(len(legacy), len(updates), len(legacy) - len(updates))
@@ -1,30 +1,100 @@
-from sqlalchemy import create_engine, Column, Integer, String, ForeignKey
+import threading
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine, event, Column, Integer, String, ForeignKey, Index
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.orm import sessionmaker, relationship, deferred
+
+from . import config
+from .compression import CompressedText, register_functions
+from .migrations import upgrade
+from .query_stats import query_stats
 
 Base = declarative_base()
 
-engine = create_engine('sqlite:///books.db')
-Session = sessionmaker(bind=engine)
+# Bound to the engine by get_engine() on first use. Objects stay readable after commit
+# since query results are handed to the GUI thread once their session is closed.
+Session = sessionmaker(expire_on_commit=False)
+_engine_lock = threading.Lock()
+
+def create_database_engine(path=None):
+    """Create an engine for the database file at `path` (or the configured one) with the
+    connection pragmas from `config.PRAGMAS` and the `decompress()` SQL function,
+    recording its statements in `query_stats`."""
+    engine = create_engine(config.database_url(path))
+    event.listen(engine, 'connect', config.apply_pragmas)
+    event.listen(engine, 'connect', register_functions)
+    query_stats.install(engine)
+    return engine
+
+def get_engine():
+    """Return the engine `Session` is bound to, creating the configured one on first use.
+
+    Importing this module does not touch the database file; scripts and benchmarks can
+    point the application at another database with `configure(path)`."""
+    with _engine_lock:
+        engine = Session.kw.get('bind')
+        if engine is None:
+            engine = create_database_engine()
+            Session.configure(bind=engine)
+        return engine
+
+def configure(path=None):
+    """Bind `Session` to the database file at `path` and return its engine."""
+    engine = create_database_engine(path)
+    with _engine_lock:
+        previous = Session.kw.get('bind')
+        Session.configure(bind=engine)
+    if previous is not None:
+        previous.dispose()
+    return engine
+
+@contextmanager
+def session_scope(bind=None):
+    """Provide a session for a unit of work: committed if the block succeeds, rolled back
+    if it raises, and closed either way so its connection goes back to the pool."""
+    session = Session(bind=bind if bind is not None else get_engine())
+    try:
+        yield session
+        session.commit()
+    except BaseException:
+        session.rollback()
+        raise
+    finally:
+        session.close()
 
 class Book(Base):
     __tablename__ = 'books'
-    
+    __table_args__ = (
+        Index('ix_books_title', 'title', unique=True),  # Books are looked up by title.
+    )
+
     id = Column(Integer, primary_key=True)
     title = Column(String, nullable=False)
     cover_path = Column(String, nullable=True)
 
-    pages = relationship("Page", back_populates="book")
+    pages = relationship("Page", back_populates="book", passive_deletes=True)  # SQLite deletes the pages.
+
+# Distance between the positions of consecutive pages when a book is numbered afresh,
+# leaving room to insert about ten pages between two of them before renumbering.
+POSITION_STEP = 1024
 
 class Page(Base):
     __tablename__ = 'pages'
-    
+    __table_args__ = (
+        Index('ix_pages_book_id_position', 'book_id', 'position'),  # Pages are fetched per book, in order.
+    )
+
     id = Column(Integer, primary_key=True)
-    number = Column(Integer, nullable=False)
-    content = Column(String, nullable=False)
+    # Sort key of the page within its book, with gaps between pages. The page number the
+    # user sees is its rank, counted in the (book_id, position) index.
+    position = Column(Integer, nullable=False)
+    content = deferred(Column(CompressedText, nullable=False))  # Page bodies are only loaded when a page is opened.
     title = Column(String, nullable=True)
-    book_id = Column(Integer, ForeignKey('books.id'), nullable=False)
-    
+    book_id = Column(Integer, ForeignKey('books.id', ondelete='CASCADE'), nullable=False)
+
     book = relationship("Book", back_populates="pages")
 
-Base.metadata.create_all(engine)  # Create the tables.
+def init_db():
+    """Create the tables or upgrade an existing database file to the current schema."""
+    return upgrade(get_engine())
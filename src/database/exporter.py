@@ -0,0 +1,131 @@
+"""Streaming export of the whole library to a JSONL file or a zip archive.
+
+The JSONL output uses the record format read by `database.importer`: one line per
+book declaring its title (and cover), followed by one line per page. A `.zip`
+destination additionally holds the cover images under `covers/`, next to the
+`library.jsonl` entry; an image shared by several books is written once. Covers
+are exported as the original files, not the scaled copies of the cover store.
+
+Books and pages are read with `yield_per`, a chunk at a time, so exporting runs in
+bounded memory whatever the size of the library.
+"""
+import os
+import sys
+import json
+import zipfile
+import argparse
+from collections import namedtuple
+
+from sqlalchemy import select
+
+from . import config
+from .covers import CoverStore, is_key
+from .database import session_scope, init_db, Book, Page
+
+ExportProgress = namedtuple('ExportProgress', 'books pages')
+
+LIBRARY_ENTRY = 'library.jsonl'
+
+def cover_entry(book_id, cover_path):
+    if is_key(cover_path):
+        return f"covers/{cover_path.split('/')[1]}"  # Named after the image, books sharing it share the entry.
+    return f"covers/{book_id}{os.path.splitext(cover_path)[1].lower()}"
+
+def iter_lines(session, covers=None, chunk_size=1000, progress=None):
+    """Yield the JSONL lines of the library.
+
+    `covers` maps book ids to the archive path to record as their cover; without it
+    the paths of the cover files are written."""
+    store = CoverStore()
+    books = pages = 0
+    book_rows = session.execute(
+        select(Book.id, Book.title, Book.cover_path).order_by(Book.id).execution_options(yield_per=chunk_size))
+    for book_id, title, cover_path in book_rows:
+        record = {'book': title}
+        cover = covers.get(book_id) if covers is not None else store.resolve(cover_path)
+        if cover:
+            record['cover'] = cover
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+        books += 1
+
+    page_rows = session.execute(
+        select(Book.title, Page.title, Page.content)
+        .join(Page, Page.book_id == Book.id)
+        .order_by(Page.book_id, Page.position)
+        .execution_options(yield_per=chunk_size))
+    for book_title, title, content in page_rows:
+        yield json.dumps({'book': book_title, 'title': title, 'content': content}, ensure_ascii=False) + '\n'
+        pages += 1
+        if progress is not None and pages % chunk_size == 0:
+            progress(ExportProgress(books, pages))
+
+    if progress is not None:
+        progress(ExportProgress(books, pages))
+
+def export_library(destination, engine=None, chunk_size=1000, progress=None):
+    """Export every book and page to `destination` (`.zip` for an archive with covers,
+    anything else for plain JSONL). Return the final `ExportProgress`.
+
+    The export is written next to `destination` and only renamed to it once complete,
+    so an export that fails or is interrupted (e.g. by `progress` raising) never leaves
+    a truncated file behind."""
+    result = []
+    def track(state):
+        result[:] = [state]
+        if progress is not None:
+            progress(state)
+
+    partial = f"{destination}.partial"
+    try:
+        with session_scope(engine) as session:
+            if destination.lower().endswith('.zip'):
+                with zipfile.ZipFile(partial, 'w', zipfile.ZIP_DEFLATED) as archive:
+                    covers = write_covers(session, archive, chunk_size)
+                    with archive.open(LIBRARY_ENTRY, 'w', force_zip64=True) as entry:
+                        for line in iter_lines(session, covers, chunk_size, track):
+                            entry.write(line.encode('utf-8'))
+            else:
+                with open(partial, 'w', encoding='utf-8') as file:
+                    for line in iter_lines(session, None, chunk_size, track):
+                        file.write(line)
+        os.replace(partial, destination)
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    return result[0]
+
+def write_covers(session, archive, chunk_size):
+    """Copy existing cover files into the archive and return {book id: archive path}."""
+    store = CoverStore()
+    covers = {}
+    written = set()
+    rows = session.execute(
+        select(Book.id, Book.cover_path).where(Book.cover_path.isnot(None), Book.cover_path != '')
+        .execution_options(yield_per=chunk_size))
+    for book_id, cover_path in rows:
+        name = cover_entry(book_id, cover_path)
+        path = store.resolve(cover_path)
+        if name not in written and os.path.isfile(path):
+            archive.write(path, name)
+            written.add(name)
+        if name in written:
+            covers[book_id] = name
+    return covers
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Export the library to a JSONL file or a zip archive with covers.')
+    parser.add_argument('destination', help='output file, .zip or .jsonl')
+    parser.add_argument('--database', help=f'database file (default: ${config.ENVIRONMENT_VARIABLE} or {config.DEFAULT_PATH})')
+    args = parser.parse_args(argv)
+    config.set_database_path(args.database)
+
+    def report(progress):
+        print(f"\r{progress.books} books, {progress.pages} pages exported", end='', file=sys.stderr, flush=True)
+
+    init_db()
+    export_library(args.destination, progress=report)
+    print(file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,285 @@
+"""Streaming bulk import of books and pages.
+
+Sources are read lazily, one record at a time, and pages are written with batched
+`executemany` inserts, one transaction per batch, so memory stays bounded by the
+batch size no matter how large the archive is.
+
+Supported sources:
+
+- A `.jsonl` file: one JSON object per line, `{"book": ..., "title": ..., "content": ...}`.
+  A line without "content" only declares a book, optionally with a "cover" path
+  (relative paths are resolved against the file's directory).
+- A `.txt` or `.md` file: one book named after the file. Text files are split into
+  pages at form feed characters, Markdown files at top-level `# ` headings, which
+  become the page titles.
+- A `.zip` archive written by `database.exporter`: its `library.jsonl` entry is
+  streamed as above, with the covers read from the archive.
+- A directory: every text or Markdown file directly inside it becomes one page of a
+  book named after the directory (in file name order, titled by the file name);
+  `.jsonl` and `.zip` files are read as above and subdirectories are imported recursively.
+
+Pages are appended after the existing pages of a book with the same title. Covers
+are copied into the cover store (`database.covers`) and scaled on a process pool
+while the pages are being written.
+"""
+import io
+import os
+import sys
+import json
+import zipfile
+import argparse
+import tempfile
+from collections import namedtuple
+
+from sqlalchemy import select, func, insert, update, bindparam
+
+from . import config
+from .covers import CoverStore, executor, store_cover
+from .database import get_engine, init_db, Book, Page, POSITION_STEP
+from .exporter import LIBRARY_ENTRY
+
+TEXT_SUFFIXES = ('.txt', '.text')
+MARKDOWN_SUFFIXES = ('.md', '.markdown')
+JSONL_SUFFIXES = ('.jsonl',)
+ZIP_SUFFIXES = ('.zip',)
+
+Record = namedtuple('Record', 'book title content cover')  # content is None for a book declaration.
+ImportProgress = namedtuple('ImportProgress', 'books pages')
+
+def iter_records(path, workdir=None):
+    """Yield the records of a file or directory, see the module docstring for the formats.
+
+    Covers in `.zip` archives are extracted into `workdir`, which has to outlive the
+    import; without one the books of an archive are imported without their covers."""
+    if os.path.isdir(path):
+        yield from iter_directory(path, workdir)
+    elif path.lower().endswith(JSONL_SUFFIXES):
+        yield from iter_jsonl(path)
+    elif path.lower().endswith(ZIP_SUFFIXES):
+        yield from iter_zip(path, workdir)
+    elif path.lower().endswith(MARKDOWN_SUFFIXES):
+        yield from iter_markdown(path, book_title(path))
+    elif path.lower().endswith(TEXT_SUFFIXES):
+        yield from iter_text(path, book_title(path))
+    else:
+        raise ValueError(f"Unsupported file type: {path}")
+
+def book_title(path):
+    return os.path.splitext(os.path.basename(os.path.normpath(path)))[0]
+
+def iter_directory(path, workdir=None):
+    entries = sorted(os.scandir(path), key=lambda entry: entry.name)
+    title = os.path.basename(os.path.abspath(path))
+    subdirectories = []
+    for entry in entries:
+        name = entry.name.lower()
+        if entry.is_dir():
+            subdirectories.append(entry.path)
+        elif name.endswith(JSONL_SUFFIXES):
+            yield from iter_jsonl(entry.path)
+        elif name.endswith(ZIP_SUFFIXES):
+            yield from iter_zip(entry.path, workdir)
+        elif name.endswith(TEXT_SUFFIXES + MARKDOWN_SUFFIXES):
+            with open(entry.path, encoding='utf-8') as file:
+                yield Record(title, book_title(entry.path), file.read(), None)
+
+    for subdirectory in subdirectories:
+        yield from iter_directory(subdirectory, workdir)
+
+def iter_jsonl(path):
+    base = os.path.dirname(os.path.abspath(path))
+    with open(path, encoding='utf-8') as file:
+        yield from parse_jsonl(file, path, lambda cover: os.path.join(base, cover))
+
+def iter_zip(path, workdir=None):
+    """Stream the records of an archive written by `database.exporter`, extracting each
+    cover into `workdir` the first time a book refers to it."""
+    with zipfile.ZipFile(path) as archive:
+        names = set(archive.namelist())
+        if LIBRARY_ENTRY not in names:
+            raise ValueError(f"{path}: not a library export, it has no {LIBRARY_ENTRY}")
+        extracted = {}
+
+        def extract(cover):
+            if workdir is None or cover not in names:
+                return None
+            if cover not in extracted:
+                extracted[cover] = archive.extract(cover, workdir)
+            return extracted[cover]
+
+        with archive.open(LIBRARY_ENTRY) as entry:
+            yield from parse_jsonl(io.TextIOWrapper(entry, encoding='utf-8'), f"{path}:{LIBRARY_ENTRY}", extract)
+
+def parse_jsonl(lines, name, resolve_cover):
+    """Yield the records of JSONL `lines` read from `name`; relative cover paths are
+    turned into files by `resolve_cover` (None drops the cover)."""
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+            book = data['book']
+        except (ValueError, KeyError) as e:
+            raise ValueError(f"{name}:{line_number}: invalid record ({e})") from None
+
+        cover = data.get('cover')
+        if cover and not os.path.isabs(cover):
+            cover = resolve_cover(cover)
+        yield Record(book, data.get('title'), data.get('content'), cover)
+
+def iter_text(path, book):
+    """Split a text file into pages at form feed characters, reading it in blocks."""
+    pending = []
+    with open(path, encoding='utf-8') as file:
+        for block in iter(lambda: file.read(64 * 1024), ''):
+            *complete, rest = block.split('\f')
+            for part in complete:
+                pending.append(part)
+                yield Record(book, None, ''.join(pending), None)
+                pending = []
+            pending.append(rest)
+
+    content = ''.join(pending)
+    if content.strip():
+        yield Record(book, None, content, None)
+
+def iter_markdown(path, book):
+    """Split a Markdown file into pages at top-level headings, reading it line by line."""
+    title, lines = None, []
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            if line.startswith('# '):
+                if title is not None or ''.join(lines).strip():
+                    yield Record(book, title, ''.join(lines), None)
+                title, lines = line[2:].strip(), []
+            else:
+                lines.append(line)
+
+    if title is not None or ''.join(lines).strip():
+        yield Record(book, title, ''.join(lines), None)
+
+class BulkImporter:
+    """Writes records into the database in large batched transactions.
+
+    Books are created the first time their title is seen (or reused if the title
+    already exists); pages are buffered and inserted `batch_size` at a time with a
+    single executemany per batch. `progress`, if given, is called with an
+    `ImportProgress` after every committed batch.
+
+    Covers of new books are stored in `covers` by a pool of `workers` processes
+    (started on the first cover). Books point at the original file until their
+    cover is stored and keep doing so if it can't be, like a library from before
+    the cover store.
+    """
+    def __init__(self, engine=None, batch_size=10000, progress=None, covers=None, workers=None):
+        self.engine = engine if engine is not None else get_engine()
+        self.batch_size = batch_size
+        self.progress = progress
+        self.covers = covers if covers is not None else CoverStore()
+        self.workers = workers
+        self.pool = None
+        self.pending_covers = []  # (book id, future of the cover key) not written yet.
+        self.cover_futures = {}  # Cover file -> future, each file is stored once.
+        self.books = {}  # title -> [book id, position of the last page]
+        self.created_books = 0
+        self.imported_pages = 0
+
+    def run(self, records):
+        """Import an iterable of records and return the final `ImportProgress`."""
+        batch = []
+        try:
+            with self.engine.connect() as connection:
+                for record in records:
+                    book = self.book(connection, record)
+                    if record.content is None:
+                        continue
+
+                    book[1] += POSITION_STEP
+                    batch.append({'book_id': book[0], 'position': book[1],
+                                  'title': record.title, 'content': record.content})
+                    if len(batch) >= self.batch_size:
+                        self.flush(connection, batch)
+                        batch = []
+
+                self.flush(connection, batch)
+                self.write_covers(connection, wait=True)
+        finally:
+            if self.pool is not None:
+                self.pool.shutdown(cancel_futures=True)
+                self.pool = None
+        return ImportProgress(self.created_books, self.imported_pages)
+
+    def book(self, connection, record):
+        """Return the [id, last page position] entry of a record's book, creating the book if needed."""
+        book = self.books.get(record.book)
+        if book is not None:
+            return book
+
+        row = connection.execute(select(Book.id).where(Book.title == record.book)).first()
+        if row is not None:
+            last_position = connection.execute(
+                select(func.coalesce(func.max(Page.position), 0)).where(Page.book_id == row.id)).scalar()
+            book = [row.id, last_position]
+        else:
+            result = connection.execute(insert(Book).values(title=record.book, cover_path=record.cover))
+            book = [result.inserted_primary_key[0], 0]
+            self.created_books += 1
+            if record.cover:
+                self.store_cover(book[0], record.cover)
+
+        self.books[record.book] = book
+        return book
+
+    def store_cover(self, book_id, path):
+        """Start storing the cover of a new book on the process pool."""
+        future = self.cover_futures.get(path)
+        if future is None:
+            if self.pool is None:
+                self.pool = executor(self.workers)
+            future = self.cover_futures[path] = self.pool.submit(store_cover, self.covers.directory(), path)
+        self.pending_covers.append((book_id, future))
+
+    def write_covers(self, connection, wait=False):
+        """Point the books whose cover is stored (all of them if `wait`) at its key."""
+        updates, pending = [], []
+        for book_id, future in self.pending_covers:
+            if not wait and not future.done():
+                pending.append((book_id, future))
+            elif future.exception() is None:
+                updates.append({'book_id': book_id, 'key': future.result()})
+        self.pending_covers = pending
+        if updates:
+            connection.execute(update(Book).where(Book.id == bindparam('book_id')).values(cover_path=bindparam('key')), updates)
+        connection.commit()
+
+    def flush(self, connection, batch):
+        if batch:
+            connection.execute(insert(Page), batch)
+            self.imported_pages += len(batch)
+        self.write_covers(connection)
+        if self.progress is not None:
+            self.progress(ImportProgress(self.created_books, self.imported_pages))
+
+def import_paths(paths, engine=None, batch_size=10000, progress=None, covers=None, workers=None):
+    """Import files and directories into the database and return the final `ImportProgress`."""
+    importer = BulkImporter(engine, batch_size, progress, covers, workers)
+    with tempfile.TemporaryDirectory() as workdir:  # Covers extracted from archives, kept until they are stored.
+        return importer.run(record for path in paths for record in iter_records(path, workdir))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Import books and pages from text, Markdown, JSONL or exported zip files.')
+    parser.add_argument('paths', nargs='+', help='files or directories to import')
+    parser.add_argument('--batch-size', type=int, default=10000, help='pages inserted per transaction')
+    parser.add_argument('--database', help=f'database file (default: ${config.ENVIRONMENT_VARIABLE} or {config.DEFAULT_PATH})')
+    args = parser.parse_args(argv)
+    config.set_database_path(args.database)
+
+    def report(progress):
+        print(f"\r{progress.books} books, {progress.pages} pages imported", end='', file=sys.stderr, flush=True)
+
+    init_db()
+    import_paths(args.paths, batch_size=args.batch_size, progress=report)
+    print(file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
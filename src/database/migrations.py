@@ -0,0 +1,217 @@
+"""Versioned schema migrations for the books database.
+
+The schema version is kept in SQLite's `user_version` pragma. `upgrade()` applies
+every migration newer than the version stored in the file, each one in its own
+transaction, so existing `books.db` files are upgraded in place. To change the
+schema, add a new function decorated with `@migration(<next version>)`; never edit
+a migration that has already shipped.
+"""
+MIGRATIONS = []  # (version, function) pairs, in version order.
+
+def migration(version):
+    """Register a function taking a connection as the migration to `version`."""
+    def register(fn):
+        assert not MIGRATIONS or MIGRATIONS[-1][0] == version - 1, "Migrations must be numbered consecutively"
+        MIGRATIONS.append((version, fn))
+        return fn
+    return register
+
+def current_version(connection):
+    return connection.exec_driver_sql('PRAGMA user_version').scalar()
+
+def latest_version():
+    return MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+def upgrade(engine):
+    """Bring the database up to the latest schema version. Return the list of versions applied."""
+    applied = []
+    with engine.connect() as connection:
+        version = current_version(connection)
+        for target, migrate in MIGRATIONS:
+            if target <= version:
+                continue
+
+            # SQLite only makes DDL transactional inside an explicit BEGIN.
+            connection.exec_driver_sql('BEGIN')
+            try:
+                migrate(connection)
+                connection.exec_driver_sql(f'PRAGMA user_version = {target:d}')
+            except Exception:
+                connection.rollback()
+                raise
+            connection.commit()
+            applied.append(target)
+    return applied
+
+@migration(1)
+def create_tables(connection):
+    """Create the books and pages tables as they were before the schema was versioned."""
+    connection.exec_driver_sql(
+        "CREATE TABLE IF NOT EXISTS books ("
+        " id INTEGER NOT NULL,"
+        " title VARCHAR NOT NULL,"
+        " cover_path VARCHAR,"
+        " PRIMARY KEY (id))"
+    )
+    connection.exec_driver_sql(
+        "CREATE TABLE IF NOT EXISTS pages ("
+        " id INTEGER NOT NULL,"
+        " number INTEGER NOT NULL,"
+        " content VARCHAR NOT NULL,"
+        " title VARCHAR,"
+        " book_id INTEGER NOT NULL,"
+        " PRIMARY KEY (id),"
+        " FOREIGN KEY(book_id) REFERENCES books (id))"
+    )
+
+@migration(2)
+def add_lookup_indexes(connection):
+    """Make book titles unique and index pages by (book_id, number)."""
+    # Titles were never unique, so rename later duplicates to "Title (2)", "Title (3)", ...
+    # before the unique index can be created.
+    taken = {title for (title,) in connection.exec_driver_sql("SELECT title FROM books")}
+    duplicates = connection.exec_driver_sql(
+        "SELECT id, title FROM books WHERE id NOT IN (SELECT MIN(id) FROM books GROUP BY title) ORDER BY id"
+    ).all()
+    for book_id, title in duplicates:
+        suffix = 2
+        while f"{title} ({suffix})" in taken:
+            suffix += 1
+        new_title = f"{title} ({suffix})"
+        taken.add(new_title)
+        connection.exec_driver_sql("UPDATE books SET title = ? WHERE id = ?", (new_title, book_id))
+
+    connection.exec_driver_sql("CREATE UNIQUE INDEX IF NOT EXISTS ix_books_title ON books (title)")
+    connection.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_pages_book_id_number ON pages (book_id, number)")
+
+@migration(3)
+def add_page_search_index(connection):
+    """Index page titles and content with FTS5, kept in sync with `pages` by triggers."""
+    connection.exec_driver_sql(
+        "CREATE VIRTUAL TABLE pages_fts USING fts5("
+        " title, content, content='pages', content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+    )
+    connection.exec_driver_sql("INSERT INTO pages_fts(pages_fts) VALUES ('rebuild')")
+    connection.exec_driver_sql(
+        "CREATE TRIGGER pages_fts_insert AFTER INSERT ON pages BEGIN"
+        " INSERT INTO pages_fts(rowid, title, content) VALUES (new.id, new.title, new.content);"
+        " END"
+    )
+    connection.exec_driver_sql(
+        "CREATE TRIGGER pages_fts_delete AFTER DELETE ON pages BEGIN"
+        " INSERT INTO pages_fts(pages_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);"
+        " END"
+    )
+    connection.exec_driver_sql(
+        "CREATE TRIGGER pages_fts_update AFTER UPDATE OF title, content ON pages BEGIN"
+        " INSERT INTO pages_fts(pages_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);"
+        " INSERT INTO pages_fts(rowid, title, content) VALUES (new.id, new.title, new.content);"
+        " END"
+    )
+
+@migration(4)
+def cascade_page_deletes(connection):
+    """Make deleting a book delete its pages, through ON DELETE CASCADE on pages.book_id.
+
+    SQLite can't alter a foreign key, so the pages table is rebuilt: copied into a new
+    table with the constraint, then renamed, keeping the row ids the search index uses.
+    Dropping the old table drops its index and triggers, which are created again."""
+    # Pages of books deleted without them can't satisfy the constraint.
+    connection.exec_driver_sql("DELETE FROM pages WHERE book_id NOT IN (SELECT id FROM books)")
+
+    connection.exec_driver_sql(
+        "CREATE TABLE pages_new ("
+        " id INTEGER NOT NULL,"
+        " number INTEGER NOT NULL,"
+        " content VARCHAR NOT NULL,"
+        " title VARCHAR,"
+        " book_id INTEGER NOT NULL,"
+        " PRIMARY KEY (id),"
+        " FOREIGN KEY(book_id) REFERENCES books (id) ON DELETE CASCADE)"
+    )
+    connection.exec_driver_sql(
+        "INSERT INTO pages_new (id, number, content, title, book_id)"
+        " SELECT id, number, content, title, book_id FROM pages"
+    )
+    connection.exec_driver_sql("DROP TABLE pages")  # Does not fire the delete trigger, the search index stays.
+    connection.exec_driver_sql("ALTER TABLE pages_new RENAME TO pages")
+
+    connection.exec_driver_sql("CREATE INDEX ix_pages_book_id_number ON pages (book_id, number)")
+    connection.exec_driver_sql(
+        "CREATE TRIGGER pages_fts_insert AFTER INSERT ON pages BEGIN"
+        " INSERT INTO pages_fts(rowid, title, content) VALUES (new.id, new.title, new.content);"
+        " END"
+    )
+    connection.exec_driver_sql(  # Also fires for the pages removed by the cascade.
+        "CREATE TRIGGER pages_fts_delete AFTER DELETE ON pages BEGIN"
+        " INSERT INTO pages_fts(pages_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);"
+        " END"
+    )
+    connection.exec_driver_sql(
+        "CREATE TRIGGER pages_fts_update AFTER UPDATE OF title, content ON pages BEGIN"
+        " INSERT INTO pages_fts(pages_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);"
+        " INSERT INTO pages_fts(rowid, title, content) VALUES (new.id, new.title, new.content);"
+        " END"
+    )
+
+@migration(5)
+def search_decompressed_content(connection):
+    """Index the text of the pages rather than their stored value, which may be compressed.
+
+    The search index reads page bodies through the `pages_text` view, which decodes
+    them with the `decompress()` SQL function every connection registers. Updates
+    only re-index a page when its title or text changed, so compressing the bodies
+    in place leaves the index alone."""
+    connection.exec_driver_sql(
+        "CREATE VIEW pages_text AS SELECT id, title, decompress(content) AS content FROM pages"
+    )
+
+    connection.exec_driver_sql("DROP TRIGGER pages_fts_insert")
+    connection.exec_driver_sql("DROP TRIGGER pages_fts_delete")
+    connection.exec_driver_sql("DROP TRIGGER pages_fts_update")
+    connection.exec_driver_sql("DROP TABLE pages_fts")
+    connection.exec_driver_sql(
+        "CREATE VIRTUAL TABLE pages_fts USING fts5("
+        " title, content, content='pages_text', content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+    )
+    connection.exec_driver_sql("INSERT INTO pages_fts(pages_fts) VALUES ('rebuild')")
+
+    connection.exec_driver_sql(
+        "CREATE TRIGGER pages_fts_insert AFTER INSERT ON pages BEGIN"
+        " INSERT INTO pages_fts(rowid, title, content) VALUES (new.id, new.title, decompress(new.content));"
+        " END"
+    )
+    connection.exec_driver_sql(
+        "CREATE TRIGGER pages_fts_delete AFTER DELETE ON pages BEGIN"
+        " INSERT INTO pages_fts(pages_fts, rowid, title, content)"
+        " VALUES ('delete', old.id, old.title, decompress(old.content));"
+        " END"
+    )
+    connection.exec_driver_sql(
+        "CREATE TRIGGER pages_fts_update AFTER UPDATE OF title, content ON pages"
+        " WHEN old.title IS NOT new.title OR decompress(old.content) IS NOT decompress(new.content) BEGIN"
+        " INSERT INTO pages_fts(pages_fts, rowid, title, content)"
+        " VALUES ('delete', old.id, old.title, decompress(old.content));"
+        " INSERT INTO pages_fts(rowid, title, content) VALUES (new.id, new.title, decompress(new.content));"
+        " END"
+    )
+
+@migration(6)
+def gapped_page_positions(connection):
+    """Order pages by a sort key with gaps instead of their dense page number, so a page can
+    be inserted without renumbering every page after it.
+
+    `number` becomes `position`, 1024 times the rank of the page in its book (ties in the
+    old numbering are ordered by id)."""
+    connection.exec_driver_sql("DROP INDEX ix_pages_book_id_number")
+    connection.exec_driver_sql("ALTER TABLE pages RENAME COLUMN number TO position")
+    connection.exec_driver_sql("CREATE TEMP TABLE page_ranks (id INTEGER PRIMARY KEY, position INTEGER NOT NULL)")
+    connection.exec_driver_sql(
+        "INSERT INTO temp.page_ranks (id, position)"
+        " SELECT id, 1024 * row_number() OVER (PARTITION BY book_id ORDER BY position, id) FROM pages"
+    )
+    connection.exec_driver_sql(  # Leaves the search index alone, its triggers only watch title and content.
+        "UPDATE pages SET position = (SELECT page_ranks.position FROM temp.page_ranks WHERE page_ranks.id = pages.id)"
+    )
+    connection.exec_driver_sql("DROP TABLE temp.page_ranks")
+    connection.exec_driver_sql("CREATE INDEX ix_pages_book_id_position ON pages (book_id, position)")
@@ -0,0 +1,118 @@
+import sys
+import threading
+from collections import OrderedDict, namedtuple
+
+CachedPage = namedtuple('CachedPage', 'id book_id number title content')
+
+class PageCache:
+    """Bounded LRU cache of page bodies keyed by (book id, page number).
+
+    The cache holds at most `max_bytes` of page content, evicting the least recently
+    used pages first. Pages can also be looked up by id. Writers keep it coherent:
+    saves go through `put` / `update_content` (write-through) and deletions through
+    the `invalidate*` methods. `hits` and `misses` count lookups so the hit rate can
+    be reported. All methods are thread-safe.
+    """
+    def __init__(self, max_bytes=16 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0  # Bytes of content currently held.
+        self.hits = 0
+        self.misses = 0
+        self._pages = OrderedDict()  # (book id, number) -> CachedPage, least recently used first.
+        self._keys = {}  # page id -> (book id, number)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._pages)
+
+    def __contains__(self, key):
+        """Return whether the page (book id, number) is cached, without counting a lookup."""
+        with self._lock:
+            return key in self._pages
+
+    def get(self, book_id, number):
+        """Return the cached page, or None on a miss."""
+        with self._lock:
+            return self._lookup((book_id, number))
+
+    def get_by_id(self, page_id):
+        """Return the cached page with the given id, or None on a miss."""
+        with self._lock:
+            return self._lookup(self._keys.get(page_id))
+
+    def put(self, page):
+        """Store a page, given as a `CachedPage` or any object with the same attributes."""
+        page = CachedPage(page.id, page.book_id, page.number, page.title, page.content)
+        cost = self.cost(page.content)
+        with self._lock:
+            self._remove(self._keys.get(page.id))
+            self._remove((page.book_id, page.number))
+            if cost > self.max_bytes:
+                return  # Bigger than the whole budget, keep it out instead of flushing everything.
+
+            key = (page.book_id, page.number)
+            self._pages[key] = page
+            self._keys[page.id] = key
+            self.size += cost
+            while self.size > self.max_bytes:
+                _, evicted = self._pages.popitem(last=False)
+                del self._keys[evicted.id]
+                self.size -= self.cost(evicted.content)
+
+    def update_content(self, page_id, content):
+        """Write-through for a saved page: replace its cached content if it is cached."""
+        with self._lock:
+            key = self._keys.get(page_id)
+            page = self._pages.get(key)
+        if page is not None:
+            self.put(page._replace(content=content))
+
+    def invalidate(self, page_id):
+        """Forget a page, e.g. after it was deleted."""
+        with self._lock:
+            self._remove(self._keys.get(page_id))
+
+    def invalidate_book(self, book_id, from_number=None):
+        """Forget the pages of a book, or only those numbered `from_number` and up."""
+        with self._lock:
+            for key in [key for key in self._pages
+                        if key[0] == book_id and (from_number is None or key[1] >= from_number)]:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+            self._keys.clear()
+            self.size = 0
+
+    def stats(self):
+        """Return the hit/miss counters and the current occupancy."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'pages': len(self._pages),
+                'bytes': self.size,
+                'max_bytes': self.max_bytes,
+            }
+
+    @staticmethod
+    def cost(content):
+        return sys.getsizeof(content)
+
+    def _lookup(self, key):
+        page = self._pages.get(key) if key is not None else None
+        if page is None:
+            self.misses += 1
+            return None
+        self._pages.move_to_end(key)
+        self.hits += 1
+        return page
+
+    def _remove(self, key):
+        page = self._pages.pop(key, None) if key is not None else None
+        if page is not None:
+            del self._keys[page.id]
+            self.size -= self.cost(page.content)
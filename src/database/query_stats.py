@@ -0,0 +1,96 @@
+"""Per-statement counts and latency histograms for every SQL statement the application runs.
+
+`create_database_engine` installs `query_stats` on the engines it creates, so the
+numbers cover the GUI worker, imports and exports alike. Statements are grouped by
+their SQL text, with `IN (?, ?, ...)` lists of any length folded into one entry.
+"""
+import re
+import time
+import threading
+
+from sqlalchemy import event
+
+HISTOGRAM_BOUNDS_MS = (1, 5, 10, 50, 100, 500, 1000)  # Upper bounds of the latency buckets, plus one for slower.
+MAX_STATEMENTS = 500  # Distinct statements tracked; later ones are counted under OTHER_STATEMENT.
+OTHER_STATEMENT = '(other statements)'
+
+_PARAMETER_LIST = re.compile(r'\bIN \(\?(?:\s*,\s*\?)+\)', re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+
+def normalize(statement):
+    """Collapse whitespace and fold parameter lists so similar statements share an entry."""
+    statement = _WHITESPACE.sub(' ', statement).strip()
+    return _PARAMETER_LIST.sub('IN (?, ...)', statement)
+
+class _Entry:
+    __slots__ = ('count', 'total', 'max', 'histogram')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.histogram = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+
+    def add(self, elapsed_ms):
+        self.count += 1
+        self.total += elapsed_ms
+        self.max = max(self.max, elapsed_ms)
+        for bucket, bound in enumerate(HISTOGRAM_BOUNDS_MS):
+            if elapsed_ms <= bound:
+                break
+        else:
+            bucket = len(HISTOGRAM_BOUNDS_MS)
+        self.histogram[bucket] += 1
+
+class QueryStats:
+    """Collects statement timings from SQLAlchemy cursor events. Thread-safe."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}  # normalized statement -> _Entry
+
+    def install(self, engine):
+        event.listen(engine, 'before_cursor_execute', self.before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self.after_cursor_execute)
+
+    def before_cursor_execute(self, connection, cursor, statement, parameters, context, executemany):
+        connection.info.setdefault('query_start', []).append(time.perf_counter())
+
+    def after_cursor_execute(self, connection, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - connection.info['query_start'].pop()) * 1000
+        self.record(statement, elapsed_ms)
+
+    def record(self, statement, elapsed_ms):
+        key = normalize(statement)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                if len(self._entries) >= MAX_STATEMENTS:
+                    key = OTHER_STATEMENT
+                    entry = self._entries.get(key)
+                if entry is None:
+                    entry = self._entries[key] = _Entry()
+            entry.add(elapsed_ms)
+
+    def reset(self):
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self):
+        """Return the statistics per statement as plain data, the most time-consuming first."""
+        labels = [f"<={bound}ms" for bound in HISTOGRAM_BOUNDS_MS] + [f">{HISTOGRAM_BOUNDS_MS[-1]}ms"]
+        with self._lock:
+            entries = [
+                {
+                    'statement': statement,
+                    'count': entry.count,
+                    'total_ms': round(entry.total, 3),
+                    'mean_ms': round(entry.total / entry.count, 3),
+                    'max_ms': round(entry.max, 3),
+                    'histogram': dict(zip(labels, entry.histogram)),
+                }
+                for statement, entry in self._entries.items()
+            ]
+        entries.sort(key=lambda entry: entry['total_ms'], reverse=True)
+        return entries
+
+query_stats = QueryStats()
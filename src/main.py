@@ -1,13 +1,110 @@
+import time
+
+STARTED = time.perf_counter()  # Taken before the heavy imports so they show up in the startup profile.
+
 import sys
-from PyQt5.QtWidgets import QApplication
+import logging
+import argparse
+from contextlib import contextmanager
+
+class StartupProfiler:
+    """Records how long each startup phase takes, reported by --profile-startup.
+
+    Phases are timed from when the process reached `main.py`; a phase can start on
+    one callback and stop on another, e.g. a query submitted to the worker thread."""
+    def __init__(self):
+        self.phases = []  # [name, start, end] in seconds since STARTED, end is None while running.
+
+    def start(self, name):
+        phase = [name, time.perf_counter() - STARTED, None]
+        self.phases.append(phase)
+        return phase
+
+    def stop(self, phase):
+        if phase[2] is None:
+            phase[2] = time.perf_counter() - STARTED
+
+    @contextmanager
+    def phase(self, name):
+        phase = self.start(name)
+        try:
+            yield
+        finally:
+            self.stop(phase)
+
+    def mark(self, name):
+        self.stop(self.start(name))
+
+    def report(self, file=sys.stderr):
+        print("Startup profile (ms):", file=file)
+        for name, start, end in self.phases:
+            print(f"  {name:<36} {start * 1000:9.1f} -> {end * 1000:9.1f}  ({(end - start) * 1000:8.1f})", file=file)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Book Manager')
+    parser.add_argument('--database', help='database file (default: $BOOK_MANAGER_DATABASE or books.db)')
+    parser.add_argument('--compression-threshold', type=int, metavar='BYTES',
+                        help='compress page bodies saved from this size on, 0 for never (default: $BOOK_MANAGER_COMPRESSION or never)')
+    parser.add_argument('--stall-threshold', type=int, default=200, metavar='MS',
+                        help='log event handlers blocking the GUI for longer than this (default: %(default)s)')
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='print how long each startup phase took once the books are loaded')
+    parser.add_argument('--exit-after-startup', action='store_true',
+                        help='quit once startup finished, for measuring it from scripts')
+    args, qt_args = parser.parse_known_args(argv if argv is not None else sys.argv[1:])
+
+    logging.basicConfig(level=logging.INFO)
+    from database import config  # Only the settings, the database layer itself loads after the first frame.
+    config.set_database_path(args.database)
+    config.set_compression_threshold(args.compression_threshold)
+    profiler = StartupProfiler()
+
+    with profiler.phase('import Qt'):
+        from PyQt5.QtCore import QObject, QEvent, QTimer
+        from PyQt5.QtWidgets import QApplication
+
+    with profiler.phase('create application'):
+        app = QApplication(sys.argv[:1] + qt_args)
+        app.setApplicationName('Book Manager')  # Names the per-user cache directory for cover thumbnails.
+
+    with profiler.phase('import views'):
+        from views.main_window import MainWindow
+
+    with profiler.phase('build main window'):
+        main_window = MainWindow(stall_threshold_ms=args.stall_threshold)
+
+    def finish_startup():
+        # Icons, the schema upgrade and the books only load once the window is on screen.
+        with profiler.phase('load icons'):
+            main_window.load_icons()
+
+        loading = profiler.start('initialize database and load books')
+        main_window.book_list_view.book_model.modelReset.connect(lambda: on_books_loaded(loading))
+        main_window.initialize_database()
+
+    def on_books_loaded(loading):
+        if loading[2] is not None:
+            return  # Later reloads are not part of the startup.
+        profiler.stop(loading)
+        if args.profile_startup:
+            profiler.report()
+        if args.exit_after_startup:
+            app.quit()
 
-from views.main_window import MainWindow
+    class FirstFrameFilter(QObject):
+        """Finishes the startup after the main window painted for the first time."""
+        def eventFilter(self, watched, event):
+            if event.type() == QEvent.Type.Paint:
+                watched.removeEventFilter(self)
+                profiler.stop(showing)
+                QTimer.singleShot(0, finish_startup)
+            return False
 
-def main():
-    app = QApplication(sys.argv)
-    main_window = MainWindow()
+    first_frame = FirstFrameFilter()
+    main_window.installEventFilter(first_frame)
+    showing = profiler.start('show until first frame')
     main_window.show()
     sys.exit(app.exec_())
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -1,93 +1,91 @@
-from PyQt5.QtCore import Qt, pyqtSignal
-from PyQt5.QtGui import QPixmap, QCursor, QFont, QColor
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QSizePolicy, QPushButton, QSpacerItem, QGraphicsDropShadowEffect
-
-class BookCard(QWidget):
-    clicked = pyqtSignal(str)  # Signal to emit book title on click
-    delete_requested = pyqtSignal(str)
-
-    def __init__(self, title, cover_path=None):
-        super().__init__()
-
-        self.full_title = title  # Store the full title
-
-        # Set fixed size for the BookCard
-        self.setFixedSize(150, 250)  # Width: 150, Height: 250, adjust as needed
-
-        # Set up layout
-        layout = QVBoxLayout(self)
-        layout.setContentsMargins(10, 10, 10, 10)  # Set margins around the layout
-        layout.setSpacing(10)  
-
-        # Set up cover image
-        self.cover_label = QLabel(self)
-        self.cover_label.setFixedSize(110, 150)  # Fixed size for cover image
-        self.cover_label.setPixmap(self.load_cover(cover_path))
-        self.cover_label.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)  # Fixed size policy
-        layout.addWidget(self.cover_label, Qt.AlignmentFlag.AlignHCenter)
-
-        # Set up book title with placeholder text
-        self.title_label = QLabel(self)  # Create the label first
-        self.title_label.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)  # Expand horizontally, but fixed height
-        self.title_label.setAlignment(Qt.AlignmentFlag.AlignLeft)  # Align text to the left
-        self.title_label.setWordWrap(True)  # Enable word wrapping if needed
-        self.title_label.setFont(QFont('Merriweather', 10, QFont.Weight.Light))
-        layout.addWidget(self.title_label, Qt.AlignmentFlag.AlignLeft)  # Align left in layout
-
-        # Add spacer item before the button to center it
-        layout.addSpacerItem(QSpacerItem(20, 40, QSizePolicy.Minimum, QSizePolicy.Expanding))
-
-        # Add delete button
-        self.delete_button = QPushButton("Delete")
-        self.delete_button.setFixedWidth(70)
-        self.delete_button.setStyleSheet(
-            "QPushButton {"
-            "border-radius: 5px;"  # Reduced border-radius for a tighter look
-            "padding: 3px;"  # Reduced padding to ensure hover effect stays within button height
-            "background-color: darkgray;"
-            "}"
-            "QPushButton:hover {"
-            "background-color: gray;"
-            "}"
-            "QPushButton:pressed {"
-            "background-color: darkgray;"
-            "}"
-        )
-        self.delete_button.clicked.connect(self.on_delete_clicked)
-        layout.addWidget(self.delete_button, Qt.AlignmentFlag.AlignHCenter)  # Center button horizontally
-
-        # Add spacer item after the button to center it
-        layout.addSpacerItem(QSpacerItem(20, 40, QSizePolicy.Minimum, QSizePolicy.Expanding))
-
-        # Set initial style        
-        self.setCursor(QCursor(Qt.CursorShape.PointingHandCursor))  # Set cursor to a pointing hand
-
-        # Apply shadow effect
-        shadow_effect = QGraphicsDropShadowEffect()
-        shadow_effect.setBlurRadius(15)  # Adjust blur radius as needed
-        shadow_effect.setOffset(5, 5)    # Adjust offset for shadow position
-        shadow_effect.setColor(QColor(0, 0, 0, 160))  # Set shadow color and transparency
-        self.setGraphicsEffect(shadow_effect)
-
-        # Set layout
-        self.setLayout(layout)
-
-        # Update the title label with ellipsized text
-        self.update_title(self.full_title)
-
-        # Set the tooltip to the full title
-        self.title_label.setToolTip(self.full_title)
+from PyQt5.QtCore import Qt, QEvent, QRect, QRectF, QSize, pyqtSignal
+from PyQt5.QtGui import QPixmap, QPainter, QPen, QFont, QFontMetrics, QColor, QCursor
+from PyQt5.QtWidgets import (
+    QStyledItemDelegate, QStyle, QListView, QGraphicsScene, QGraphicsRectItem, QGraphicsBlurEffect
+)
+
+from .book_model import BookListModel
+from .cover_cache import CoverCache
+
+CARD_SIZE = QSize(150, 250)  # Width: 150, Height: 250
+COVER_SIZE = QSize(110, 150)  # Fixed size for cover image, the size the cover store scales to (database.covers.CARD_SIZE)
+MARGIN = 10  # Margins around the card contents
+SPACING = 10  # Vertical spacing between the cover, the title and the delete button
+DELETE_BUTTON_SIZE = QSize(70, 22)
+SHADOW_BLUR_RADIUS = 15
+SHADOW_OFFSET = 5
+SHADOW_COLOR = QColor(0, 0, 0, 160)
+
+class BookCardDelegate(QStyledItemDelegate):
+    """Paints a book card (cover, elided title, drop shadow and delete button) for a row
+    of `BookListModel`.
+
+    Nothing is created per book: the shadow is rendered once and reused, and the view
+    only calls `paint` for the cards that are visible. Covers come from `covers`, which
+    decodes them in the background; a placeholder is painted until `cover_ready` fires."""
+    clicked = pyqtSignal(int)  # Signal to emit book id on click
+    delete_requested = pyqtSignal(int)
+
+    _shadow = None  # Shared pre-rendered shadow pixmap, built on first paint.
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.title_font = QFont('Merriweather', 10, QFont.Weight.Light)
+        self.button_font = QFont()
+        self.covers = CoverCache(COVER_SIZE, parent=self)
+        self.placeholder = QPixmap(COVER_SIZE)
+        self.placeholder.fill(Qt.GlobalColor.lightGray)
+
+    def sizeHint(self, option, index):
+        return CARD_SIZE
+
+    def cover_rect(self, rect):
+        """Return the cover rectangle, centered horizontally at the top of the card."""
+        x = rect.x() + (rect.width() - COVER_SIZE.width()) // 2
+        return QRect(x, rect.y() + MARGIN, COVER_SIZE.width(), COVER_SIZE.height())
+
+    def title_rect(self, rect):
+        top = self.cover_rect(rect).bottom() + 1 + SPACING
+        height = QFontMetrics(self.title_font).height()
+        return QRect(rect.x() + MARGIN, top, rect.width() - 2 * MARGIN, height)
+
+    def delete_rect(self, rect):
+        """Return the delete button rectangle, centered in the space below the title."""
+        top = self.title_rect(rect).bottom() + 1
+        bottom = rect.bottom() - MARGIN
+        x = rect.x() + (rect.width() - DELETE_BUTTON_SIZE.width()) // 2
+        y = top + (bottom - top - DELETE_BUTTON_SIZE.height()) // 2
+        return QRect(x, y, DELETE_BUTTON_SIZE.width(), DELETE_BUTTON_SIZE.height())
 
     def load_cover(self, cover_path):
-        """Load cover image or use placeholder if not available."""
-        if cover_path:
-            pixmap = QPixmap(cover_path)
-        else:
-            pixmap = QPixmap(110, 150)
-            pixmap.fill(Qt.GlobalColor.lightGray)
-        return pixmap
-
-    def elide_title(self, title):
+        """Return the cover thumbnail, or the placeholder if there is none or it is still loading."""
+        pixmap = self.covers.cover(cover_path) if cover_path else None
+        return pixmap if pixmap is not None else self.placeholder
+
+    @classmethod
+    def shadow(cls):
+        """Render the blurred cover shadow once and share it between all cards."""
+        if cls._shadow is None:
+            pad = SHADOW_BLUR_RADIUS
+            scene = QGraphicsScene()
+            item = QGraphicsRectItem(0, 0, COVER_SIZE.width(), COVER_SIZE.height())
+            item.setBrush(SHADOW_COLOR)
+            item.setPen(QPen(Qt.PenStyle.NoPen))
+            blur = QGraphicsBlurEffect()
+            blur.setBlurRadius(SHADOW_BLUR_RADIUS)
+            item.setGraphicsEffect(blur)
+            scene.addItem(item)
+
+            source = QRectF(-pad, -pad, COVER_SIZE.width() + 2 * pad, COVER_SIZE.height() + 2 * pad)
+            pixmap = QPixmap(source.size().toSize())
+            pixmap.fill(Qt.GlobalColor.transparent)
+            painter = QPainter(pixmap)
+            scene.render(painter, QRectF(pixmap.rect()), source)
+            painter.end()
+            cls._shadow = pixmap
+        return cls._shadow
+
+    def elide_title(self, title, width):
         """Ellipsizes the title to fit within the label's width, considering the number of characters."""
         max_characters = 15  # Define the maximum number of characters to display
 
@@ -98,23 +96,88 @@ class BookCard(QWidget):
             truncated_title = title
 
         # Now perform the ellipsis based on the width if needed
-        metrics = self.title_label.fontMetrics()
-        elided_text = metrics.elidedText(truncated_title, Qt.TextElideMode.ElideRight, self.title_label.width())
-        return elided_text
-
-    def update_title(self, title):
-        """Update the label text with ellipsized version."""
-        self.title_label.setText(self.elide_title(title))
-
-    def resizeEvent(self, event):
-        """Recalculate elided text on resize."""
-        self.update_title(self.full_title)
-        super().resizeEvent(event)
-
-    def mousePressEvent(self, event):
-        """Automatically called whenever the user clicks on the BookCard widget."""
-        self.clicked.emit(self.full_title)  # Emit the full title
-        super().mousePressEvent(event)    
-
-    def on_delete_clicked(self):
-        self.delete_requested.emit(self.full_title)
+        metrics = QFontMetrics(self.title_font)
+        return metrics.elidedText(truncated_title, Qt.TextElideMode.ElideRight, width)
+
+    def paint(self, painter, option, index):
+        rect = option.rect
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+
+        # Selected cards get a highlighted background
+        if option.state & QStyle.StateFlag.State_Selected:
+            highlight = option.palette.color(option.palette.ColorRole.Highlight)
+            highlight.setAlpha(60)
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(highlight)
+            painter.drawRoundedRect(QRectF(rect.adjusted(2, 2, -2, -2)), 8, 8)
+
+        # Shadow and cover image
+        cover_rect = self.cover_rect(rect)
+        painter.drawPixmap(cover_rect.x() - SHADOW_BLUR_RADIUS + SHADOW_OFFSET,
+                           cover_rect.y() - SHADOW_BLUR_RADIUS + SHADOW_OFFSET, self.shadow())
+        painter.drawPixmap(cover_rect, self.load_cover(index.data(BookListModel.CoverPathRole)))
+
+        # Book title
+        title_rect = self.title_rect(rect)
+        painter.setFont(self.title_font)
+        painter.setPen(option.palette.color(option.palette.ColorRole.WindowText))
+        painter.drawText(title_rect, Qt.AlignmentFlag.AlignLeft,
+                         self.elide_title(index.data(BookListModel.TitleRole), title_rect.width()))
+
+        # Delete button, highlighted while the mouse is over it
+        delete_rect = self.delete_rect(rect)
+        hovered = False
+        if option.state & QStyle.StateFlag.State_MouseOver and option.widget is not None:
+            hovered = delete_rect.contains(option.widget.mapFromGlobal(QCursor.pos()))
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(QColor('gray') if hovered else QColor('darkgray'))
+        painter.drawRoundedRect(QRectF(delete_rect), 5, 5)
+        painter.setPen(option.palette.color(option.palette.ColorRole.ButtonText))
+        painter.setFont(self.button_font)
+        painter.drawText(delete_rect, Qt.AlignmentFlag.AlignCenter, "Delete")
+
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        """Turn left clicks on a card into `clicked` or `delete_requested` signals.
+
+        Clicks with Ctrl or Shift held only change the selection."""
+        if event.type() == QEvent.Type.MouseButtonRelease and event.button() == Qt.MouseButton.LeftButton:
+            if event.modifiers() & (Qt.KeyboardModifier.ControlModifier | Qt.KeyboardModifier.ShiftModifier):
+                return False
+            book_id = index.data(BookListModel.BookIdRole)
+            if self.delete_rect(option.rect).contains(event.pos()):
+                self.delete_requested.emit(book_id)
+            else:
+                self.clicked.emit(book_id)
+            return True
+        return super().editorEvent(event, model, option, index)
+
+class BookGridView(QListView):
+    """Wrapping left-to-right grid of book cards that only paints the visible rows."""
+    def selected_book_ids(self):
+        """Return the ids of the selected books."""
+        return [index.data(BookListModel.BookIdRole) for index in self.selectionModel().selectedIndexes()]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setFlow(QListView.LeftToRight)  # Arrange items horizontally
+        self.setWrapping(True)  # Wrap items to the next line if needed
+        self.setResizeMode(QListView.Adjust)  # Re-flow the cards when the view is resized
+        self.setMovement(QListView.Static)
+        self.setUniformItemSizes(True)  # Every card has the same size, so rows never need measuring
+        self.setLayoutMode(QListView.Batched)  # Lay out large models in batches to keep the UI responsive
+        self.setBatchSize(500)
+        self.setSelectionMode(QListView.ExtendedSelection)  # Ctrl/Shift-click to select several books
+        self.setEditTriggers(QListView.NoEditTriggers)
+        self.setVerticalScrollMode(QListView.ScrollPerPixel)
+        self.setMouseTracking(True)
+        self.viewport().setCursor(QCursor(Qt.CursorShape.PointingHandCursor))  # Set cursor to a pointing hand
+
+    def mouseMoveEvent(self, event):
+        """Repaint the card under the mouse so the delete button hover state follows the cursor."""
+        index = self.indexAt(event.pos())
+        if index.isValid():
+            self.viewport().update(self.visualRect(index))
+        super().mouseMoveEvent(event)
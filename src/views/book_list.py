@@ -1,29 +1,44 @@
-import logging
-import qtawesome as qta
-from sqlalchemy.exc import SQLAlchemyError
 from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QFont
+from PyQt5.QtGui import QFont, QKeySequence
 from PyQt5.QtWidgets import (
-    QWidget,QVBoxLayout,QHBoxLayout,QLabel, QPushButton, 
-    QListWidget,QListWidgetItem, QInputDialog, QScrollArea,
-    QFileDialog, QStackedWidget, QTextEdit, QDialog, QMessageBox
+    QAction, QWidget,QVBoxLayout,QHBoxLayout,QLabel, QPushButton, 
+    QInputDialog, QScrollArea, QLineEdit, QComboBox,
+    QFileDialog, QStackedWidget, QDialog, QMessageBox
 )
 
-from database.database import Session, Book, Page
-from .custom_widgets import QFlowLayout, CustomInputDialog
-from .book_card import BookCard
+from database.page_cache import CachedPage, PageCache
+from .custom_widgets import CustomInputDialog
+from .book_card import BookCardDelegate, BookGridView
+from .book_model import BookListModel
+from .page_model import PageListModel
+from .page_view import PageButtonView
+from .reader_pane import ReaderPane
+from .db_worker import DatabaseWorker, BackgroundJob
+from .lazy_import import lazy_import
 
-logging.basicConfig(level=logging.DEBUG)  # Set the logging level to DEBUG
+core = lazy_import('core')
+
+def build_title_index(books, progress=None):
+    """Return the `core.TitleIndex` of the filter box for the rows of `BookService.listing`."""
+    return core.TitleIndex((book.id, book.title) for book in books)
 
 class BookList(QWidget):
-    def __init__(self):
+    def __init__(self, page_size=40, page_cache_bytes=16 * 1024 * 1024, chunk_size=64 * 1024, prefetch=3):
         super().__init__()
 
-        self.current_page_number = None
-
-        self.init_ui()
+        self.current_page_id = None
+        self.page_size = page_size  # Number of page buttons fetched per "Load More Pages" click.
+        self.page_cursor = None
+        self.book_id = None
+        self.page_model = PageListModel(self)  # The pages shown for the open book, one button each.
+        self.page_title_label = None  # Created with the rest of the page panel when the first book is opened.
+        self.db = DatabaseWorker(self)  # Runs every query off the GUI thread.
+        self.page_cache = PageCache(page_cache_bytes)  # Recently opened page bodies, so re-opening them skips SQLite.
+        self.chunk_size = chunk_size  # Characters of page content loaded at a time; longer pages load as they are scrolled.
+        self.prefetch = prefetch  # Pages read ahead on either side of the page being read.
+        self.reader = None  # Created with the rest of the page panel.
 
-        self.load_books()
+        self.init_ui()  # Books are loaded by load_books() once the window is shown.
 
     def init_ui(self):
         """Initialize the UI components and layout."""
@@ -50,12 +65,49 @@ class BookList(QWidget):
         layout.addWidget(self.label)  # Add title to the layout.
 
     def create_book_list_widget(self, layout):
-        # Create QListWidget for displaying book cards.
-        self.book_list_widget = QListWidget()
-        self.book_list_widget.setFlow(QListWidget.LeftToRight)  # Arrange items horizontally
-        self.book_list_widget.setWrapping(True)  # Wrap items to the next line if needed
-        self.book_list_widget.setResizeMode(QListWidget.Adjust)  # Adjust size of items automatically
-        layout.addWidget(self.book_list_widget)  # Add list widget to the layout.
+        # Create the model holding the books and the grid view that paints them as cards.
+        self.book_model = BookListModel(self)
+        self.book_card_delegate = BookCardDelegate(self)
+        self.book_card_delegate.clicked.connect(self.show_book_pages)
+        self.book_card_delegate.delete_requested.connect(self.delete_book)
+        self.book_card_delegate.covers.cover_ready.connect(lambda path: self.book_grid.viewport().update())
+
+        self.book_grid = BookGridView()
+        self.book_grid.setModel(self.book_model)
+        self.book_grid.setItemDelegate(self.book_card_delegate)
+        self.create_filter_bar(layout)  # Filter box and sort order above the grid.
+        layout.addWidget(self.book_grid)  # Add the grid view to the layout.
+
+        # Delete the selected books, from the menu or with the Delete key in the grid.
+        self.delete_selected_action = QAction('Delete Selected Books', self)
+        self.delete_selected_action.setShortcut(QKeySequence.StandardKey.Delete)
+        self.delete_selected_action.setShortcutContext(Qt.ShortcutContext.WidgetShortcut)
+        self.delete_selected_action.setEnabled(False)
+        self.delete_selected_action.triggered.connect(self.delete_selected_books)
+        self.book_grid.addAction(self.delete_selected_action)
+        self.book_grid.selectionModel().selectionChanged.connect(self.update_delete_selected_action)
+        self.book_model.modelReset.connect(self.update_delete_selected_action)
+
+    def create_filter_bar(self, layout):
+        # Filter the cards as the user types; the model looks the titles up in an in-memory
+        # index and reorders its rows, without querying SQLite or creating anything per book.
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText('Filter books by title')
+        self.filter_edit.setClearButtonEnabled(True)
+        self.filter_edit.textChanged.connect(self.book_model.set_filter)
+
+        self.sort_combo = QComboBox()
+        self.sort_combo.addItem('Title', BookListModel.SORT_TITLE)
+        self.sort_combo.addItem('Recently added', BookListModel.SORT_ADDED)
+        self.sort_combo.addItem('Most pages', BookListModel.SORT_PAGES)
+        self.sort_combo.currentIndexChanged.connect(
+            lambda index: self.book_model.set_sort(self.sort_combo.itemData(index)))
+
+        filter_layout = QHBoxLayout()
+        filter_layout.addWidget(self.filter_edit)
+        filter_layout.addWidget(QLabel('Sort by:'))
+        filter_layout.addWidget(self.sort_combo)
+        layout.addLayout(filter_layout)
 
     def create_stacked_widget(self, layout):
         # Stack to switch between book list and book details
@@ -70,32 +122,38 @@ class BookList(QWidget):
         self.add_button = QPushButton('Add Book')  # Add book button
         self.add_button.setFixedWidth(400)
         self.add_button.clicked.connect(self.add_book_dialog)
-        self.add_button.setIcon(qta.icon('fa.book'))  # Use the book icon        
         add_button_layout = QHBoxLayout()  # Center the Add Book button horizontally
         add_button_layout.addStretch()  # Add stretchable space to the left
         add_button_layout.addWidget(self.add_button)  # Add the button in the middle
         add_button_layout.addStretch()  # Add stretchable space to the right
         layout.addLayout(add_button_layout)  # Add the horizontal layout to the main layout
 
-    def load_books(self):
-        """Load books from the database."""
-        try:
-            # Create a new session for interacting with the database.
-            session = Session()
-
-            # Query the database to retrieve all records from the 'Book' table.
-            # The result is a list of 'Book' objects.
-            books = session.query(Book).all()
+    def load_icons(self):
+        """Set the button icons. Deferred until after the first paint, loading the icon fonts takes a while."""
+        import qtawesome as qta
 
-            # Iterate through each book retrieved from the database.
-            for book in books:
-                # Add a book card to the UI for each book, using its title and cover image path.
-                self.add_book_card(book.title, book.cover_path)
+        self.add_button.setIcon(qta.icon('fa.book'))  # Use the book icon
+        self.add_page_button.setIcon(qta.icon('fa.plus'))
+        self.load_page_button.setIcon(qta.icon('fa.refresh'))
 
-        # Handle any SQLAlchemy-related errors that may occur during the process.
-        except SQLAlchemyError as e:
-            # Print an error message to the console if an exception occurs.
-            print(f"Error loading books: {e}")
+    def load_books(self):
+        """Load books from the database."""
+        # Query the id, title, cover image path and page count of every book on the worker
+        # thread, then hand all rows to the model at once; the grid only paints the visible cards.
+        # Print an error message to the console if the query fails.
+        self.db.submit(lambda session: core.BookService(session).listing(),
+                       on_result=self.on_books_loaded,
+                       on_error=lambda error: print(f"Error loading books: {error}"))
+
+    def on_books_loaded(self, books):
+        self.book_model.set_books(books)
+        # The title index for the filter box is built once the cards are shown, on a thread of
+        # its own: it needs no session, and the database worker stays free for page queries.
+        job = BackgroundJob(build_title_index, books, parent=self)
+        job.finished.connect(self.book_model.set_title_index)
+        job.finished.connect(job.deleteLater)
+        job.failed.connect(job.deleteLater)
+        job.start()
 
     def add_book_dialog(self):
         # Open a dialog to get text input from the user. 
@@ -123,103 +181,89 @@ class BookList(QWidget):
 
     def save_book_to_db(self, title, cover_path):
         """Save book to the databse."""
-        session = Session()
-        try:
-            book = Book(title=title, cover_path=cover_path)
-            session.add(book)
-            session.commit()
-            self.add_book_card(title, cover_path)
-        except SQLAlchemyError as e:
-            self.show_error_message(f"Error saving book to database: {e}")
-        finally:
-            session.close()            
-
-    def add_book_card(self, title, cover_path):
-        # Create a new QListWidgetItem, which is a container item for adding widgets to QListWidget.
-        item = QListWidgetItem()
-
-        # Create a new instance of BookCard, passing the title and cover_path.
-        # If cover_path is not provided (None), pass None to the BookCard.
-        book_card = BookCard(title, cover_path if cover_path else None)        
-
-        # Set the size of the QListWidgetItem to match the size of the book_card widget.
-        item.setSizeHint(book_card.sizeHint())
-
-        # Add the QListWidgetItem (item) to the book_list_widget, which is presumably a QListWidget.
-        self.book_list_widget.addItem(item)
-
-        # Set the book_card widget to be displayed inside the item in the QListWidget.
-        self.book_list_widget.setItemWidget(item, book_card)
-
-        # Connect the clicked signal of the book_card to a function that shows the book pages.
-        # The lambda function is used to pass the title of the book to the show_book_pages method.
-        book_card.clicked.connect(lambda title=title: self.show_book_pages(title))
-
-        # Connect the delete_requested signal to the delete_book method
-        book_card.delete_requested.connect(lambda title=title: self.delete_book(title))
-
-    def show_book_pages(self, title):
-        # Clear any existing widgets from the page layout to prepare for new content.
-        while self.page_layout.count():
-            item = self.page_layout.takeAt(0)
-            widget = item.widget()
-            if widget is not None:
-                widget.deleteLater()
-    
+        self.db.submit(lambda session: core.BookService(session).create(title, cover_path),
+                       on_result=lambda book: self.add_book_card(*book),
+                       on_error=lambda error: self.show_error_message(f"Error saving book to database: {error}"))
+
+    def add_book_card(self, book_id, title, cover_path):
+        # Append the book to the model; the delegate paints its card when it scrolls into view.
+        # If cover_path is empty, the delegate draws a placeholder cover.
+        self.book_model.add_book(book_id, title, cover_path if cover_path else None)
+
+    def show_book_pages(self, book_id):
+        """Open a book in the page panel. Return False if it is not in the book list or the
+        user chose to keep editing the page being read."""
+        title = self.book_model.title(book_id)
+        if title is None or not self.confirm_discarding_edits():
+            return False
+
+        # The page panel is built once; opening another book only swaps the title and the pages.
+        if self.page_title_label is None:
+            self.create_page_panel()
+        self.page_title_label.setText(title)
+        self.set_page_actions_enabled(True)
+        self.book_id = book_id  # Store the current book id for reference.
+        self.reader.clear(book_id)
+
+        # Drop any page requests still pending for the previously opened book.
+        self.db.cancel('pages')
+        self.page_model.set_pages([])
+
+        # Position a page cursor before the first page and load the initial set of pages from the database.
+        self.page_cursor = core.PageCursor(book_id, self.page_size)
+        self.load_more_pages()
+        return True
+
+    def create_page_panel(self):
         # Create and configure a QLabel to display the book title.
-        title_label = QLabel(title)
-        title_label.setWordWrap(True)  # Ensure the title wraps if it's too long for one line.
-        title_label.setAlignment(Qt.AlignmentFlag.AlignCenter)  # Center-align the title.
-    
+        self.page_title_label = QLabel()
+        self.page_title_label.setWordWrap(True)  # Ensure the title wraps if it's too long for one line.
+        self.page_title_label.setAlignment(Qt.AlignmentFlag.AlignCenter)  # Center-align the title.
+
         # Set the font of the title label (Arial, size 12, bold).
         font = QFont('Arial', 12, QFont.Weight.Bold)
-        title_label.setFont(font)
-    
+        self.page_title_label.setFont(font)
+
         # Add the title label to the page layout.
-        self.page_layout.addWidget(title_label)
-    
+        self.page_layout.addWidget(self.page_title_label)
+
         # Create a QScrollArea for displaying buttons that allow navigation through the pages.
         scroll_area = QScrollArea()
         scroll_area.setWidgetResizable(True)  # Allow the scroll area to resize its content.
         scroll_area.setFixedHeight(120)  # Set the height of the scroll area.
-    
-        # Create a QWidget to hold the buttons, with a QFlowLayout to manage their arrangement.
-        page_buttons_widget = QWidget()
-        page_buttons_layout = QFlowLayout(page_buttons_widget)
-    
+
+        # The page buttons follow the page model, adding, removing or relabeling only the pages that changed.
+        self.page_buttons = PageButtonView()
+        self.page_buttons.setModel(self.page_model)
+        self.page_buttons.page_clicked.connect(self.show_page_content)
+
         # Assign the page buttons widget to the scroll area.
-        scroll_area.setWidget(page_buttons_widget)
-    
-        # Create a QWidget to serve as the content area where the page content will be displayed.
-        content_area_widget = QWidget()
-        content_area_layout = QVBoxLayout(content_area_widget)
-    
+        scroll_area.setWidget(self.page_buttons)
+
         # Create a horizontal layout for the action buttons (Add Page, Load More Pages).
-        button_layout = QHBoxLayout()    
+        button_layout = QHBoxLayout()
         button_layout.addWidget(self.add_page_button, alignment=Qt.AlignmentFlag.AlignLeft)
         button_layout.addWidget(self.load_page_button, alignment=Qt.AlignmentFlag.AlignRight)
-    
-        # Add the scroll area (with page buttons) and the content area to the page layout.
+
+        # The reader pane shows the page that was clicked and turns to the ones around it.
+        self.reader = ReaderPane(self.db, self.page_cache, self.chunk_size, self.prefetch,
+                                 page_count=self.book_model.page_count)
+        self.reader.page_shown.connect(self.on_page_shown)
+        self.reader.edit_button.clicked.connect(self.edit_or_save_page)
+        self.reader.insert_button.clicked.connect(self.insert_page_before)
+        self.reader.delete_button.clicked.connect(self.delete_page)
+
+        # Add the scroll area (with page buttons) and the reader to the page layout. Page
+        # content is only fetched when a page is read, so nothing else is kept per page.
         self.page_layout.addWidget(scroll_area)
-        self.page_layout.addWidget(content_area_widget)
+        self.page_layout.addWidget(self.reader, 1)
         self.page_layout.addLayout(button_layout)
-    
-        # Initialize variables to track page data and layout:
-        self.page_buttons_layout = page_buttons_layout  # Store the layout for adding buttons later.
-        self.page_content_layout = content_area_layout  # Store the layout for displaying content.
-        self.pages = []  # Initialize an empty list to track pages for dynamic management.
-        self.current_page_index = -1  # Start before the first page
-        self.page_title = title  # Store the current book title for reference.
-        
-        # Load the initial set of pages from the database.
-        self.load_more_pages()
 
     def create_add_page_button(self):
         # Create and configure an "Add Page" button, and connect it to the add_page method.
         add_page_button = QPushButton('Add Page')
         add_page_button.clicked.connect(self.add_page)
         add_page_button.setFixedWidth(150)  # Set a fixed width for the button.
-        add_page_button.setIcon(qta.icon('fa.plus'))  # Set an icon for the button.
         return add_page_button
 
     def create_load_page_button(self):
@@ -227,264 +271,302 @@ class BookList(QWidget):
         load_more_button = QPushButton('Load More Pages')
         load_more_button.clicked.connect(self.load_more_pages)
         load_more_button.setFixedWidth(150)  # Set a fixed width for the button.
-        load_more_button.setIcon(qta.icon('fa.refresh'))  # Set an icon for the button.
         return load_more_button
 
     def add_page(self):
-        page_title, ok = QInputDialog.getText(self, 'Add Page', 'Enter page title:')
+        page = self.ask_for_page('Add Page')
+        if page:
+            self.save_page_to_db(*page)
+
+    def ask_for_page(self, window_title):
+        """Ask for the title and content of a new page. Return (title, content), or None if cancelled."""
+        page_title, ok = QInputDialog.getText(self, window_title, 'Enter page title:')
         if ok and page_title:
             dialog = CustomInputDialog(self)
             if dialog.exec_() == QDialog.Accepted:
                 page_content = dialog.get_text()
                 if page_content:
-                    self.save_page_to_db(page_title, page_content)
+                    return page_title, page_content
+        return None
 
     def save_page_to_db(self, title, content):
-        try:
-            session = Session()
-
-            # Queries the Book table for a book with the title that matches self.page_title. 
-            book = session.query(Book).filter(Book.title == self.page_title).one()
-
-            # Queries the Page table for pages associated with the book.id and counts them.
-            # The result is incremented by 1 to determine the page number for the new page.
-            page_number = session.query(Page).filter(Page.book_id == book.id).count() + 1
-
-            # Creates a new Page object with the provided number, content, title, and book_id.
-            page = Page(number=page_number, content=content, title=title, book_id=book.id)
-
-            # Adds the newly created Page object to the session, marking it 
-            # to be inserted into the database upon commit.
-            session.add(page)
+        cursor = self.page_cursor  # The book the page is added to, even if another one gets opened meanwhile.
+        if cursor is None:
+            return  # No book is open.
+        book_id = self.book_id
+        self.db.submit(lambda session: core.PageService(session).append(book_id, title, content),
+                       on_result=lambda page: self.on_page_saved(cursor, page.id, page.number, title, content),
+                       on_error=lambda error: self.show_error_message(f"Error saving book to database: {error}"))
+
+    def on_page_saved(self, cursor, page_id, page_number, title, content):
+        self.page_cache.put(CachedPage(page_id, cursor.book_id, page_number, title, content))
+        self.book_model.add_pages(cursor.book_id, 1)
+        if cursor.book_id == self.reader.book_id:
+            self.reader.update_controls()  # The book got one more page to turn to.
+
+        # Only append the button if the book is still open and every earlier page is already
+        # shown; otherwise the new page arrives in order with a later "Load More Pages" click.
+        if cursor is not None and cursor is self.page_cursor and cursor.exhausted:
+            self.page_model.append_pages([(page_id, page_number, title)])
+            cursor.advance(page_id, page_number)
+
+    def insert_page_before(self):
+        """Ask for a new page and insert it in front of the page being read."""
+        page = self.reader.page
+        new_page = self.ask_for_page('Insert Page')
+        if page is not None and new_page:
+            self.insert_page(page.book_id, page.number, *new_page, near=(page.id, page.number))
+
+    def insert_page(self, book_id, position, title, content, near=None):
+        """Insert a page at `position` in a book; the pages from there on move back by one.
+        `near` is the (id, number) of a page close to `position`, if one is known."""
+        self.db.submit(lambda session: core.PageService(session).insert(book_id, position, title, content, near),
+                       on_result=lambda page: self.on_page_inserted(book_id, page.id, page.number, title, content),
+                       on_error=lambda error: self.show_error_message(f"Error saving page to database: {error}"))
+
+    def on_page_inserted(self, book_id, page_id, page_number, title, content):
+        # Cached pages from the insertion point on are now filed under the wrong number.
+        self.page_cache.invalidate_book(book_id, from_number=page_number)
+        self.reader.forget(book_id, from_number=page_number)
+        self.page_cache.put(CachedPage(page_id, book_id, page_number, title, content))
+        self.book_model.add_pages(book_id, 1)
+
+        # Show the new page in its place if it falls among the pages already shown; the
+        # shown pages after it move back by one, the last of them included.
+        cursor = self.page_cursor
+        if book_id == self.book_id and cursor is not None and (page_number <= cursor.last_number or cursor.exhausted):
+            self.page_model.insert_page(page_id, page_number, title)
+            if page_number <= cursor.last_number:
+                cursor.last_number += 1
+            else:
+                cursor.advance(page_id, page_number)
 
-            # Commits the transaction, making all changes made in the session permanent in the database.
-            session.commit()
-            self.add_page_to_view(page_number, content, title)
-        except SQLAlchemyError as e:
-            self.show_error_message(f"Error saving book to database: {e}")
+        # Read the new page if it was inserted in front of the page being read.
+        if book_id == self.reader.book_id:
+            self.reader.open_page(page_id)
 
     def load_more_pages(self):
-        try:
-            # Create a new session for interacting with the database.
-            session = Session()
-    
-            # Query the database to find the book with the title matching 'self.page_title'.
-            # Retrieve a single 'Book' object.
-            book = session.query(Book).filter(Book.title == self.page_title).one()
-    
-            # Query the database for all pages associated with the book's ID,
-            # ordered by the page number in ascending order.
-            pages = session.query(Page).filter(Page.book_id == book.id).order_by(Page.number).all()
-                        
-            total_pages = len(pages)                   
-
-            # Ensure there are pages to load
-            if total_pages > 0:
-                start_index = self.current_page_index + 1
-                end_index = min(start_index + 40, total_pages)        
-    
-                # Loop through the pages, starting from the next page after the current one,
-                # up to the next 40 pages or until the end of the list of pages.
-                for i in range(start_index, end_index):                    
-                    page = pages[i]
-    
-                    # Add the page content to the view using its number, content, and title.                    
-                    self.add_page_to_view(page.number, page.content, page.title)                    
-    
-                # Update the current page index to reflect that more pages have been loaded.
-                self.current_page_index = end_index - 1            
-    
-        # Handle any SQLAlchemy-related errors that may occur during the process.
-        except SQLAlchemyError as e:        
-            self.show_error_message(f"Error saving book to database: {e}")
-
-    def add_page_to_view(self, page_number, content, title=None):
-        """Add a new page with a button and content to a view in a PyQt application."""
-        if not title:
-            title = f"Page {page_number}"
-
-        # Create the button and set the custom font
-        button = QPushButton(title)
-        button.setFont(QFont('Helvetica', 8, QFont.Weight.Light))  # Set the font to Helvetica, size 12, and bold
-        button.clicked.connect(lambda checked, page=page_number: self.show_page_content(page))
-        self.page_buttons_layout.addWidget(button)
-
-        # Create the page content area
-        page_content = QTextEdit(content)        
-        page_content.setReadOnly(True)
-        page_content.setVisible(False)
-        self.page_content_layout.addWidget(page_content)
-
-        # Store the button and content for future reference
-        self.pages.append((button, page_content))        
-
-    def show_page_content(self, page_number):
-        """Display the content of a specific page in a dialog."""
-        try:
-            session = Session()
-
-            # Query the database to find the page with the given number and the current book title.
-            page = session.query(Page).filter(Page.number == page_number,
-                                              Page.book.has(Book.title == self.page_title)).first()
-
-            # Ensure exactly one result is found
-            if not page:
-                # Show a message dialog if the page is not found
-                QMessageBox.warning(self, 'Page Not Found', f'Page {page_number} not found.')
-                return
-    
-            # Set the current page number
-            self.current_page_number = page_number
-    
-            # Create a new dialog window to display the page content
-            dialog = QDialog(self)
-            dialog.setWindowTitle(f"Page {page_number}")
-
-            # Create a layout for the dialog
-            layout = QVBoxLayout(dialog)
-
-            # Create a QTextEdit widget with the page content
-            content_widget = QTextEdit(page.content)
-            content_widget.setReadOnly(True)
-
-            # Add the QTextEdit widget to the layout
-            layout.addWidget(content_widget)
-    
-            # Create buttons for editing and closing the dialog
-            button_box = QHBoxLayout()
-            edit_button = QPushButton('Edit')
-            delete_button = QPushButton('Delete')
-            close_button = QPushButton('Close')
-            button_box.addWidget(edit_button)
-            button_box.addWidget(delete_button)
-            button_box.addWidget(close_button)
-            layout.addLayout(button_box)
-    
-            # Connect buttons to their respective slots
-            edit_button.clicked.connect(lambda: self.enable_editing(content_widget, edit_button))
-            delete_button.clicked.connect(lambda: self.delete_page(page, dialog))
-            close_button.clicked.connect(dialog.accept)
-            
-            dialog.setLayout(layout)
-            dialog.resize(500, 400)
-            dialog.exec_()
-    
-        except SQLAlchemyError as e:
-            self.show_error_message(f"Error saving book to database: {e}")
-
-    def enable_editing(self, content_widget, edit_button):
-        # Enable editing and change the button text to "Save"
-        content_widget.setReadOnly(False)
-        edit_button.setText('Save')
-        edit_button.clicked.disconnect()  # Disconnect previous slot
-        edit_button.clicked.connect(lambda: self.save_page_content(content_widget, edit_button))
-
-    def save_page_content(self, content_widget, edit_button):
+        # Nothing to do until a book has been opened, or while the next window is on its way.
+        cursor = self.page_cursor
+        if cursor is None or cursor.loading:
+            return
+
+        # Fetch only the next window of pages after the last one already shown. The
+        # worker only reads the cursor; it moves on here, along with the page buttons.
+        cursor.loading = True
+        self.db.submit(cursor.fetch_next,
+                       on_result=lambda pages: self.on_pages_loaded(cursor, pages),
+                       on_error=lambda error: self.on_pages_failed(cursor, error),
+                       tag='pages')
+
+    def on_pages_loaded(self, cursor, pages):
+        self.page_model.append_pages(cursor.receive(pages))
+
+    def on_pages_failed(self, cursor, error):
+        cursor.loading = False
+        self.show_error_message(f"Error loading pages: {error}")
+
+    def show_page_content(self, page_id):
+        """Show a specific page in the reader pane."""
+        if self.confirm_discarding_edits():
+            self.reader.open_page(page_id)
+
+    def on_page_shown(self, page):
+        # Set the current page
+        self.current_page_id = page.id if page is not None else None
+        self.reset_edit_button()
+
+    def confirm_discarding_edits(self):
+        """Return whether the reader can leave the page being read, asking first if it is being edited."""
+        if self.reader is None or not self.reader.editing:
+            return True
+        reply = QMessageBox.question(self, 'Discard Changes', 'The page being edited has unsaved changes. Discard them?',
+                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply != QMessageBox.Yes:
+            return False
+        self.reader.viewer.stop_editing()
+        self.reader.set_editing(False)
+        return True
+
+    def edit_or_save_page(self):
+        if self.reader.editing:
+            self.save_page_content(self.reader.viewer)
+        else:
+            self.enable_editing(self.reader.viewer)
+
+    def reset_edit_button(self):
+        self.reader.edit_button.setText('Edit')
+        self.reader.edit_button.setEnabled(self.reader.page is not None)
+
+    def enable_editing(self, content_widget):
+        # Only the complete content can be edited, load what is missing of a long page first.
+        self.reader.edit_button.setEnabled(False)
+        page_id = content_widget.page_id
+        content_widget.load_all(lambda: self.start_editing(content_widget, page_id))
+
+    def start_editing(self, content_widget, page_id):
+        if content_widget.page_id != page_id:
+            return  # Another page was opened while this one was loading.
+
+        # Enable editing and change the button text to "Save"; the page can't be turned until it is saved.
+        content_widget.start_editing()
+        self.reader.set_editing(True)
+        self.reader.edit_button.setEnabled(True)
+        self.reader.edit_button.setText('Save')
+
+    def save_page_content(self, content_widget):
         """Save the edited content of a page to the database."""
-        if self.current_page_number is None:
+        if self.current_page_id is None:
             QMessageBox.warning(self, 'No Page Selected', 'No page is currently selected for editing.')
             return
 
-        new_content = content_widget.toPlainText()
-
-        try:
-            session = Session()
-
-            # Find the page to update
-            page = session.query(Page).filter(Page.number == self.get_current_page_number(),
-                                              Page.book.has(Book.title == self.page_title)).first()
-
-            if not page:
-                QMessageBox.warning(self, 'Page Not Found', f'Page {self.current_page_number} not found.')
-                return
-
-            # Update the page content
-            page.content = new_content
-            session.commit()
-
-            # Set the QTextEdit back to read-only
-            content_widget.setReadOnly(True)
-            edit_button.setText('Edit')
-            edit_button.clicked.disconnect()
-            edit_button.clicked.connect(lambda: self.enable_editing(content_widget, edit_button))
-
-            QMessageBox.information(self, 'Success', 'Page content updated successfully.')
-
-        except SQLAlchemyError as e:
-            self.show_error_message(f"Error saving edited page: {e}")
-    
-    def get_current_page_number(self):
-        """This method should return the current page number being edited/viewed"""      
-        return self.current_page_number        
-
-    def delete_page(self, page, dialog):
-        """Delete the specified page and close the dialog."""
-        try:
-            # Create a new session for deletion
-            delete_session = Session()
-            
-            # Query the page to ensure it's still valid and not attached
-            page_to_delete = delete_session.query(Page).filter(Page.id == page.id).one()
-            
-            if page_to_delete:
-                # Delete the page
-                delete_session.delete(page_to_delete)
-                delete_session.commit()
-
-                QMessageBox.information(self, 'Page Deleted', f'Page {page.number} has been deleted.')
+        page_id = self.get_current_page_id()
 
-                # Remove the page content from the view
-                for button, content in self.pages:
-                    if button.text() == page.title:
-                        button.deleteLater()
-                        content.deleteLater()
-                        self.pages.remove((button, content))
-                        break
+        # A long page is saved as the edits made to it, so its text isn't copied out of the
+        # editor and sent to SQLite as a whole. Short pages are saved whole and kept cached.
+        edits = content_widget.edits()
+        if edits is not None and content_widget.length > self.chunk_size:
+            self.db.submit(lambda session: core.PageService(session).splice(page_id, edits),
+                           on_result=lambda found: self.on_page_content_saved(found, page_id, None, content_widget),
+                           on_error=lambda error: self.show_error_message(f"Error saving edited page: {error}"))
+            return
 
-                dialog.accept()  # Close the dialog after deletion
+        # Update the page on the worker thread, then restore the read-only state.
+        new_content = content_widget.toPlainText()
+        self.db.submit(lambda session: core.PageService(session).update_content(page_id, new_content),
+                       on_result=lambda found: self.on_page_content_saved(found, page_id, new_content, content_widget),
+                       on_error=lambda error: self.show_error_message(f"Error saving edited page: {error}"))
+
+    def on_page_content_saved(self, found, page_id, content, content_widget):
+        if not found:
+            self.page_cache.invalidate(page_id)
+            QMessageBox.warning(self, 'Page Not Found', 'The page no longer exists.')
+            return
 
-                self.load_more_pages()
+        # Keep the cached copy of the page in sync with the database (write-through),
+        # or drop it if only the edits were saved.
+        if content is not None:
+            self.page_cache.update_content(page_id, content)
+        else:
+            self.page_cache.invalidate(page_id)
+        self.reader.forget(self.reader.book_id)  # The head kept for a long page is out of date as well.
+
+        # Set the viewer back to read-only, unless another page is shown by now.
+        if content_widget.page_id == page_id:
+            content_widget.stop_editing()
+            self.reader.set_editing(False)
+            self.reset_edit_button()
+
+        QMessageBox.information(self, 'Success', 'Page content updated successfully.')
+
+    def get_current_page_id(self):
+        """Return the id of the page currently being edited/viewed."""
+        return self.current_page_id
+
+    def delete_page(self):
+        """Delete the page being read; the reader moves on to the page that takes its place."""
+        page = self.reader.page
+        if page is None:
+            return
+        self.db.submit(lambda session: core.PageService(session).delete(page.id),
+                       on_result=lambda number: self.on_page_deleted(page, number),
+                       on_error=lambda error: self.show_error_message(f"Error deleting page from database: {error}"))
+
+    def on_page_deleted(self, page, number):
+        self.page_cache.invalidate(page.id)
+        if number is not None:
+            # The pages after the deleted one moved up by one, their cached copies are filed under the old numbers.
+            self.page_cache.invalidate_book(page.book_id, from_number=number)
+            self.reader.forget(page.book_id, from_number=number)
+            self.book_model.add_pages(page.book_id, -1)
+            if page.book_id == self.book_id:
+                self.remove_page_from_view(page.id, number)
+        QMessageBox.information(self, 'Page Deleted', f'Page {page.number} has been deleted.')
+
+        # Read the next page, now numbered like the deleted one, or the previous one if it was the last.
+        reader = self.reader
+        if reader.page is not None and reader.page.id == page.id:
+            total = reader.page_count(page.book_id)
+            if total == 0:
+                reader.clear(page.book_id)
             else:
-                self.show_error_message('Page not found')
-    
-        except SQLAlchemyError as e:
-            delete_session.rollback()  # Rollback the session in case of error
-            self.show_error_message(f"Error deleting page from database: {e}")
-        finally:
-            delete_session.close()  # Close the session after operations
-    
-    def delete_book(self, title):
-       """Delete a book in the database."""
-       reply = QMessageBox.question(self, 'Delete Book', f"Are you sure you want to delete '{title}'?", 
-                                    QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
-       if reply == QMessageBox.Yes:
-           try:
-               session = Session()
-               
-               # Find the book
-               book = session.query(Book).filter(Book.title == title).one()
-               
-               # Delete associated pages
-               session.query(Page).filter(Page.book_id == book.id).delete(synchronize_session=False)
-               
-               # Delete the book
-               session.delete(book)
-               session.commit()
-               
-               # Remove the book card from the UI
-               self.remove_book_card(title)
-           except SQLAlchemyError as e:
-               session.rollback()  # Rollback the transaction on error
-               self.show_error_message(f"Error deleting book from database: {e}")
-           finally:
-               session.close()  # Ensure the session is closed  
-
-    def remove_book_card(self, title):
+                reader.show_page(None)
+                reader.go_to(min(page.number, total))
+
+    def remove_page_from_view(self, page_id, number):
+        """Remove the button of a deleted page; the model renumbers the pages after it, as the database did."""
+        self.page_model.remove_page(page_id)
+
+        # Keep the cursor on the same page, which now has a number one lower, or on
+        # the page before it if it was the one deleted.
+        cursor = self.page_cursor
+        if cursor is not None and cursor.last_id == page_id:
+            cursor.last_id, cursor.last_number = self.page_model.last_page() or (None, 0)
+        elif cursor is not None and cursor.last_number >= number:
+            cursor.last_number -= 1
+
+    def delete_book(self, book_id):
+        """Delete a book in the database."""
+        title = self.book_model.title(book_id)
+        reply = QMessageBox.question(self, 'Delete Book', f"Are you sure you want to delete '{title}'?", 
+                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply == QMessageBox.Yes:
+            # Delete the book and its pages, then remove the book card from the UI.
+            self.db.submit(lambda session: core.BookService(session).delete(book_id),
+                           on_result=lambda _: self.on_book_deleted(book_id),
+                           on_error=lambda error: self.show_error_message(f"Error deleting book from database: {error}"))
+
+    def on_book_deleted(self, book_id):
+        self.page_cache.invalidate_book(book_id)
+        self.forget_book(book_id)
+        self.remove_book_card(book_id)
+
+    def update_delete_selected_action(self):
+        self.delete_selected_action.setEnabled(self.book_grid.selectionModel().hasSelection())
+
+    def delete_selected_books(self):
+        """Delete every selected book after a single confirmation."""
+        book_ids = self.book_grid.selected_book_ids()
+        if not book_ids:
+            return
+        if len(book_ids) == 1:
+            self.delete_book(book_ids[0])
+            return
+
+        reply = QMessageBox.question(self, 'Delete Books', f"Are you sure you want to delete {len(book_ids)} books?",
+                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply == QMessageBox.Yes:
+            # One transaction for all of them; SQLite deletes their pages.
+            self.db.submit(lambda session: core.BookService(session).delete_many(book_ids),
+                           on_result=lambda _: self.on_books_deleted(book_ids),
+                           on_error=lambda error: self.show_error_message(f"Error deleting books from database: {error}"))
+
+    def on_books_deleted(self, book_ids):
+        for book_id in book_ids:
+            self.page_cache.invalidate_book(book_id)
+            self.forget_book(book_id)
+        self.book_model.remove_books(book_ids)
+
+    def remove_book_card(self, book_id):
         """Remove card from the Book List view."""
-        for index in range(self.book_list_widget.count()):
-            item = self.book_list_widget.item(index)
-            book_card = self.book_list_widget.itemWidget(item)
-    
-            if book_card and hasattr(book_card, 'full_title') and book_card.full_title == title:
-                self.book_list_widget.takeItem(index)  # Remove item from the QListWidget
-                break
\ No newline at end of file
+        self.book_model.remove_book(book_id)
+
+    def forget_book(self, book_id):
+        """Stop reading a book that was deleted, and close it if it is open in the page panel."""
+        if self.reader is not None and self.reader.book_id == book_id:
+            self.reader.viewer.stop_editing()
+            self.reader.set_editing(False)
+            self.reader.clear()
+
+        if book_id == self.book_id:
+            self.db.cancel('pages')
+            self.book_id = None
+            self.page_cursor = None
+            self.page_model.set_pages([])
+            self.page_title_label.setText('')
+            self.set_page_actions_enabled(False)
+
+    def set_page_actions_enabled(self, enabled):
+        """Enable Add Page and Load More Pages while a book is open."""
+        self.add_page_button.setEnabled(enabled)
+        self.load_page_button.setEnabled(enabled)
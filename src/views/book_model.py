@@ -0,0 +1,250 @@
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex
+
+class BookListModel(QAbstractListModel):
+    """Holds the books shown in the book grid as plain (id, title, cover_path, pages) rows.
+
+    The model keeps no widgets around: the grid view asks `BookCardDelegate` to paint
+    only the rows that are currently visible, so memory stays flat however many books
+    the library holds. Rows are addressed by book id through an id -> row index, so
+    finding, updating or removing a book never scans the list.
+
+    Every book is kept in the current sort order (`set_sort`); `set_filter` narrows the
+    rows to the titles matching a query, looked up in a `core.TitleIndex` handed over
+    with `set_title_index`. Filtering and sorting move rows around with a layout change
+    instead of a reset, so the view keeps its selection and only repaints."""
+    BookIdRole = Qt.UserRole + 1
+    TitleRole = Qt.UserRole + 2
+    CoverPathRole = Qt.UserRole + 3
+    PageCountRole = Qt.UserRole + 4
+
+    SORT_TITLE = 'title'
+    SORT_ADDED = 'added'  # Newest first. SQLite gives a new book a higher id than every existing one.
+    SORT_PAGES = 'pages'  # Most pages first.
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._all = {}  # book id -> (id, title, cover_path, pages), shown or not.
+        self._order = []  # Every book id, in sort order.
+        self._positions = None  # book id -> position in _order, rebuilt when needed.
+        self._books = []  # Ids of the shown books, in sort order.
+        self._rows = {}  # book id -> row
+        self.sort = self.SORT_TITLE
+        self.query = ''
+        self.title_index = None
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._books)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self._books):
+            return None
+
+        book_id, title, cover_path, pages = self._all[self._books[index.row()]]
+        if role in (Qt.DisplayRole, Qt.ToolTipRole, self.TitleRole):
+            return title
+        if role == self.BookIdRole:
+            return book_id
+        if role == self.CoverPathRole:
+            return cover_path
+        if role == self.PageCountRole:
+            return pages
+        return None
+
+    def book_count(self):
+        """Return the number of books, including those hidden by the filter."""
+        return len(self._all)
+
+    def sort_key(self, book_id):
+        book_id, title, _, pages = self._all[book_id]
+        if self.sort == self.SORT_ADDED:
+            return (-book_id,)
+        if self.sort == self.SORT_PAGES:
+            return (-pages, title.casefold(), book_id)
+        return (title.casefold(), book_id)
+
+    def bisect(self, book_ids, book_id):
+        """Return where `book_id` goes in `book_ids`, a list in sort order."""
+        key = self.sort_key(book_id)
+        low, high = 0, len(book_ids)
+        while low < high:
+            middle = (low + high) // 2
+            if self.sort_key(book_ids[middle]) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def set_books(self, books):
+        """Replace all rows with an iterable of (id, title, cover_path, pages) tuples.
+
+        The title index built for the previous books is dropped; the filter applies
+        again once `set_title_index` hands over the new one."""
+        self.beginResetModel()
+        self._all = {book[0]: tuple(book) for book in books}
+        self._order = sorted(self._all, key=self.sort_key)
+        self._positions = None
+        self.title_index = None
+        self._books = list(self._order)
+        self._rows = dict(self.positions())
+        self.endResetModel()
+
+    def set_title_index(self, index):
+        """Use `index` to filter the books, bringing it up to date with the books added
+        or removed since it was built from the rows given to `set_books`."""
+        for book_id in [book_id for book_id in index.titles if book_id not in self._all]:
+            index.remove(book_id)
+        index.update((book_id, book[1]) for book_id, book in self._all.items() if book_id not in index.titles)
+        self.title_index = index
+        if self.query:
+            self.relayout(self.filtered(self.query))
+
+    def set_filter(self, query):
+        """Show only the books whose title matches `query` (see `core.TitleIndex`)."""
+        self.query = query
+        if self.title_index is not None:
+            self.relayout(self.filtered(query))
+
+    def set_sort(self, sort):
+        """Order the books by `SORT_TITLE`, `SORT_ADDED` or `SORT_PAGES`."""
+        if sort == self.sort:
+            return
+        self.sort = sort
+        self._order.sort(key=self.sort_key)
+        self._positions = None
+        self.positions()
+        self.relayout(self.filtered(self.query))
+
+    def accepts(self, book_id):
+        """Return whether a book passes the filter."""
+        return not self.query or self.title_index is None or self.title_index.matches(book_id, self.query)
+
+    def positions(self):
+        """Return {book id: position in the sort order}, rebuilt after books were added or removed."""
+        if self._positions is None:
+            self._positions = dict(zip(self._order, range(len(self._order))))
+        return self._positions
+
+    def filtered(self, query):
+        """Return the ids of the books matching `query`, in sort order."""
+        matches = self.title_index.search(query) if self.title_index is not None else None
+        if matches is None:
+            return list(self._order)
+        if len(matches) * 4 < len(self._order):
+            # Few matches: sorting them is cheaper than walking every book.
+            return sorted(matches, key=self.positions().__getitem__)
+        return [book_id for book_id in self._order if book_id in matches]
+
+    def relayout(self, book_ids):
+        """Show `book_ids` as the rows, keeping the selection and current index on the books that stay."""
+        self.layoutAboutToBeChanged.emit()
+        persistent = self.persistentIndexList()
+        moved_ids = [self._books[index.row()] for index in persistent]
+        self._books = book_ids
+        if len(book_ids) == len(self._order):
+            self._rows = dict(self.positions())  # Every book is shown, in sort order.
+        else:
+            self._rows = dict(zip(book_ids, range(len(book_ids))))
+        self.changePersistentIndexList(persistent, [
+            self.index(self._rows[book_id]) if book_id in self._rows else QModelIndex() for book_id in moved_ids])
+        self.layoutChanged.emit()
+
+    def add_book(self, book_id, title, cover_path, pages=0):
+        """Add a single book in its place in the sort order."""
+        self._all[book_id] = (book_id, title, cover_path, pages)
+        if self.title_index is not None:
+            self.title_index.add(book_id, title)
+        self._order.insert(self.bisect(self._order, book_id), book_id)
+        self._positions = None
+        if not self.accepts(book_id):
+            return
+
+        row = self.bisect(self._books, book_id)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._books.insert(row, book_id)
+        for later_row in range(row, len(self._books)):
+            self._rows[self._books[later_row]] = later_row
+        self.endInsertRows()
+
+    def row_of(self, book_id):
+        """Return the row of a book, or None if it is not shown."""
+        return self._rows.get(book_id)
+
+    def title(self, book_id):
+        book = self._all.get(book_id)
+        return book[1] if book is not None else None
+
+    def page_count(self, book_id):
+        book = self._all.get(book_id)
+        return book[3] if book is not None else 0
+
+    def update_book(self, book_id, title, cover_path):
+        """Replace the title and cover of a book and repaint only its card."""
+        book = self._all.get(book_id)
+        if book is None:
+            return False
+        self._all[book_id] = (book_id, title, cover_path, book[3])
+        if title != book[1]:
+            if self.title_index is not None:
+                self.title_index.add(book_id, title)
+            self.resort(book_id)
+        else:
+            self.repaint(book_id)
+        return True
+
+    def add_pages(self, book_id, count):
+        """Change the page count of a book by `count`."""
+        book = self._all.get(book_id)
+        if book is None:
+            return
+        self._all[book_id] = book[:3] + (max(0, book[3] + count),)
+        if self.sort == self.SORT_PAGES:
+            self.resort(book_id)
+        else:
+            self.repaint(book_id)
+
+    def resort(self, book_id):
+        """Move a book whose sort key changed to its new place."""
+        self._order.remove(book_id)
+        self._order.insert(self.bisect(self._order, book_id), book_id)
+        self._positions = None
+        self.relayout(self.filtered(self.query))
+
+    def repaint(self, book_id):
+        row = self._rows.get(book_id)
+        if row is not None:
+            index = self.index(row)
+            self.dataChanged.emit(index, index)
+
+    def remove_books(self, book_ids):
+        """Remove several books by id, one contiguous block of rows at a time. Return how many were removed."""
+        removed = {book_id for book_id in book_ids if self._all.pop(book_id, None) is not None}
+        if not removed:
+            return 0
+        for book_id in removed:
+            if self.title_index is not None:
+                self.title_index.remove(book_id)
+        self._order = [book_id for book_id in self._order if book_id not in removed]
+        self._positions = None
+
+        rows = sorted(self._rows.pop(book_id) for book_id in removed if book_id in self._rows)
+
+        # Remove from the bottom up so the rows of the blocks still to go stay valid.
+        end = len(rows)
+        while end > 0:
+            start = end - 1
+            while start > 0 and rows[start - 1] == rows[start] - 1:
+                start -= 1
+            first, last = rows[start], rows[end - 1]
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self._books[first:last + 1]
+            self.endRemoveRows()
+            end = start
+
+        self._rows = {book_id: row for row, book_id in enumerate(self._books)}
+        return len(removed)
+
+    def remove_book(self, book_id):
+        """Remove a book by id. Return False if it is not in the model."""
+        return self.remove_books([book_id]) > 0
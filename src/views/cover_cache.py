@@ -0,0 +1,149 @@
+import os
+import hashlib
+from collections import OrderedDict
+
+from PyQt5.QtCore import Qt, QObject, QRunnable, QThreadPool, QStandardPaths, QSize, pyqtSignal
+from PyQt5.QtGui import QImage, QImageReader, QPixmap, QGuiApplication
+
+from database.covers import CoverStore, is_key  # Only the store layout, no SQLAlchemy.
+
+class _CoverLoader(QRunnable):
+    """Loads one cover on a pool thread: the pre-scaled copy of a stored cover, or for
+    a cover still referenced by file path a thumbnail going through the disk cache."""
+    def __init__(self, cache, path):
+        super().__init__()
+        self.cache = cache
+        self.path = path
+
+    def run(self):
+        if is_key(self.path):
+            image = QImage(self.cache.store.path(self.path, self.cache.scale))
+            image.setDevicePixelRatio(self.cache.scale)
+            self.cache.image_loaded.emit(self.path, image)
+            return
+
+        image = QImage()
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            stat = None  # Missing cover file, the card keeps its placeholder.
+
+        if stat is not None:
+            thumbnail_path = self.cache.thumbnail_path(self.path, stat)
+            if thumbnail_path and os.path.exists(thumbnail_path):
+                image = QImage(thumbnail_path)
+
+            if image.isNull():
+                # Let the decoder scale while reading, which is much cheaper than
+                # decoding the full-size image and scaling it afterwards.
+                reader = QImageReader(self.path)
+                reader.setAutoTransform(True)
+                reader.setScaledSize(self.cache.size)
+                image = reader.read()
+                if not image.isNull() and thumbnail_path:
+                    self.cache.store_thumbnail(image, thumbnail_path)
+
+        self.cache.image_loaded.emit(self.path, image)
+
+class CoverCache(QObject):
+    """Cover thumbnails decoded and scaled on a background thread pool.
+
+    `cover()` never blocks: it returns the thumbnail if it is in the in-memory LRU,
+    otherwise it schedules a load and returns None so the caller can draw a
+    placeholder. Finished thumbnails are kept in a size-bounded LRU in memory and in
+    a persistent on-disk cache keyed by the path, mtime and size of the original, so
+    later runs skip decoding the full-size image. `cover_ready` is emitted with the
+    path once a thumbnail is available.
+
+    Covers in the cover store (`database.covers`) are read from the copy pre-scaled
+    for the screen's device pixel ratio, without scaling them again.
+    """
+    cover_ready = pyqtSignal(str)
+    image_loaded = pyqtSignal(str, QImage)  # Emitted from pool threads, delivered on the GUI thread.
+
+    def __init__(self, size, memory_budget=32 * 1024 * 1024, cache_dir=None, store=None, parent=None):
+        super().__init__(parent)
+        self.size = QSize(size)
+        self.store = store if store is not None else CoverStore()
+        app = QGuiApplication.instance()
+        self.scale = 2 if app is not None and app.devicePixelRatio() > 1 else 1  # Stored variant to load.
+        self.memory_budget = memory_budget  # Maximum number of bytes held by the in-memory LRU.
+        self.memory_used = 0
+
+        if cache_dir is None:
+            cache_dir = os.path.join(
+                QStandardPaths.writableLocation(QStandardPaths.CacheLocation), 'thumbnails')
+        self.cache_dir = cache_dir
+
+        self._pixmaps = OrderedDict()  # path -> QPixmap, least recently used first.
+        self._pending = set()
+        self._failed = set()
+
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max(2, QThreadPool.globalInstance().maxThreadCount() - 1))
+
+        self.image_loaded.connect(self.on_image_loaded)
+
+    def cover(self, path):
+        """Return the cached thumbnail for `path`, or None while it is being loaded."""
+        pixmap = self._pixmaps.get(path)
+        if pixmap is not None:
+            self._pixmaps.move_to_end(path)
+            return pixmap
+
+        if path not in self._pending and path not in self._failed:
+            self._pending.add(path)
+            self.pool.start(_CoverLoader(self, path))
+        return None
+
+    def thumbnail_path(self, path, stat):
+        """Return the on-disk cache file for a cover, keyed by its path, mtime and size."""
+        if not self.cache_dir:
+            return None
+        key = f"{os.path.abspath(path)}|{stat.st_mtime_ns}|{stat.st_size}|{self.size.width()}x{self.size.height()}"
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.png')
+
+    def store_thumbnail(self, image, thumbnail_path):
+        """Write a thumbnail to the disk cache; a failed write only costs a re-decode later."""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            temp_path = f"{thumbnail_path}.{os.getpid()}.tmp"
+            if image.save(temp_path, 'PNG'):
+                os.replace(temp_path, thumbnail_path)
+        except OSError:
+            pass
+
+    def on_image_loaded(self, path, image):
+        self._pending.discard(path)
+        if image.isNull():
+            self._failed.add(path)
+            return
+
+        if image.size() != self.size * image.devicePixelRatio():
+            image = image.scaled(self.size * image.devicePixelRatio(), Qt.AspectRatioMode.IgnoreAspectRatio,
+                                 Qt.TransformationMode.SmoothTransformation)
+        pixmap = QPixmap.fromImage(image)  # QPixmap may only be created on the GUI thread.
+        self._pixmaps[path] = pixmap
+        self.memory_used += self.pixmap_bytes(pixmap)
+        self.evict()
+        self.cover_ready.emit(path)
+
+    def evict(self):
+        """Drop least recently used thumbnails until the memory budget is respected."""
+        while self.memory_used > self.memory_budget and len(self._pixmaps) > 1:
+            _, pixmap = self._pixmaps.popitem(last=False)
+            self.memory_used -= self.pixmap_bytes(pixmap)
+
+    def stats(self):
+        """Return the number and size of the thumbnails held in memory."""
+        return {
+            'pixmaps': len(self._pixmaps),
+            'bytes': self.memory_used,
+            'memory_budget': self.memory_budget,
+            'pending': len(self._pending),
+            'failed': len(self._failed),
+        }
+
+    @staticmethod
+    def pixmap_bytes(pixmap):
+        return pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8
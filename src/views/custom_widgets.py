@@ -1,25 +1,79 @@
-import qtawesome as qta
+from collections import OrderedDict
+
 from PyQt5.QtGui import QFont
 from PyQt5.QtCore import Qt, QSize, QPoint, QRect
 from PyQt5.QtWidgets import (
-    QLayout, QSizePolicy, QDialog, QTextEdit,
+    QLayout, QWidgetItem, QSizePolicy, QDialog, QPlainTextEdit,
     QVBoxLayout, QPushButton, QHBoxLayout, QLabel
 )
 
+class _FlowState:
+    """Line breaks computed for one layout width: the position of every item laid out
+    so far (relative to the layout rectangle) and where the next item would go."""
+    __slots__ = ('positions', 'x', 'y', 'line_height')
+
+    def __init__(self):
+        self.positions = []
+        self.x = 0
+        self.y = 0
+        self.line_height = 0
+
+    def line_start(self, index):
+        """Return the index of the first item on the line holding item `index`."""
+        line_y = self.positions[index][1]
+        while index > 0 and self.positions[index - 1][1] == line_y:
+            index -= 1
+        return index
+
+    def rewind(self, index):
+        """Forget the positions from the start of the line before the one holding item
+        `index` onwards: once that item changed, the previous line may fit more items."""
+        if index >= len(self.positions):
+            return
+        start = self.line_start(index)
+        if start > 0:
+            start = self.line_start(start - 1)
+        line_y = self.positions[start][1]
+        del self.positions[start:]
+        self.x, self.y, self.line_height = 0, line_y, 0
+
 class QFlowLayout(QLayout):
     """This custom layout allows the buttons to wrap around automatically when they 
     reach the edge of the container. It arranges the widgets in a flow, similar to how 
-    text wraps in a document."""
+    text wraps in a document.
+
+    Item size hints and the spacing are cached, and the line breaks are memoized for
+    the last few widths, so laying out again only places the items added since the
+    previous pass. Appending a button costs the same with 10 or 10,000 buttons, and
+    resizing back and forth between widths reuses the breaks already computed. Call
+    `update_item` when the size hint of an item changes; `insert_widget` and `takeAt`
+    only lay out the items from the changed index on again."""
+    max_cached_widths = 4
+
     def __init__(self, parent=None, margin=0, spacing=-1):
         super().__init__(parent)
         if parent is not None:
             self.setContentsMargins(margin, margin, margin, margin)
 
-        self.setSpacing(spacing)
         self.item_list = []
+        self.hints = []  # Cached sizeHint() per item, None until first needed.
+        self.clear_cache()
+
+        self.setSpacing(spacing)
+
+    def clear_cache(self):
+        """Drop every cached size hint, spacing and line break."""
+        self.hints = [None] * len(self.item_list)
+        self.item_spacing = None  # Cached (horizontal, vertical) spacing between items.
+        self.states = OrderedDict()  # width -> _FlowState, least recently used first.
+        self.min_size = QSize(0, 0)
+        self.min_size_count = 0  # Number of items folded into min_size.
+        self.applied_rect = None  # Rectangle the item geometries were last set for...
+        self.applied_count = 0  # ...and how many items got their geometry set.
 
     def addItem(self, item):
         self.item_list.append(item)
+        self.hints.append(None)
 
     def count(self):
         return len(self.item_list)
@@ -31,9 +85,34 @@ class QFlowLayout(QLayout):
 
     def takeAt(self, index):
         if 0 <= index < len(self.item_list):
+            del self.hints[index]
+            self.forget_from(index)
+            self.min_size, self.min_size_count = QSize(0, 0), 0
             return self.item_list.pop(index)
         return None
 
+    def insert_widget(self, index, widget):
+        """Insert `widget` at `index` and lay out again from there."""
+        self.addChildWidget(widget)
+        self.item_list.insert(index, QWidgetItem(widget))
+        self.hints.insert(index, None)
+        self.forget_from(index)
+        self.min_size, self.min_size_count = QSize(0, 0), 0
+        self.invalidate()
+
+    def update_item(self, index, count=1):
+        """Re-measure `count` items from `index` whose size hints changed and lay out again from there."""
+        if 0 <= index < len(self.item_list):
+            self.hints[index:index + count] = [None] * len(self.hints[index:index + count])
+            self.forget_from(index)
+            self.min_size, self.min_size_count = QSize(0, 0), 0
+            self.invalidate()
+
+    def forget_from(self, index):
+        for state in self.states.values():
+            state.rewind(index)
+        self.applied_count = min(self.applied_count, index)
+
     def expandingDirections(self):
         return Qt.Orientations(Qt.Orientation(0))
 
@@ -52,44 +131,78 @@ class QFlowLayout(QLayout):
         return self.minimumSize()
 
     def minimumSize(self):
-        size = QSize(0, 0)
-        for item in self.item_list:
-            size = size.expandedTo(item.minimumSize())
-        size += QSize(2 * self.spacing(), 2 * self.spacing())
-        return size
+        for item in self.item_list[self.min_size_count:]:
+            self.min_size = self.min_size.expandedTo(item.minimumSize())
+        self.min_size_count = len(self.item_list)
+        return self.min_size + QSize(2 * self.spacing(), 2 * self.spacing())
+
+    def spacing_between_items(self):
+        if self.item_spacing is None:
+            if not self.item_list:
+                return (self.spacing(), self.spacing())
+            style = self.item_list[0].widget().style()
+            self.item_spacing = (
+                self.spacing() + style.layoutSpacing(QSizePolicy.PushButton, QSizePolicy.PushButton, Qt.Horizontal),
+                self.spacing() + style.layoutSpacing(QSizePolicy.PushButton, QSizePolicy.PushButton, Qt.Vertical),
+            )
+        return self.item_spacing
+
+    def size_hint_at(self, index):
+        hint = self.hints[index]
+        if hint is None:
+            hint = self.hints[index] = self.item_list[index].sizeHint()
+        return hint
+
+    def state_for_width(self, width):
+        """Return the line breaks for `width`, placing any items not laid out yet."""
+        state = self.states.get(width)
+        if state is None:
+            state = self.states[width] = _FlowState()
+            if len(self.states) > self.max_cached_widths:
+                self.states.popitem(last=False)
+        else:
+            self.states.move_to_end(width)
+
+        if len(state.positions) < len(self.item_list):
+            space_x, space_y = self.spacing_between_items()
+            right = width - 1
+            for index in range(len(state.positions), len(self.item_list)):
+                hint = self.size_hint_at(index)
+                next_x = state.x + hint.width() + space_x
+                if next_x - space_x > right and state.line_height > 0:
+                    state.x = 0
+                    state.y = state.y + state.line_height + space_y
+                    next_x = hint.width() + space_x
+                    state.line_height = 0
+
+                state.positions.append((state.x, state.y))
+                state.x = next_x
+                state.line_height = max(state.line_height, hint.height())
+        return state
 
     def doLayout(self, rect, test_only):
-        x = rect.x()
-        y = rect.y()
-        line_height = 0
-
-        for item in self.item_list:
-            wid = item.widget()
-            space_x = self.spacing() + wid.style().layoutSpacing(
-                QSizePolicy.PushButton, QSizePolicy.PushButton, Qt.Horizontal)
-            space_y = self.spacing() + wid.style().layoutSpacing(
-                QSizePolicy.PushButton, QSizePolicy.PushButton, Qt.Vertical)
-            next_x = x + item.sizeHint().width() + space_x
-            if next_x - space_x > rect.right() and line_height > 0:
-                x = rect.x()
-                y = y + line_height + space_y
-                next_x = x + item.sizeHint().width() + space_x
-                line_height = 0
-
-            if not test_only:
-                item.setGeometry(QRect(QPoint(x, y), item.sizeHint()))
-
-            x = next_x
-            line_height = max(line_height, item.sizeHint().height())
-
-        return y + line_height - rect.y()
+        state = self.state_for_width(rect.width())
+
+        if not test_only:
+            # Items already placed for this very rectangle keep their geometry.
+            if rect != self.applied_rect:
+                self.applied_rect = QRect(rect)
+                self.applied_count = 0
+            for index in range(self.applied_count, len(self.item_list)):
+                x, y = state.positions[index]
+                self.item_list[index].setGeometry(
+                    QRect(QPoint(rect.x() + x, rect.y() + y), self.size_hint_at(index)))
+            self.applied_count = len(self.item_list)
+
+        return state.y + state.line_height
     
 class CustomInputDialog(QDialog):
     """
-    The `CustomInputDialog` class creates a dialog with a `QTextEdit` widget for multi-line text input and an "OK" button. 
+    The `CustomInputDialog` class creates a dialog with a `QPlainTextEdit` widget for multi-line text input and an "OK" button. 
     
     - **Initialization**: Sets the dialog's title and minimum size.
-    - **Layout Management**: Uses a vertical layout to place the `QTextEdit` for user input.
+    - **Layout Management**: Uses a vertical layout to place the `QPlainTextEdit` for user input. Unlike a
+      `QTextEdit` it does not lay out rich text, so pasting megabytes of text stays fast.
     - **Button Layout**: Uses a horizontal layout to position the "OK" button, which closes the dialog when clicked.
     
     The dialog allows users to input and confirm text, which can be retrieved using the `get_text()` method.
@@ -102,7 +215,7 @@ class CustomInputDialog(QDialog):
         
         layout = QVBoxLayout()
         
-        self.text_edit = QTextEdit()
+        self.text_edit = QPlainTextEdit()
         self.text_edit.setPlaceholderText('Enter page content:')
         layout.addWidget(self.text_edit)
         
@@ -125,6 +238,7 @@ class AboutDialog(QDialog):
         self.setFixedSize(500, 400)  # Adjusted size to give more space for content
 
         # Set an icon for the dialog window
+        import qtawesome as qta  # Imported on first use, loading its icon fonts delays startup.
         self.setWindowIcon(qta.icon('fa.info-circle'))
 
         # Set background color
@@ -141,8 +255,7 @@ class AboutDialog(QDialog):
             "- Deleting the pages of a book\n"
             "- Deleting books from the collection\n\n"
             "This application is ideal for recording the information you read in books.\n"
-            "Note: To save book covers, you should manually edit the covers to fit the specified size: "
-            "110 width and 150 height."
+            "Book covers of any size can be used; they are copied into the library and scaled to fit the cards when the book is added."
         )
         info_label.setFont(QFont('Merriweather', 11, QFont.Weight.Normal))  # Set a more elegant font
         info_label.setStyleSheet("padding: 10px; color: #333;")  # Add padding and set text color
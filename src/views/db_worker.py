@@ -0,0 +1,211 @@
+import logging
+import threading
+from itertools import count
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QCoreApplication, pyqtSignal
+
+from .lazy_import import lazy_import
+
+database = lazy_import('database.database')
+
+logger = logging.getLogger(__name__)
+
+class _Request(QRunnable):
+    """Runs one data-access function with its own session on the worker thread."""
+    def __init__(self, worker, request_id, fn, args):
+        super().__init__()
+        self.worker = worker
+        self.request_id = request_id
+        self.fn = fn
+        self.args = args
+
+    def run(self):
+        if self.worker.is_cancelled(self.request_id):
+            self.emit('finished', None)  # Let the worker forget the request.
+            return
+
+        try:
+            with database.session_scope() as session:
+                result = self.fn(session, *self.args)
+        except Exception as e:
+            from sqlalchemy.exc import SQLAlchemyError  # Loaded along with the database layer by now.
+            from core import BookManagerError
+            if not isinstance(e, (SQLAlchemyError, BookManagerError)):
+                logger.exception("Unexpected error in database request %s", self.request_id)
+            self.emit('failed', str(e))
+        else:
+            self.emit('finished', result)
+
+    def emit(self, signal, value):
+        try:
+            getattr(self.worker, signal).emit(self.request_id, value)
+        except RuntimeError:
+            # The worker was deleted while the request ran, e.g. the application quit
+            # without shutting it down. The work is done, there is no one left to tell.
+            pass
+
+class DatabaseWorker(QObject):
+    """Runs SQLAlchemy work off the GUI thread and delivers the results through signals.
+
+    `submit(fn, *args)` queues `fn(session, *args)` on a single background thread, so
+    requests run one after another in submission order and SQLite only ever sees one
+    writer. The result (or the error message) is delivered back on the GUI thread to
+    the `on_result` / `on_error` callbacks given to `submit`.
+
+    Requests can be tagged; `cancel(tag)` skips every pending request with that tag
+    and drops the results of the ones already running. This is used to abandon stale
+    work, e.g. pages still loading for a book the user has navigated away from.
+
+    Call `shutdown()` before the application quits: it lets the queued writes finish
+    so none is lost or left running against a deleted worker, and refuses new ones.
+    """
+    finished = pyqtSignal(int, object)  # request id, result
+    failed = pyqtSignal(int, str)  # request id, error message
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.pool.setExpiryTimeout(-1)  # Keep the thread alive between requests.
+
+        self._ids = count(1)
+        self._lock = threading.Lock()
+        self._requests = {}  # request id -> (tag, on_result, on_error)
+        self._cancelled = set()
+        self._closed = False  # Set by shutdown(), results are no longer delivered.
+
+        self.finished.connect(self.on_finished)
+        self.failed.connect(self.on_failed)
+
+    def submit(self, fn, *args, on_result=None, on_error=None, tag=None):
+        """Queue `fn(session, *args)` and return the id of the request.
+
+        After `shutdown()` nothing is queued anymore and None is returned: the engine may
+        already be closing, and no result would be delivered."""
+        request_id = next(self._ids)
+        with self._lock:
+            if self._closed:
+                logger.warning("Database request %s submitted after shutdown, dropped", request_id)
+                return None
+            self._requests[request_id] = (tag, on_result, on_error)
+        self.pool.start(_Request(self, request_id, fn, args))
+        return request_id
+
+    def cancel(self, tag):
+        """Cancel every pending or running request submitted with `tag`."""
+        with self._lock:
+            for request_id, (request_tag, _, _) in self._requests.items():
+                if request_tag == tag:
+                    self._cancelled.add(request_id)
+
+    def is_cancelled(self, request_id):
+        with self._lock:
+            return request_id in self._cancelled
+
+    def wait_for_done(self, msecs=-1):
+        """Block until all queued requests ran and deliver their results. Meant for scripts and benchmarks."""
+        done = self.pool.waitForDone(msecs)
+        QCoreApplication.processEvents()
+        return done
+
+    def shutdown(self, msecs=-1):
+        """Skip the pending tagged requests (reads whose results no one is waiting for
+        anymore), wait up to `msecs` for the others to run and stop delivering results.
+        Return whether every request finished."""
+        with self._lock:
+            self._closed = True
+            self._cancelled.update(request_id for request_id, (tag, _, _) in self._requests.items() if tag is not None)
+        return self.pool.waitForDone(msecs)
+
+    def take_request(self, request_id):
+        """Forget a request, returning its callbacks unless it was cancelled."""
+        with self._lock:
+            request = self._requests.pop(request_id, None)
+            if request_id in self._cancelled:
+                self._cancelled.discard(request_id)
+                return None
+            if self._closed:
+                return None
+        return request
+
+    def on_finished(self, request_id, result):
+        request = self.take_request(request_id)
+        if request is not None and request[1] is not None:
+            request[1](result)
+
+    def on_failed(self, request_id, message):
+        request = self.take_request(request_id)
+        if request is None:
+            return
+        if request[2] is not None:
+            request[2](message)
+        else:
+            logger.error("Database request %s failed: %s", request_id, message)
+
+class JobCancelled(Exception):
+    """Raised in a background job from its `progress` callback once the job was cancelled."""
+
+class _JobRunnable(QRunnable):
+    def __init__(self, job):
+        super().__init__()
+        self.job = job
+
+    def run(self):
+        job = self.job
+        try:
+            result = job.fn(*job.args, progress=job.report)
+        except JobCancelled:
+            pass
+        except Exception as e:
+            logger.exception("Background job failed")
+            job.emit('failed', str(e))
+        else:
+            job.emit('finished', result)
+        finally:
+            job.done.set()
+
+class BackgroundJob(QObject):
+    """Runs one long job (e.g. an export) on the global thread pool.
+
+    Unlike `DatabaseWorker` requests, jobs get their own thread so they never hold up
+    the queries the UI is waiting on. `fn(*args, progress=...)` is called on the pool
+    thread; whatever it passes to `progress` is delivered through the `progress`
+    signal, and its return value through `finished`.
+
+    `cancel()` makes the next `progress` call raise `JobCancelled`, which ends the job
+    without a `finished` or `failed` signal; `wait()` blocks until the job returned.
+    """
+    progress = pyqtSignal(object)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, fn, *args, parent=None):
+        super().__init__(parent)
+        self.fn = fn
+        self.args = args
+        self.cancelled = threading.Event()
+        self.done = threading.Event()
+
+    def start(self):
+        QThreadPool.globalInstance().start(_JobRunnable(self))
+
+    def is_running(self):
+        return not self.done.is_set()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def wait(self, timeout=None):
+        """Block until the job returned, at most `timeout` seconds. Return whether it did."""
+        return self.done.wait(timeout)
+
+    def report(self, value):
+        if self.cancelled.is_set():
+            raise JobCancelled()
+        self.emit('progress', value)
+
+    def emit(self, signal, value):
+        try:
+            getattr(self, signal).emit(value)
+        except RuntimeError:
+            pass  # The job object was deleted while the job ran.
@@ -0,0 +1,169 @@
+import sys
+import json
+import time
+import logging
+import threading
+import traceback
+from collections import deque
+
+from PyQt5.QtCore import QObject, QTimer
+from PyQt5.QtGui import QFont
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QPlainTextEdit, QPushButton, QFileDialog
+
+logger = logging.getLogger(__name__)
+
+class StallDetector(QObject):
+    """Reports event handlers that block the GUI thread for longer than `threshold_ms`.
+
+    A timer on the GUI thread records a heartbeat every `interval_ms`. A watchdog thread
+    notices when the heartbeat stops, captures the stack of the GUI thread at that moment
+    and records a stall; once the event loop runs again the stall's duration is filled
+    in and it is logged together with the stack."""
+    def __init__(self, threshold_ms=200, interval_ms=50, max_stalls=50, parent=None):
+        super().__init__(parent)
+        self.threshold_ms = threshold_ms
+        self.interval_ms = interval_ms
+        self.stalls = deque(maxlen=max_stalls)  # Most recent stalls, oldest first.
+        self.total_stalls = 0
+
+        self._lock = threading.Lock()
+        self._beat = time.monotonic()
+        self._current = None  # The stall in progress, if the GUI thread is blocked right now.
+        self._gui_thread = threading.get_ident()
+        self._stopped = threading.Event()
+        self._watchdog = None
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.heartbeat)
+
+    def start(self):
+        self._beat = time.monotonic()
+        self.timer.start()
+        self._stopped.clear()
+        self._watchdog = threading.Thread(target=self.watch, name='stall-detector', daemon=True)
+        self._watchdog.start()
+
+    def stop(self):
+        self.timer.stop()
+        self._stopped.set()
+
+    def heartbeat(self):
+        now = time.monotonic()
+        with self._lock:
+            stall, self._current = self._current, None
+            if stall is not None:
+                stall['duration_ms'] = round((now - self._beat) * 1000, 1)
+            self._beat = now
+
+        if stall is not None:
+            logger.warning("GUI thread blocked for %.0f ms, stack when detected:\n%s",
+                           stall['duration_ms'], stall['stack'])
+
+    def watch(self):
+        """Watchdog thread: record a stall once the heartbeat is late by more than the threshold."""
+        while not self._stopped.wait(self.interval_ms / 1000):
+            with self._lock:
+                blocked = time.monotonic() - self._beat
+                if self._current is not None or blocked * 1000 <= self.threshold_ms:
+                    continue
+
+                frame = sys._current_frames().get(self._gui_thread)
+                self._current = {
+                    'started': time.time() - blocked,
+                    'duration_ms': None,  # Filled in when the event loop runs again.
+                    'stack': ''.join(traceback.format_stack(frame)) if frame is not None else '',
+                }
+                self.stalls.append(self._current)
+                self.total_stalls += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'threshold_ms': self.threshold_ms,
+                'total': self.total_stalls,
+                'recent': [dict(stall) for stall in self.stalls],
+            }
+
+def format_report(data):
+    """Render collected diagnostics as readable text."""
+    lines = []
+    widgets = data['widgets']
+    lines.append(f"Widgets: {widgets['total']}")
+    for name, count in widgets['by_class'].items():
+        lines.append(f"  {count:8d}  {name}")
+
+    covers = data['cover_cache']
+    lines.append("")
+    lines.append(f"Cover pixmaps: {covers['pixmaps']} ({covers['bytes'] / 1024 / 1024:.1f} of "
+                 f"{covers['memory_budget'] / 1024 / 1024:.0f} MiB), {covers['pending']} loading, {covers['failed']} failed")
+
+    pages = data['page_cache']
+    lines.append(f"Page cache: {pages['pages']} pages ({pages['bytes'] / 1024 / 1024:.1f} of "
+                 f"{pages['max_bytes'] / 1024 / 1024:.0f} MiB), hit rate {pages['hit_rate']:.0%} "
+                 f"({pages['hits']} hits, {pages['misses']} misses)")
+    lines.append(f"Page buttons: {data['page_buttons']}")
+
+    stalls = data['stalls']
+    lines.append("")
+    lines.append(f"GUI stalls over {stalls['threshold_ms']} ms: {stalls['total']}")
+    for stall in reversed(stalls['recent']):
+        started = time.strftime('%H:%M:%S', time.localtime(stall['started']))
+        duration = f"{stall['duration_ms']:.0f} ms" if stall['duration_ms'] is not None else 'ongoing'
+        last_frame = stall['stack'].rstrip().splitlines()[-2:] if stall['stack'] else []
+        lines.append(f"  {started}  {duration}")
+        lines.extend(f"    {line.strip()}" for line in last_frame)
+
+    lines.append("")
+    lines.append("Queries:")
+    lines.append(f"  {'count':>8} {'total ms':>10} {'mean ms':>9} {'max ms':>9}  statement")
+    for query in data['queries']:
+        lines.append(f"  {query['count']:8d} {query['total_ms']:10.1f} {query['mean_ms']:9.2f} "
+                     f"{query['max_ms']:9.1f}  {query['statement'][:200]}")
+    return '\n'.join(lines)
+
+class DiagnosticsDialog(QDialog):
+    """Shows the diagnostics returned by `collect()` and exports them as JSON."""
+    def __init__(self, collect, reset=None, parent=None):
+        super().__init__(parent)
+        self.collect = collect
+        self.data = None
+
+        self.setWindowTitle('Diagnostics')
+        self.resize(800, 600)
+
+        layout = QVBoxLayout(self)
+        self.report = QPlainTextEdit()
+        self.report.setReadOnly(True)
+        self.report.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self.report.setFont(QFont('Monospace', 9))
+        layout.addWidget(self.report)
+
+        button_layout = QHBoxLayout()
+        refresh_button = QPushButton('Refresh')
+        refresh_button.clicked.connect(self.refresh)
+        button_layout.addWidget(refresh_button)
+        if reset is not None:
+            reset_button = QPushButton('Reset')
+            reset_button.clicked.connect(lambda: (reset(), self.refresh()))
+            button_layout.addWidget(reset_button)
+        export_button = QPushButton('Export JSON...')
+        export_button.clicked.connect(self.export)
+        button_layout.addWidget(export_button)
+        button_layout.addStretch()
+        close_button = QPushButton('Close')
+        close_button.clicked.connect(self.accept)
+        button_layout.addWidget(close_button)
+        layout.addLayout(button_layout)
+
+        self.refresh()
+
+    def refresh(self):
+        self.data = self.collect()
+        self.report.setPlainText(format_report(self.data))
+
+    def export(self):
+        path, _ = QFileDialog.getSaveFileName(self, 'Export Diagnostics', 'diagnostics.json', 'JSON (*.json)')
+        if path:
+            with open(path, 'w', encoding='utf-8') as file:
+                json.dump(self.data, file, indent=2)
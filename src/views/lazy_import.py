@@ -0,0 +1,26 @@
+import sys
+import importlib.util
+
+def lazy_import(name):
+    """Return the module `name`, deferring its execution until one of its attributes is used.
+
+    The database layer pulls in SQLAlchemy, which takes longer to import than the rest of
+    the application together, so the views import it this way and the main window gets on
+    screen first. The first attribute access should happen on the GUI thread: before
+    Python 3.12 lazy modules are not safe to load from two threads at once."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+
+    spec = importlib.util.find_spec(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+def load(*modules):
+    """Run the deferred import of modules returned by `lazy_import` now, on this thread."""
+    for module in modules:
+        getattr(module, '__name__')  # Any attribute access executes a lazy module.
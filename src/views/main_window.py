@@ -1,23 +1,49 @@
-import qtawesome as qta
-from PyQt5.QtCore import QSize
+import html
+import time
+from collections import Counter
+
+from PyQt5.QtCore import QSize, QTimer
 from PyQt5.QtWidgets import (
     QMainWindow,    
     QAction,
     QVBoxLayout,
-    QWidget
+    QWidget,
+    QLineEdit,
+    QTextBrowser,
+    QFileDialog,
+    QMessageBox,
+    QApplication
 )
 
 from .book_list import BookList
+from .db_worker import BackgroundJob
 from .custom_widgets import AboutDialog
+from .diagnostics import StallDetector, DiagnosticsDialog
+from .lazy_import import lazy_import, load
+
+database = lazy_import('database.database')
+core = lazy_import('core')
+exporter = lazy_import('database.exporter')
+query_stats = lazy_import('database.query_stats')
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, stall_threshold_ms=200):
         super().__init__()
 
+        # Log any event handler that keeps the GUI thread busy for longer than the threshold.
+        self.stall_detector = StallDetector(stall_threshold_ms, parent=self)
+        self.stall_detector.start()
+
         self.central_widget = QWidget()
         layout = QVBoxLayout(self.central_widget)
 
         self.book_list_view = BookList()
+        self.export_job = None
+
+        # Also covers quitting without closing the window, e.g. --exit-after-startup.
+        QApplication.instance().aboutToQuit.connect(self.shut_down)
+
+        self.create_search_box(layout)
         layout.addWidget(self.book_list_view)
 
         self.setup_menu_bar()
@@ -28,11 +54,26 @@ class MainWindow(QMainWindow):
         # Set the minimum size to default size
         self.setMinimumSize(QSize(720, 600))
 
-        # Set the window icon to a distinct icon
-        self.setWindowIcon(qta.icon('fa.archive')) # Set the library icon
-
         self.setCentralWidget(self.central_widget)
 
+    def load_icons(self):
+        """Set the window and widget icons. Deferred until after the first paint, loading the icon fonts takes a while."""
+        import qtawesome as qta
+
+        self.setWindowIcon(qta.icon('fa.archive'))  # Set the library icon
+        self.search_box.addAction(qta.icon('fa.search'), QLineEdit.LeadingPosition)
+        self.book_list_view.load_icons()
+
+    def initialize_database(self):
+        """Create or upgrade the schema on the worker thread, then load the books."""
+        db = self.book_list_view.db
+        # Load the database layer and the services here on the GUI thread; the worker only uses them.
+        load(database, core)
+        init_db = database.init_db
+        db.submit(lambda session: init_db(),
+                  on_error=lambda error: self.book_list_view.show_error_message(f"Error opening the database: {error}"))
+        self.book_list_view.load_books()  # Queued behind the schema upgrade on the same thread.
+
     def setup_menu_bar(self):
         menu_bar = self.menuBar()
         file_menu = menu_bar.addMenu('File')
@@ -41,14 +82,143 @@ class MainWindow(QMainWindow):
         add_book_action.triggered.connect(self.add_book)
         file_menu.addAction(add_book_action)
 
-        about_menu = menu_bar.addMenu('About')
-        about_action = QAction('about', self)
+        file_menu.addAction(self.book_list_view.delete_selected_action)
+
+        self.export_action = QAction('Export Library...', self)
+        self.export_action.triggered.connect(self.export_library)
+        file_menu.addAction(self.export_action)
+
+        help_menu = menu_bar.addMenu('Help')
+        about_action = QAction('About', self)
         about_action.triggered.connect(self.show_about_dialog)
-        about_menu.addAction(about_action)
+        help_menu.addAction(about_action)
+
+        diagnostics_action = QAction('Diagnostics', self)
+        diagnostics_action.triggered.connect(self.show_diagnostics_dialog)
+        help_menu.addAction(diagnostics_action)
+
+    def create_search_box(self, layout):
+        # Search field; the query runs once the user pauses typing.
+        self.search_box = QLineEdit()
+        self.search_box.setPlaceholderText('Search pages...')
+        self.search_box.setClearButtonEnabled(True)
+        layout.addWidget(self.search_box)
+
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(200)
+        self.search_timer.timeout.connect(self.search_pages)
+        self.search_box.textChanged.connect(self.search_timer.start)
+        self.search_box.returnPressed.connect(self.search_pages)
+
+        # Ranked results with highlighted snippets, hidden while the search field is empty.
+        self.search_results = QTextBrowser()
+        self.search_results.setOpenLinks(False)
+        self.search_results.setMaximumHeight(200)
+        self.search_results.anchorClicked.connect(self.open_search_result)
+        self.search_results.hide()
+        layout.addWidget(self.search_results)
+        self.search_hits = []
+
+    def search_pages(self):
+        self.search_timer.stop()
+        text = self.search_box.text().strip()
+
+        # Only the latest query matters, drop any search still running.
+        db = self.book_list_view.db
+        db.cancel('search')
+        if not text:
+            self.show_search_results([])
+            return
+        db.submit(lambda session: core.PageService(session).search(text),
+                  on_result=self.show_search_results,
+                  on_error=lambda error: self.book_list_view.show_error_message(f"Error searching pages: {error}"),
+                  tag='search')
+
+    def show_search_results(self, hits):
+        self.search_hits = hits
+        if not self.search_box.text().strip():
+            self.search_results.hide()
+            return
+
+        entries = []
+        for index, hit in enumerate(hits):
+            snippet = (html.escape(hit.snippet)
+                       .replace(core.SNIPPET_START, '<b style="background-color: #fff3a0;">')
+                       .replace(core.SNIPPET_END, '</b>'))
+            heading = html.escape(f"{hit.book_title} — {hit.page_title or f'Page {hit.page_number}'}")
+            entries.append(f'<p><a href="#{index}">{heading}</a><br>{snippet}</p>')
+        self.search_results.setHtml(''.join(entries) or '<p>No matching pages.</p>')
+        self.search_results.show()
+
+    def open_search_result(self, url):
+        """Open the book and page of the search result that was clicked."""
+        hit = self.search_hits[int(url.fragment())]
+        # Opening the book already asked about any page being edited; don't ask again.
+        if self.book_list_view.show_book_pages(hit.book_id):
+            self.book_list_view.reader.open_page(hit.page_id)
 
     def add_book(self):
         self.book_list_view.add_book_dialog()
 
+    def export_library(self):
+        """Export all books, pages and covers on a background thread, reporting progress in the status bar."""
+        destination, _ = QFileDialog.getSaveFileName(
+            self, 'Export Library', 'library.zip', 'Zip archive with covers (*.zip);;JSON Lines (*.jsonl)')
+        if not destination:
+            return
+
+        self.export_action.setEnabled(False)  # One export at a time.
+        self.export_job = BackgroundJob(exporter.export_library, destination, parent=self)
+        self.export_job.progress.connect(
+            lambda progress: self.statusBar().showMessage(f"Exporting... {progress.pages} pages written"))
+        self.export_job.finished.connect(
+            lambda progress: self.on_export_done(f"Exported {progress.books} books and {progress.pages} pages to {destination}"))
+        self.export_job.failed.connect(
+            lambda error: self.on_export_done(f"Export failed: {error}"))
+        self.export_job.start()
+
+    def on_export_done(self, message):
+        self.statusBar().showMessage(message)
+        self.export_action.setEnabled(True)
+
+    def closeEvent(self, event):
+        if self.export_job is not None and self.export_job.is_running():
+            reply = QMessageBox.question(self, 'Export Running', 'The library is still being exported. Stop the export and quit?',
+                                         QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+            if reply != QMessageBox.Yes:
+                event.ignore()
+                return
+        self.shut_down()
+        super().closeEvent(event)
+
+    def shut_down(self):
+        """Stop the background work before the widgets go away: a running export is
+        cancelled (its partial file removed) and the queued database writes finish."""
+        if self.export_job is not None:
+            self.export_job.cancel()
+            self.export_job.wait()
+        self.book_list_view.db.shutdown()
+
     def show_about_dialog(self):
         dialog = AboutDialog()
-        dialog.exec_()  # Show the dialog modally
\ No newline at end of file
+        dialog.exec_()  # Show the dialog modally
+
+    def collect_diagnostics(self):
+        """Gather query statistics, GUI stalls and widget, pixmap and cache counts as plain data."""
+        widgets = QApplication.allWidgets()
+        classes = Counter(widget.metaObject().className() for widget in widgets)
+        book_list = self.book_list_view
+        return {
+            'collected_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'widgets': {'total': len(widgets), 'by_class': dict(classes.most_common(15))},
+            'page_buttons': book_list.page_model.rowCount(),
+            'cover_cache': book_list.book_card_delegate.covers.stats(),
+            'page_cache': book_list.page_cache.stats(),
+            'stalls': self.stall_detector.stats(),
+            'queries': query_stats.query_stats.snapshot(),
+        }
+
+    def show_diagnostics_dialog(self):
+        dialog = DiagnosticsDialog(self.collect_diagnostics, reset=query_stats.query_stats.reset, parent=self)
+        dialog.exec_()
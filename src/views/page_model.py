@@ -0,0 +1,120 @@
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex
+
+class PageListModel(QAbstractListModel):
+    """Holds the pages of the open book that are shown as buttons, as [id, number, title]
+    rows in page order.
+
+    Pages arrive a window at a time and are then kept in step with the database
+    instead of being reloaded: adding, inserting or deleting a page emits
+    rowsInserted/rowsRemoved for that page only, plus dataChanged for the rows whose
+    number shifted, so views touch just the widgets of those rows. Rows are addressed
+    by page id through an id -> row index."""
+    PageIdRole = Qt.UserRole + 1
+    NumberRole = Qt.UserRole + 2
+    TitleRole = Qt.UserRole + 3
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._pages = []
+        self._rows = {}  # page id -> row
+
+    @staticmethod
+    def label(number, title):
+        return title if title else f"Page {number}"
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._pages)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self._pages):
+            return None
+
+        page_id, number, title = self._pages[index.row()]
+        if role in (Qt.DisplayRole, Qt.ToolTipRole):
+            return self.label(number, title)
+        if role == self.PageIdRole:
+            return page_id
+        if role == self.NumberRole:
+            return number
+        if role == self.TitleRole:
+            return title
+        return None
+
+    def set_pages(self, pages):
+        """Replace all rows with an iterable of (id, number, title) tuples."""
+        self.beginResetModel()
+        self._pages = [list(page) for page in pages]
+        self._rows = {page[0]: row for row, page in enumerate(self._pages)}
+        self.endResetModel()
+
+    def append_pages(self, pages):
+        """Append a window of (id, number, title) tuples following the last row."""
+        pages = [list(page) for page in pages]
+        if not pages:
+            return
+
+        first = len(self._pages)
+        self.beginInsertRows(QModelIndex(), first, first + len(pages) - 1)
+        self._pages.extend(pages)
+        for row in range(first, len(self._pages)):
+            self._rows[self._pages[row][0]] = row
+        self.endInsertRows()
+
+    def last_page(self):
+        """Return the (id, number) of the last page, or None if there are none."""
+        return tuple(self._pages[-1][:2]) if self._pages else None
+
+    def row_of(self, page_id):
+        """Return the row of a page, or None if it is not in the model."""
+        return self._rows.get(page_id)
+
+    def row_for_number(self, number):
+        """Return the row a page numbered `number` goes to: the first row with a number >= `number`."""
+        low, high = 0, len(self._pages)
+        while low < high:
+            middle = (low + high) // 2
+            if self._pages[middle][1] < number:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def insert_page(self, page_id, number, title):
+        """Insert a page at its number; the rows from there on move back by one."""
+        row = self.row_for_number(number)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._pages.insert(row, [page_id, number, title])
+        self.endInsertRows()
+        self._renumber(row + 1, 1)
+        self._rows[page_id] = row
+
+    def remove_page(self, page_id):
+        """Remove a page by id; the rows after it move up by one. Return False if it is not in the model."""
+        row = self._rows.pop(page_id, None)
+        if row is None:
+            return False
+
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._pages[row]
+        self.endRemoveRows()
+        self._renumber(row, -1)
+        return True
+
+    def _renumber(self, first, offset):
+        """Shift the numbers of the rows from `first` on by `offset` and re-index them."""
+        untitled = []  # Rows labeled by their number, whose text changes with it.
+        for row in range(first, len(self._pages)):
+            page = self._pages[row]
+            page[1] += offset
+            self._rows[page[0]] = row
+            if not page[2]:
+                untitled.append(row)
+        if first >= len(self._pages):
+            return
+
+        # Every number changed, but only the untitled rows need their labels redrawn.
+        self.dataChanged.emit(self.index(first), self.index(len(self._pages) - 1), [self.NumberRole])
+        if untitled:
+            self.dataChanged.emit(self.index(untitled[0]), self.index(untitled[-1]), [Qt.DisplayRole, Qt.ToolTipRole])
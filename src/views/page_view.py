@@ -0,0 +1,75 @@
+from PyQt5.QtCore import Qt, pyqtSignal
+from PyQt5.QtGui import QFont
+from PyQt5.QtWidgets import QWidget, QPushButton
+
+from .custom_widgets import QFlowLayout
+from .page_model import PageListModel
+
+class PageButtonView(QWidget):
+    """Shows a button for every row of a `PageListModel`, wrapped by a QFlowLayout.
+
+    The buttons follow the model's signals one row at a time: inserted rows get new
+    buttons at their position, removed rows lose theirs and changed rows are relabeled
+    only if their text actually differs. The flow layout then places the buttons from
+    the first changed one on again, so editing a 10,000 page book never rebuilds it."""
+    page_clicked = pyqtSignal(int)  # Emits the page id of the button that was clicked.
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.flow_layout = QFlowLayout(self)
+        self.button_font = QFont('Helvetica', 8, QFont.Weight.Light)
+        self.buttons = []  # One button per model row, in row order.
+        self.model = None
+
+    def setModel(self, model):
+        if self.model is not None:
+            self.model.disconnect(self)
+        self.model = model
+        model.rowsInserted.connect(self.on_rows_inserted)
+        model.rowsRemoved.connect(self.on_rows_removed)
+        model.dataChanged.connect(self.on_data_changed)
+        model.modelReset.connect(self.on_model_reset)
+        self.on_model_reset()
+
+    def create_button(self, row):
+        index = self.model.index(row)
+        page_id = self.model.data(index, PageListModel.PageIdRole)
+        button = QPushButton(self.model.data(index), self)
+        button.setFont(self.button_font)
+        button.clicked.connect(lambda checked, page_id=page_id: self.page_clicked.emit(page_id))
+        return button
+
+    def on_rows_inserted(self, parent, first, last):
+        for row in range(first, last + 1):
+            button = self.create_button(row)
+            self.buttons.insert(row, button)
+            self.flow_layout.insert_widget(row, button)
+            button.show()  # Hidden widgets measure as empty; show it before the flow layout caches its size.
+
+    def on_rows_removed(self, parent, first, last):
+        for row in range(last, first - 1, -1):
+            self.flow_layout.takeAt(row)
+            button = self.buttons.pop(row)
+            button.hide()
+            button.deleteLater()
+        self.flow_layout.invalidate()
+
+    def on_data_changed(self, top_left, bottom_right, roles=()):
+        if roles and Qt.DisplayRole not in roles:
+            return  # Only data the buttons do not show changed, e.g. the numbers of titled pages.
+
+        relabeled = []
+        for row in range(top_left.row(), bottom_right.row() + 1):
+            label = self.model.data(self.model.index(row))
+            if self.buttons[row].text() != label:
+                self.buttons[row].setText(label)
+                relabeled.append(row)
+
+        # Relabeled buttons changed their width, re-measure them in the flow layout.
+        if relabeled:
+            self.flow_layout.update_item(relabeled[0], relabeled[-1] - relabeled[0] + 1)
+
+    def on_model_reset(self):
+        self.on_rows_removed(None, 0, len(self.buttons) - 1)
+        if self.model.rowCount():
+            self.on_rows_inserted(None, 0, self.model.rowCount() - 1)
@@ -0,0 +1,138 @@
+import re
+from itertools import count
+
+from PyQt5.QtGui import QTextCursor
+from PyQt5.QtWidgets import QPlainTextEdit
+
+from .lazy_import import lazy_import
+
+core = lazy_import('core')
+
+# Characters Qt and SQLite count differently (UTF-16 surrogate pairs) or that the document
+# stores as another character (line and paragraph separators). Edits to content holding
+# any of them are saved as the whole text instead of as splices.
+_UNMAPPABLE = re.compile('[\r\u2028\u2029\U00010000-\U0010ffff]')
+_PARAGRAPH_SEPARATOR = '\u2029'  # What QTextCursor.selectedText() returns for line breaks.
+
+_viewer_ids = count(1)
+
+class PageViewer(QPlainTextEdit):
+    """Shows the content of a page, fetching a long one `chunk_size` characters at a time.
+
+    The viewer starts with the first chunk (a `PageHead`, or a whole `PageRecord` for
+    short pages) and reads the next one with `PageService.read` on the database
+    worker whenever the user scrolls near the end of what is loaded. `show_page`
+    switches the same viewer to another page. Editing loads the
+    rest first; from then on every change of the document is recorded as a `Splice`,
+    so saving sends only the edits (`PageService.splice`) instead of the whole text."""
+    def __init__(self, db, page=None, length=None, chunk_size=64 * 1024, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.chunk_size = chunk_size
+        self.tag = f"page-chunk-{next(_viewer_ids)}"
+
+        self.setReadOnly(True)
+        self.verticalScrollBar().valueChanged.connect(self.fetch_if_near_end)
+        self.verticalScrollBar().rangeChanged.connect(self.fetch_if_near_end)
+        self.document().contentsChange.connect(self.record_change)
+        self.show_page(page, length)
+
+    def show_page(self, page, length=None):
+        """Show another page (or nothing if None), dropping the chunks still on the way for the previous one."""
+        self.cancel_loading()
+        self.splices = None  # Edits since editing started, None while read-only.
+        self.setReadOnly(True)
+        self.setUndoRedoEnabled(False)  # Loading chunks is not something to undo.
+
+        content = page.content if page is not None else ''
+        self.page_id = page.id if page is not None else None
+        self.length = length if length is not None else len(content)
+        self.loaded = len(content)  # Characters of the content in the document so far.
+        self.exact = not _UNMAPPABLE.search(content)
+        self.setPlainText(content)
+
+    def is_complete(self):
+        return self.loaded >= self.length
+
+    def fetch_if_near_end(self, *args):
+        scroll_bar = self.verticalScrollBar()
+        if scroll_bar.value() >= scroll_bar.maximum() - 2 * scroll_bar.pageStep():
+            self.fetch(self.chunk_size)
+
+    def fetch(self, characters):
+        """Read the next `characters` characters of the content, or all of the rest if negative."""
+        if self.is_complete() or self.fetching:
+            return
+        self.fetching = True
+        page_id, start = self.page_id, self.loaded
+        self.db.submit(lambda session: core.PageService(session).read(page_id, start, characters),
+                       on_result=self.append_chunk, tag=self.tag)
+
+    def append_chunk(self, text):
+        if not text:
+            self.length = self.loaded  # The page got shorter since it was opened.
+        self.exact = self.exact and not _UNMAPPABLE.search(text)
+
+        # Inserting changes the scroll range, which asks for the next chunk: count the text
+        # as loaded and keep `fetching` set until it is in, or the same chunk is read again.
+        self.loaded += len(text)
+        cursor = QTextCursor(self.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText(text)
+        self.fetching = False
+
+        if self.is_complete():
+            callbacks, self.when_loaded = self.when_loaded, []
+            for callback in callbacks:
+                callback()
+        elif self.when_loaded:
+            self.fetch(-1)
+        else:
+            self.fetch_if_near_end()
+
+    def load_all(self, callback):
+        """Call `callback` once the whole content is in the document."""
+        if self.is_complete():
+            callback()
+            return
+        self.when_loaded.append(callback)
+        self.fetch(-1)
+
+    def cancel_loading(self):
+        self.db.cancel(self.tag)
+        self.fetching = False
+        self.when_loaded = []  # Callbacks waiting for the whole content.
+
+    def start_editing(self):
+        """Make the viewer editable and start recording edits. The whole content must be loaded."""
+        self.splices = []
+        self.setUndoRedoEnabled(True)
+        self.setReadOnly(False)
+
+    def stop_editing(self):
+        self.splices = None
+        self.setReadOnly(True)
+        self.setUndoRedoEnabled(False)
+
+    def record_change(self, position, removed, added):
+        if self.splices is None:
+            return  # Loading, not editing.
+
+        cursor = QTextCursor(self.document())
+        cursor.setPosition(position)
+        cursor.setPosition(min(position + added, self.document().characterCount() - 1), QTextCursor.KeepAnchor)
+        text = cursor.selectedText().replace(_PARAGRAPH_SEPARATOR, '\n')
+        self.exact = self.exact and not _UNMAPPABLE.search(text)
+
+        # Typing extends the previous splice rather than adding one per key press.
+        if self.splices and removed == 0:
+            last = self.splices[-1]
+            if position == last.position + len(last.text):
+                self.splices[-1] = last._replace(text=last.text + text)
+                return
+        self.splices.append(core.Splice(position, removed, text))
+
+    def edits(self):
+        """Return the splices turning the saved content into the edited one, or None if
+        they can't be mapped onto it and the whole text has to be saved."""
+        return list(self.splices) if self.exact and self.splices is not None else None
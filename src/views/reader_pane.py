@@ -0,0 +1,228 @@
+from PyQt5.QtCore import Qt, pyqtSignal
+from PyQt5.QtGui import QFont, QKeySequence
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QSpinBox, QMessageBox
+
+from .page_viewer import PageViewer
+from .lazy_import import lazy_import
+
+core = lazy_import('core')
+
+def prefetch_pages(session, cache, book_id, first, last, length, near=None):
+    """Read the pages of a book numbered `first` to `last` on the database worker and put
+    the ones that fit in `length` characters into `cache`. Return the heads of the longer
+    ones, which the cache can't hold. `near` is as for `PageService.heads`."""
+    long_pages = []
+    for head in core.PageService(session).heads(book_id, first, last, length, near):
+        if head.length > len(head.content):
+            long_pages.append(head)
+        elif (head.book_id, head.number) not in cache:
+            cache.put(head)
+    return long_pages
+
+class ReaderPane(QWidget):
+    """Shows one page of the open book at a time, with previous/next buttons and a page
+    number box to jump to any page.
+
+    Pages are read from the `PageCache` when they are there, so turning to a page read
+    recently takes no query. After every page turn the `prefetch` pages on either side
+    of the new page are read on the database worker in one range query and put into
+    the cache, so the next turn in either direction is served from memory even on a cold
+    cache. Long pages are kept by the pane as their first chunk (`PageHead`) instead; the
+    viewer reads the rest as they are scrolled."""
+    page_shown = pyqtSignal(object)  # Emits the page now shown (a PageRecord or PageHead), or None.
+
+    def __init__(self, db, page_cache, chunk_size=64 * 1024, prefetch=3, page_count=None, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.page_cache = page_cache
+        self.chunk_size = chunk_size
+        self.prefetch = prefetch  # Pages read ahead on either side of the page shown.
+        self.page_count = page_count or (lambda book_id: 0)  # Returns the number of pages of a book.
+        self.book_id = None
+        self.page = None  # The page shown, or None.
+        self.heads = {}  # (book id, number) -> PageHead of the prefetched long pages around the page shown.
+        self.editing = False
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        # Navigation bar: previous, "Page [n] of N", next, then the page title.
+        navigation = QHBoxLayout()
+        self.previous_button = QPushButton('◀ Previous')
+        self.previous_button.setShortcut(QKeySequence('Alt+Left'))
+        self.previous_button.setToolTip('Previous page (Alt+Left)')
+        self.previous_button.clicked.connect(self.previous_page)
+        self.next_button = QPushButton('Next ▶')
+        self.next_button.setShortcut(QKeySequence('Alt+Right'))
+        self.next_button.setToolTip('Next page (Alt+Right)')
+        self.next_button.clicked.connect(self.next_page)
+
+        self.number_box = QSpinBox()
+        self.number_box.setKeyboardTracking(False)  # Jump once the number is entered, not on every digit.
+        self.number_box.valueChanged.connect(self.go_to)
+        self.count_label = QLabel()
+
+        self.title_label = QLabel()
+        self.title_label.setFont(QFont('Arial', 10, QFont.Weight.Bold))
+
+        navigation.addWidget(self.previous_button)
+        navigation.addWidget(QLabel('Page'))
+        navigation.addWidget(self.number_box)
+        navigation.addWidget(self.count_label)
+        navigation.addWidget(self.next_button)
+        navigation.addWidget(self.title_label, 1, alignment=Qt.AlignmentFlag.AlignCenter)
+        layout.addLayout(navigation)
+
+        # One viewer for every page, switched with show_page().
+        self.viewer = PageViewer(db, chunk_size=chunk_size)
+        self.viewer.setPlaceholderText('Select a page to read it.')
+        layout.addWidget(self.viewer, 1)
+
+        # Actions on the page shown; BookList connects them.
+        actions = QHBoxLayout()
+        self.edit_button = QPushButton('Edit')
+        self.insert_button = QPushButton('Insert Before')
+        self.delete_button = QPushButton('Delete')
+        actions.addWidget(self.edit_button)
+        actions.addWidget(self.insert_button)
+        actions.addWidget(self.delete_button)
+        layout.addLayout(actions)
+
+        self.update_controls()
+
+    def number(self):
+        return self.page.number if self.page is not None else 0
+
+    def near(self):
+        """Return the (id, number) of the page shown, from which pages are found by number."""
+        return (self.page.id, self.page.number) if self.page is not None else None
+
+    def clear(self, book_id=None):
+        """Show no page, e.g. when another book (`book_id`) is opened."""
+        self.db.cancel('page')
+        self.db.cancel('prefetch')
+        self.book_id = book_id
+        self.heads = {}
+        self.show_page(None)
+
+    def open_page(self, page_id):
+        """Show the page with the given id."""
+        # Only the page asked for last is shown, drop any page still being fetched.
+        self.db.cancel('page')
+        page = self.page_cache.get_by_id(page_id)
+        if page is not None:
+            self.show_page(page)
+            return
+
+        # Fetch only the start of the content; the viewer loads the rest of a long page as it is scrolled.
+        chunk_size = self.chunk_size
+        self.db.submit(lambda session: core.PageService(session).head(page_id, chunk_size),
+                       on_result=self.on_page_fetched,
+                       on_error=self.show_error,
+                       tag='page')
+
+    def go_to(self, number):
+        """Show page `number` of the book."""
+        if self.book_id is None or self.editing or number < 1 or number == self.number():
+            return
+        self.db.cancel('page')
+
+        page = self.page_cache.get(self.book_id, number)
+        if page is not None:
+            self.show_page(page)
+            return
+        head = self.heads.get((self.book_id, number))
+        if head is not None:
+            self.show_page(head, head.length)
+            return
+
+        book_id, chunk_size, near = self.book_id, self.chunk_size, self.near()
+        self.db.submit(lambda session: core.PageService(session).heads(book_id, number, number, chunk_size, near),
+                       on_result=lambda heads: self.on_page_fetched(heads[0] if heads else None),
+                       on_error=self.show_error,
+                       tag='page')
+
+    def next_page(self):
+        self.go_to(self.number() + 1)
+
+    def previous_page(self):
+        self.go_to(self.number() - 1)
+
+    def on_page_fetched(self, head):
+        if head is None:
+            QMessageBox.warning(self, 'Page Not Found', 'The page no longer exists.')
+            return
+        if head.length > len(head.content):
+            self.show_page(head, head.length)
+            return
+
+        # The whole page fit in the first chunk, keep it for opening it again.
+        page = core.PageRecord(head.id, head.book_id, head.number, head.title, head.content)
+        self.page_cache.put(page)
+        self.show_page(page)
+
+    def show_page(self, page, length=None):
+        """Show a page given with all of its content, or only the first chunk if `length` says there is more."""
+        self.page = page
+        if page is not None:
+            self.book_id = page.book_id
+        self.viewer.show_page(page, length)
+        self.update_controls()
+        self.page_shown.emit(page)
+        if page is not None:
+            self.prefetch_around(page.number)
+
+    def page_total(self):
+        return max(self.page_count(self.book_id), self.number()) if self.book_id is not None else 0
+
+    def prefetch_around(self, number):
+        """Read the pages next to page `number` that are neither cached nor kept as heads."""
+        book_id = self.book_id
+        first, last = max(1, number - self.prefetch), min(self.page_total(), number + self.prefetch)
+        self.heads = {key: head for key, head in self.heads.items()
+                      if key[0] == book_id and first <= key[1] <= last}
+        missing = [n for n in range(first, last + 1)
+                   if n != number and (book_id, n) not in self.page_cache and (book_id, n) not in self.heads]
+        if not missing:
+            return
+
+        # A page turn makes the window read for the previous page useless if it is still queued.
+        self.db.cancel('prefetch')
+        self.db.submit(prefetch_pages, self.page_cache, book_id, missing[0], missing[-1], self.chunk_size, self.near(),
+                       on_result=lambda heads: self.on_prefetched(book_id, heads),
+                       tag='prefetch')
+
+    def on_prefetched(self, book_id, heads):
+        if book_id == self.book_id:
+            self.heads.update(((head.book_id, head.number), head) for head in heads)
+
+    def forget(self, book_id, from_number=None):
+        """Drop the kept heads of a book's pages, or of those numbered `from_number` and up,
+        along with any prefetch still on the way. Call it whenever the cache is invalidated."""
+        self.db.cancel('prefetch')
+        self.heads = {key: head for key, head in self.heads.items()
+                      if key[0] != book_id or (from_number is not None and key[1] < from_number)}
+
+    def set_editing(self, editing):
+        """Keep the page from being turned while it is edited."""
+        self.editing = editing
+        self.update_controls()
+
+    def update_controls(self):
+        number, total = self.number(), self.page_total()
+        shown = self.page is not None
+        self.previous_button.setEnabled(shown and not self.editing and number > 1)
+        self.next_button.setEnabled(shown and not self.editing and number < total)
+        self.number_box.setEnabled(shown and not self.editing)
+        self.number_box.blockSignals(True)  # Showing a page is not a jump to it.
+        self.number_box.setRange(1 if shown else 0, max(total, 1))
+        self.number_box.setValue(number)
+        self.number_box.blockSignals(False)
+        self.count_label.setText(f"of {total}")
+        self.title_label.setText((self.page.title or '') if shown else '')
+        self.edit_button.setEnabled(shown)
+        self.insert_button.setEnabled(shown and not self.editing)
+        self.delete_button.setEnabled(shown and not self.editing)
+
+    def show_error(self, error):
+        QMessageBox.critical(self, 'Error', f"Error loading page: {error}")
@@ -0,0 +1,364 @@
+"""Headless benchmarks for the paths the UI depends on.
+
+Runs under `QT_QPA_PLATFORM=offscreen` against generated SQLite fixtures and prints
+the timings as JSON. Given a baseline (a previous run's JSON output), any case whose
+median got slower than the baseline by more than the tolerance fails the run:
+
+    python tests/benchmark.py --sizes 1000,100000 --output bench.json
+    python tests/benchmark.py --baseline bench.json --tolerance 0.25
+
+Fixtures are created once with the bulk importer in `--fixtures-dir` and copied to a
+temporary file for every run, so benchmarks that write (adding pages, deleting
+books) never change them.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import sqlite3
+import argparse
+import platform
+import tempfile
+import statistics
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from PyQt5.QtCore import QRect, QT_VERSION_STR
+from PyQt5.QtWidgets import QApplication, QWidget, QPushButton, QMessageBox
+
+from database.database import configure, create_database_engine
+from database.importer import BulkImporter, Record
+from database.migrations import upgrade
+
+DEFAULT_SIZES = (1000, 100000, 1000000)
+PAGES_PER_BOOK = 1000
+CONTENT = ("Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor "
+           "incididunt ut labore et dolore magna aliqua. ") * 4
+
+def fixture_records(pages):
+    """Yield `pages` pages spread over books of at most PAGES_PER_BOOK pages (at least 10 books)."""
+    per_book = min(PAGES_PER_BOOK, max(1, pages // 10))
+    for index in range(pages):
+        book = index // per_book
+        yield Record(f"Book {book + 1}", f"Page {index % per_book + 1}", f"{index} {CONTENT}", None)
+
+def fixture_path(fixtures_dir, pages):
+    """Return the path of the fixture with `pages` pages, generating it on first use."""
+    path = os.path.join(fixtures_dir, f"pages-{pages}.db")
+    if not os.path.exists(path):
+        partial = path + '.partial'
+        if os.path.exists(partial):
+            os.remove(partial)
+        engine = create_database_engine(partial)
+        upgrade(engine)
+        BulkImporter(engine).run(fixture_records(pages))
+        engine.dispose()
+        os.replace(partial, path)
+    return path
+
+def measure(fn, repeat):
+    """Call `fn(run)` `repeat` times and return its timings in milliseconds."""
+    timings = []
+    for run in range(repeat):
+        start = time.perf_counter()
+        fn(run)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def summarize(timings):
+    return {
+        'runs': len(timings),
+        'min_ms': round(min(timings), 3),
+        'median_ms': round(statistics.median(timings), 3),
+        'max_ms': round(max(timings), 3),
+    }
+
+class BookListBenchmark:
+    """Drives a `BookList` bound to a copy of one fixture."""
+    def __init__(self, fixture, workdir, repeat):
+        from views.book_list import BookList
+
+        self.database = os.path.join(workdir, os.path.basename(fixture))
+        shutil.copyfile(fixture, self.database)
+        self.engine = configure(self.database)
+        upgrade(self.engine)  # Fixtures generated by an older version.
+        self.repeat = repeat
+        self.errors = []
+
+        self.book_list = BookList()
+        self.book_list.show_error_message = self.errors.append
+        self.book_list.resize(1000, 800)
+        self.book_list.show()
+        self.wait()
+
+    def close(self):
+        self.book_list.close()
+        self.book_list.deleteLater()
+        self.wait()
+        self.engine.dispose()
+        os.remove(self.database)
+
+    def wait(self):
+        self.book_list.db.wait_for_done()
+        QApplication.processEvents()
+
+    def book_ids(self):
+        with sqlite3.connect(self.database) as connection:
+            return [row[0] for row in connection.execute("SELECT id FROM books ORDER BY id")]
+
+    def run(self):
+        book_list = self.book_list
+        book_ids = self.book_ids()
+        results = {}
+
+        def load_books(run):
+            book_list.load_books()
+            self.wait()
+        results['load_books'] = measure(load_books, self.repeat)
+
+        # Open the first book and time every further window of page buttons.
+        book_list.show_book_pages(book_ids[0])
+        self.wait()
+
+        def load_more_pages(run):
+            book_list.load_more_pages()
+            self.wait()
+        results['load_more_pages'] = measure(load_more_pages, self.repeat)
+
+        # Read a page with nothing cached, then turn pages one at a time. Every turn
+        # starts once the pages prefetched by the previous one are in the cache.
+        reader = book_list.reader
+        def open_page_cold(run):
+            book_list.page_cache.clear()
+            reader.clear(book_ids[0])
+            reader.go_to(run + 1)
+            self.wait()
+        results['open_page_cold'] = measure(open_page_cold, self.repeat)
+
+        def next_page(run):
+            reader.next_page()
+            QApplication.processEvents()
+        results['next_page'] = []
+        for run in range(self.repeat):
+            self.wait()
+            results['next_page'] += measure(next_page, 1)
+
+        def save_page_to_db(run):
+            book_list.save_page_to_db(f"Benchmark page {run}", CONTENT)
+            self.wait()
+        results['save_page_to_db'] = measure(save_page_to_db, self.repeat)
+
+        # Insert in front of the first page; the pages behind it are not rewritten.
+        def insert_page_front(run):
+            book_list.insert_page(book_ids[0], 1, f"Benchmark front page {run}", CONTENT)
+            self.wait()
+        results['insert_page_front'] = measure(insert_page_front, self.repeat)
+
+        # Delete the last books, each holding up to PAGES_PER_BOOK pages.
+        def delete_book(run):
+            book_list.delete_book(book_ids[-1 - run])
+            self.wait()
+        results['delete_book'] = measure(delete_book, min(self.repeat, len(book_ids) - 1))
+
+        # Paint one screenful of book cards.
+        def paint_book_cards(run):
+            book_list.book_grid.viewport().grab()
+        results['paint_book_cards'] = measure(paint_book_cards, self.repeat)
+
+        return results
+
+def benchmark_flow_layout(buttons, repeat):
+    """Time laying out `buttons` page buttons from scratch and appending one more."""
+    from views.custom_widgets import QFlowLayout
+
+    container = QWidget()
+    layout = QFlowLayout(container)
+    for number in range(buttons):
+        layout.addWidget(QPushButton(f"Page {number + 1}"))
+    rect = QRect(0, 0, 800, 600)
+
+    def full(run):
+        layout.clear_cache()
+        layout.doLayout(rect, False)
+
+    def append(run):
+        layout.addWidget(QPushButton(f"Page {buttons + run + 1}"))
+        layout.doLayout(rect, False)
+
+    results = {'doLayout': measure(full, repeat), 'doLayout_append': measure(append, repeat)}
+    container.deleteLater()
+    return results
+
+def benchmark_page_view(buttons, repeat):
+    """Time removing and inserting a page near the start of a book showing `buttons` page buttons."""
+    from views.page_model import PageListModel
+    from views.page_view import PageButtonView
+
+    model = PageListModel()
+    model.set_pages((number, number, f"Chapter {number}") for number in range(1, buttons + 1))
+    view = PageButtonView()
+    view.setModel(model)
+    rect = QRect(0, 0, 800, 600)
+    view.flow_layout.doLayout(rect, False)
+
+    def remove(run):
+        model.remove_page(model.data(model.index(1), PageListModel.PageIdRole))
+        view.flow_layout.doLayout(rect, False)
+
+    def insert(run):
+        model.insert_page(buttons + run + 1, 2, f"Inserted {run}")
+        view.flow_layout.doLayout(rect, False)
+
+    results = {'remove_page': measure(remove, repeat), 'insert_page': measure(insert, repeat)}
+    view.deleteLater()
+    return results
+
+def benchmark_title_filter(books, repeat):
+    """Time building the title index for `books` books and filtering the book model as a query is typed."""
+    import random
+    from core import TitleIndex
+    from views.book_model import BookListModel
+
+    rng = random.Random(0)
+    words = [''.join(rng.choices('abcdefghijklmnopqrstuvwxyz', k=rng.randint(2, 9))) for _ in range(5000)]
+    rows = [(book_id, ' '.join(rng.choices(words, k=rng.randint(1, 5))).title(), None, 0)
+            for book_id in range(1, books + 1)]
+    query = rows[0][1]
+
+    def build(run):
+        TitleIndex((book_id, title) for book_id, title, _, _ in rows)
+
+    model = BookListModel()
+    model.set_books(rows)
+    model.set_title_index(TitleIndex((book_id, title) for book_id, title, _, _ in rows))
+
+    def type_query(run):
+        # One keystroke at a time, then clearing the box again.
+        for length in range(1, len(query) + 1):
+            model.set_filter(query[:length])
+        model.set_filter('')
+
+    return {'build_index': measure(build, repeat), 'type_query': measure(type_query, repeat)}
+
+def benchmark_covers(workdir, repeat):
+    """Time loading a card cover from a large original image and from the cover store."""
+    from PyQt5.QtCore import QSize
+    from PyQt5.QtGui import QImage, QImageReader, QColor
+    from database.covers import CoverStore, CARD_SIZE
+
+    original = os.path.join(workdir, 'cover.jpg')
+    image = QImage(1600, 2400, QImage.Format.Format_RGB32)
+    image.fill(QColor(40, 90, 160))
+    image.save(original)
+    store = CoverStore(os.path.join(workdir, 'covers'))
+
+    def scale_original(run):
+        reader = QImageReader(original)
+        reader.setScaledSize(QSize(*CARD_SIZE))
+        reader.read()
+
+    def store_cover(run):
+        shutil.rmtree(store.directory(), ignore_errors=True)
+        store.add(original)
+
+    def load_stored(run):
+        QImage(store.path(key, 1))
+
+    results = {'scale_original': measure(scale_original, repeat), 'store': measure(store_cover, repeat)}
+    key = store.add(original)
+    results['load_stored'] = measure(load_stored, repeat)
+    return results
+
+def compare(results, baseline, tolerance, min_delta_ms):
+    """Return the cases whose median regressed against the baseline by more than `tolerance`.
+
+    Slowdowns smaller than `min_delta_ms` are ignored, sub-millisecond cases are mostly noise."""
+    regressions = {}
+    for case, current in results.items():
+        previous = baseline.get(case)
+        if previous is None:
+            continue
+        limit = max(previous['median_ms'] * (1 + tolerance), previous['median_ms'] + min_delta_ms)
+        if current['median_ms'] > limit:
+            regressions[case] = {
+                'baseline_median_ms': previous['median_ms'],
+                'median_ms': current['median_ms'],
+                'ratio': round(current['median_ms'] / previous['median_ms'], 3) if previous['median_ms'] else None,
+            }
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark Book Manager against generated SQLite fixtures.')
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help='comma-separated page counts of the fixtures (default: %(default)s)')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per case (default: %(default)s)')
+    parser.add_argument('--buttons', type=int, default=2000, help='page buttons for the layout and page view cases (default: %(default)s)')
+    parser.add_argument('--books', type=int, default=100000, help='book titles for the title filter case (default: %(default)s)')
+    parser.add_argument('--fixtures-dir', default=os.path.join(tempfile.gettempdir(), 'book-manager-fixtures'),
+                        help='where generated fixtures are kept between runs (default: %(default)s)')
+    parser.add_argument('--baseline', help='JSON output of an earlier run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed slowdown of a median against the baseline (default: %(default)s)')
+    parser.add_argument('--min-delta-ms', type=float, default=1.0,
+                        help='ignore slowdowns smaller than this many milliseconds (default: %(default)s)')
+    parser.add_argument('--output', help='also write the JSON results to this file')
+    args = parser.parse_args(argv)
+
+    app = QApplication.instance() or QApplication(sys.argv)
+
+    # Never block on a modal confirmation while benchmarking.
+    QMessageBox.question = staticmethod(lambda *a, **k: QMessageBox.Yes)
+    QMessageBox.information = staticmethod(lambda *a, **k: QMessageBox.Ok)
+    QMessageBox.warning = staticmethod(lambda *a, **k: QMessageBox.Ok)
+
+    os.makedirs(args.fixtures_dir, exist_ok=True)
+    results, errors = {}, []
+
+    for case, timings in benchmark_flow_layout(args.buttons, args.repeat).items():
+        results[f"QFlowLayout/{case}"] = summarize(timings)
+    for case, timings in benchmark_page_view(args.buttons, args.repeat).items():
+        results[f"PageButtonView/{case}"] = summarize(timings)
+    for case, timings in benchmark_title_filter(args.books, args.repeat).items():
+        results[f"TitleFilter/{case}"] = summarize(timings)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for case, timings in benchmark_covers(workdir, args.repeat).items():
+            results[f"covers/{case}"] = summarize(timings)
+        for size in (int(size) for size in args.sizes.split(',')):
+            benchmark = BookListBenchmark(fixture_path(args.fixtures_dir, size), workdir, args.repeat)
+            try:
+                for case, timings in benchmark.run().items():
+                    results[f"{size}/{case}"] = summarize(timings)
+            finally:
+                errors.extend(benchmark.errors)
+                benchmark.close()
+
+    report = {
+        'environment': {
+            'python': platform.python_version(),
+            'qt': QT_VERSION_STR,
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+        },
+        'results': results,
+        'errors': errors,
+    }
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)['results']
+        report['tolerance'] = args.tolerance
+        report['regressions'] = compare(results, baseline, args.tolerance, args.min_delta_ms)
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(output + '\n')
+
+    app.processEvents()
+    return 1 if errors or report.get('regressions') else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,44 @@
+import os
+import sys
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import pytest
+
+from database import config
+from database.database import configure, session_scope
+from database.migrations import upgrade
+
+@pytest.fixture
+def engine(tmp_path):
+    """A new database file with the current schema, used by `session_scope()` and the database worker,
+    with its cover store next to it."""
+    engine = configure(str(tmp_path / 'books.db'))
+    config.set_covers_path(str(tmp_path / 'covers'))
+    upgrade(engine)
+    yield engine
+    engine.dispose()
+    config.set_covers_path(None)
+
+@pytest.fixture
+def session(engine):
+    with session_scope() as session:
+        yield session
+
+@pytest.fixture(scope='session')
+def qapp():
+    from PyQt5.QtWidgets import QApplication
+    return QApplication.instance() or QApplication([])
+
+@pytest.fixture
+def write_image(qapp):
+    """Return a function saving a plain image of `size` in `color` to `path`, returning the path."""
+    from PyQt5.QtGui import QImage, QColor
+
+    def write(path, color='red', size=(40, 60)):
+        image = QImage(*size, QImage.Format_RGB32)
+        image.fill(QColor(color))
+        assert image.save(str(path))
+        return str(path)
+    return write
@@ -0,0 +1,171 @@
+import zlib
+
+import pytest
+from sqlalchemy import text as sql_text
+
+from core import BookService, PageService, PageCursor, DuplicateTitle, Splice
+from database import config
+
+def add_book(session, pages, title='Book'):
+    book = BookService(session).create(title)
+    service = PageService(session)
+    return book, [service.append(book.id, f"t{number}", f"body {number}").id for number in range(1, pages + 1)]
+
+def test_cursor_reads_the_book_one_window_at_a_time(session):
+    book, page_ids = add_book(session, 25)
+    cursor = PageCursor(book.id, page_size=10)
+    seen = []
+    while not cursor.exhausted:
+        pages = cursor.fetch_next(session)
+        cursor.receive(pages)
+        seen += [page.id for page in pages]
+    assert seen == page_ids
+
+def test_cursor_window_follows_pages_deleted_before_it_is_told(session):
+    book, page_ids = add_book(session, 60)
+    cursor = PageCursor(book.id, page_size=40)
+    cursor.receive(cursor.fetch_next(session))
+
+    # The last page shown is deleted and the next window is read before the cursor hears of it.
+    PageService(session).delete(page_ids[39])
+    assert [page.id for page in cursor.fetch_next(session)] == page_ids[40:]
+
+def test_cursor_window_follows_pages_inserted_before_it_is_told(session):
+    book, page_ids = add_book(session, 60)
+    cursor = PageCursor(book.id, page_size=40)
+    cursor.receive(cursor.fetch_next(session))
+
+    PageService(session).insert(book.id, 1, 'front', 'new first page')
+    pages = cursor.fetch_next(session)
+    assert [page.id for page in pages] == page_ids[40:]
+
+    # Told of the insert before the window arrives, the cursor numbers it after the new page.
+    cursor.last_number += 1
+    assert [page.number for page in cursor.receive(pages)] == list(range(42, 62))
+
+def numbered(session, book_id):
+    return [(page.id, page.number) for page in PageService(session).window(book_id)]
+
+def test_append_numbers_pages_in_order(session):
+    book, page_ids = add_book(session, 3)
+    assert numbered(session, book.id) == list(zip(page_ids, [1, 2, 3]))
+    assert PageService(session).last_number(book.id) == 3
+
+def test_insert_moves_the_later_pages_back(session):
+    book, page_ids = add_book(session, 3)
+    service = PageService(session)
+    front = service.insert(book.id, 1, 'front', 'x')
+    middle = service.insert(book.id, 3, 'middle', 'x')
+    end = service.insert(book.id, 100, 'end', 'x')  # Past the end appends.
+
+    assert (front.number, middle.number, end.number) == (1, 3, 6)
+    assert numbered(session, book.id) == list(zip(
+        [front.id, page_ids[0], middle.id, page_ids[1], page_ids[2], end.id], range(1, 7)))
+
+def positions(session, book_id):
+    return dict(session.execute(sql_text("SELECT id, position FROM pages WHERE book_id = :id"), {'id': book_id}).all())
+
+def test_insert_leaves_the_other_pages_alone_until_a_gap_runs_out(session):
+    book, page_ids = add_book(session, 5)
+    service = PageService(session)
+    before = positions(session, book.id)
+
+    service.insert(book.id, 1, 'front', 'x')
+    inserted = [service.insert(book.id, 3, f"middle {n}", 'x').id for n in range(9)]
+    assert {page_id: positions(session, book.id)[page_id] for page_id in page_ids} == before
+
+    # Ten pages between the same two neighbours use up the gap, so the book is renumbered.
+    inserted.append(service.insert(book.id, 3, 'middle 9', 'x').id)
+    assert positions(session, book.id) != before
+    assert [page_id for page_id, _ in numbered(session, book.id)][2:13] == inserted[::-1] + [page_ids[1]]
+    assert [number for _, number in numbered(session, book.id)] == list(range(1, 17))
+
+def test_pages_are_found_by_number_from_a_page_near_them(session):
+    book, page_ids = add_book(session, 20)
+    service = PageService(session)
+    service.delete(page_ids[0])
+    expected = [(page_ids[n], n) for n in range(5, 9)]  # Page n is the (n + 1)th added now.
+
+    for near in (None, (page_ids[2], 2), (page_ids[14], 14)):
+        heads = service.heads(book.id, 5, 8, 10, near=near)
+        assert [(head.id, head.number) for head in heads] == expected
+    assert service.get(page_ids[5]).number == 5
+    assert service.head(page_ids[5], 3).number == 5
+    assert [(page.id, page.number) for page in service.window(book.id, 4, 4)] == expected
+    assert service.heads(book.id, 20, 25, 10) == []
+
+def test_delete_closes_the_gap(session):
+    book, page_ids = add_book(session, 4)
+    other, other_ids = add_book(session, 2, title='Other')
+    service = PageService(session)
+
+    assert service.delete(page_ids[1]) == 2
+    assert service.delete(page_ids[1]) is None
+    assert numbered(session, book.id) == list(zip([page_ids[0], page_ids[2], page_ids[3]], [1, 2, 3]))
+    assert numbered(session, other.id) == list(zip(other_ids, [1, 2]))  # Other books keep their numbers.
+
+def test_listing_counts_pages(session):
+    book, _ = add_book(session, 3)
+    empty = BookService(session).create('Empty')
+    assert {listing.id: listing.pages for listing in BookService(session).listing()} == {book.id: 3, empty.id: 0}
+
+def test_titles_are_unique(session):
+    BookService(session).create('Book')
+    with pytest.raises(DuplicateTitle):
+        BookService(session).create('Book')
+
+@pytest.fixture(params=[None, 1], ids=['plain', 'compressed'])
+def compression(request):
+    config.set_compression_threshold(request.param)
+    yield request.param
+    config.set_compression_threshold(None)
+
+def stored_type(session, page_id):
+    return session.execute(sql_text("SELECT typeof(content) FROM pages WHERE id = :id"), {'id': page_id}).scalar()
+
+def test_splice_applies_edits_in_order(session, compression):
+    book = BookService(session).create('Book')
+    content = 'The quick brown fox jumps over the lazy dog. ' * 20
+    page = PageService(session).append(book.id, 'page', content)
+    assert stored_type(session, page.id) == ('blob' if compression else 'text')
+
+    edits = [Splice(0, 3, 'A'), Splice(10, 0, 'very '), Splice(len(content) - 10, 10, 'cat. END')]
+    expected = content
+    for edit in edits:
+        expected = expected[:edit.position] + edit.text + expected[edit.position + edit.removed:]
+
+    assert PageService(session).splice(page.id, edits)
+    assert PageService(session).get(page.id).content == expected
+    assert [hit.page_id for hit in PageService(session).search('END')] == [page.id]  # Search index follows the edit.
+    assert not PageService(session).splice(page.id + 1, edits)
+
+def test_splice_compresses_a_page_grown_past_the_threshold(session):
+    book = BookService(session).create('Book')
+    page = PageService(session).append(book.id, 'page', 'short')
+    config.set_compression_threshold(1000)
+    try:
+        assert PageService(session).splice(page.id, [Splice(5, 0, ' and growing' * 10)])
+        assert stored_type(session, page.id) == 'text'
+        assert PageService(session).splice(page.id, [Splice(0, 0, 'much longer ' * 100)])
+        assert stored_type(session, page.id) == 'blob'
+    finally:
+        config.set_compression_threshold(None)
+    assert PageService(session).get(page.id).content == 'much longer ' * 100 + 'short' + ' and growing' * 10
+    assert [hit.page_id for hit in PageService(session).search('growing')] == [page.id]
+
+def test_reading_a_compressed_page_in_chunks_decompresses_it_once(session, monkeypatch):
+    config.set_compression_threshold(1)
+    try:
+        book = BookService(session).create('Book')
+        content = ''.join(f"line {n}\n" for n in range(5000))
+        page = PageService(session).append(book.id, 'page', content)
+    finally:
+        config.set_compression_threshold(None)
+
+    calls = []
+    decompress = zlib.decompress
+    monkeypatch.setattr(zlib, 'decompress', lambda data: calls.append(1) or decompress(data))
+    chunks = [PageService(session).read(page.id, start, 1000) for start in range(0, len(content), 1000)]
+    assert ''.join(chunks) == content and PageService(session).read(page.id, 100) == content[100:]
+    assert len(calls) <= 1  # None if the search index decoded it last, when it was saved.
+
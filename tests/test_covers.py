@@ -0,0 +1,67 @@
+import os
+
+import pytest
+
+from core import BookService, InvalidCover
+from database.covers import CoverStore, CARD_SIZE, SCALES, is_key, migrate_legacy
+
+def stored_files(store):
+    return sorted(os.path.relpath(os.path.join(directory, name), store.directory())
+                  for directory, _, names in os.walk(store.directory()) for name in names)
+
+def test_an_image_is_stored_once_with_its_scaled_copies(tmp_path, write_image):
+    from PyQt5.QtGui import QImage
+    store = CoverStore(str(tmp_path / 'covers'))
+    first = write_image(tmp_path / 'a.png')
+    copy = write_image(tmp_path / 'copy.png')  # The same bytes under another name.
+
+    key = store.add(first)
+    assert is_key(key) and key.endswith('.png')
+    assert store.add(copy) == key
+    assert len(stored_files(store)) == 1 + len(SCALES)
+    for scale in SCALES:
+        image = QImage(store.path(key, scale))
+        assert (image.width(), image.height()) == (CARD_SIZE[0] * scale, CARD_SIZE[1] * scale)
+    assert store.resolve(key) == store.path(key) and store.resolve(first) == first
+
+    other = store.add(write_image(tmp_path / 'b.png', 'blue'))
+    assert other != key
+
+def test_add_many_reports_the_files_that_are_not_images(tmp_path, write_image):
+    store = CoverStore(str(tmp_path / 'covers'))
+    image = write_image(tmp_path / 'a.png')
+    text = tmp_path / 'notes.png'
+    text.write_text('not an image', encoding='utf-8')
+    missing = str(tmp_path / 'missing.png')
+
+    keys, errors = store.add_many([image, str(text), missing, image], workers=1)
+    assert list(keys) == [image]
+    assert isinstance(errors[str(text)], ValueError) and isinstance(errors[missing], OSError)
+    assert len(stored_files(store)) == 1 + len(SCALES)  # Nothing left behind by the failed ones.
+
+def test_a_book_with_an_invalid_cover_is_not_created(tmp_path, session, write_image):
+    text = tmp_path / 'cover.jpg'
+    text.write_text('not an image', encoding='utf-8')
+    with pytest.raises(InvalidCover):
+        BookService(session).create('Book', str(text))
+    assert BookService(session).find('Book') is None
+
+    book = BookService(session).create('Book', write_image(tmp_path / 'cover.png'))
+    assert is_key(book.cover_path)
+    assert os.path.isfile(CoverStore().path(book.cover_path, 1))
+
+def test_migrate_legacy_moves_cover_paths_into_the_store(tmp_path, engine, write_image):
+    image = write_image(tmp_path / 'old.png')
+    with engine.connect() as connection:
+        connection.exec_driver_sql(
+            "INSERT INTO books (id, title, cover_path) VALUES"
+            f" (1, 'Old', '{image}'), (2, 'Same image', '{image}'), (3, 'Gone', '{tmp_path / 'gone.png'}'),"
+            " (4, 'None', NULL)")
+        connection.commit()
+
+    assert migrate_legacy(engine, workers=1) == (3, 2, 1)
+    with engine.connect() as connection:
+        covers = dict(connection.exec_driver_sql("SELECT id, cover_path FROM books").all())
+    assert is_key(covers[1]) and covers[2] == covers[1]
+    assert covers[3] == str(tmp_path / 'gone.png') and covers[4] is None  # Left for the user to fix.
+    assert migrate_legacy(engine, workers=1) == (1, 0, 1)  # Only the missing file is still a path.
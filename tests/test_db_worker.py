@@ -0,0 +1,73 @@
+import threading
+
+from PyQt5 import sip
+
+from core import BookService
+from database.database import session_scope
+from views.db_worker import DatabaseWorker, BackgroundJob
+
+def test_shutdown_runs_queued_writes_and_skips_tagged_reads(qapp, engine):
+    worker = DatabaseWorker()
+    started, release = threading.Event(), threading.Event()
+    def block(session):
+        started.set()
+        release.wait(5)
+    read = []
+    delivered = []
+
+    worker.submit(block)
+    started.wait(5)
+    worker.submit(lambda session: BookService(session).create('Saved'), on_result=delivered.append)
+    worker.submit(lambda session: read.append(1), tag='pages')
+    release.set()
+    assert worker.shutdown(5000)
+    qapp.processEvents()
+
+    assert read == [] and delivered == []  # The read was skipped, no result is delivered anymore.
+    with session_scope() as session:
+        assert BookService(session).find('Saved') is not None
+
+def test_submit_after_shutdown_runs_nothing(qapp, engine):
+    worker = DatabaseWorker()
+    assert worker.shutdown(5000)
+    ran = []
+
+    assert worker.submit(lambda session: ran.append(BookService(session).create('Late'))) is None
+    assert worker.wait_for_done(5000)
+    assert ran == []
+    with session_scope() as session:
+        assert BookService(session).find('Late') is None
+
+def test_request_finishing_after_the_worker_was_deleted(qapp, engine):
+    worker = DatabaseWorker()
+    pool = worker.pool
+    pool.setParent(None)  # Keep the thread pool alive to wait on it after the worker is gone.
+    started, release = threading.Event(), threading.Event()
+    def block(session):
+        started.set()
+        release.wait(5)
+        return 'done'
+
+    worker.submit(block)
+    started.wait(5)
+    sip.delete(worker)
+    release.set()
+    assert pool.waitForDone(5000)  # No RuntimeError escapes the pool thread.
+
+def test_cancelled_job_stops_at_its_next_progress_report(qapp):
+    steps = []
+    def job(progress):
+        for step in range(1000):
+            progress(step)
+            steps.append(step)
+            if step == 10:
+                background.cancel()
+        return 'finished'
+
+    background = BackgroundJob(job)
+    finished = []
+    background.finished.connect(finished.append)
+    background.start()
+    assert background.wait(5)
+    qapp.processEvents()
+    assert steps[-1] == 10 and finished == [] and not background.is_running()
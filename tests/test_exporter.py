@@ -0,0 +1,34 @@
+import json
+
+import pytest
+
+from core import BookService, PageService
+from database.exporter import export_library
+
+class Interrupted(Exception):
+    pass
+
+@pytest.fixture
+def library(session):
+    book = BookService(session).create('Book')
+    for number in range(1, 6):
+        PageService(session).append(book.id, f"t{number}", f"body {number}")
+    session.commit()
+
+@pytest.mark.parametrize('name', ['library.zip', 'library.jsonl'])
+def test_interrupted_export_leaves_no_file(tmp_path, library, name):
+    destination = tmp_path / name
+    def interrupt(progress):
+        raise Interrupted()
+
+    with pytest.raises(Interrupted):
+        export_library(str(destination), chunk_size=2, progress=interrupt)
+    assert not destination.exists()
+    assert not (tmp_path / f"{name}.partial").exists()
+
+def test_export_writes_every_page(tmp_path, library):
+    destination = tmp_path / 'library.jsonl'
+    result = export_library(str(destination))
+    lines = [json.loads(line) for line in destination.read_text(encoding='utf-8').splitlines()]
+    assert (result.books, result.pages) == (1, 5) and len(lines) == 6
+    assert not (tmp_path / 'library.jsonl.partial').exists()
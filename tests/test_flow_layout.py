@@ -0,0 +1,58 @@
+import random
+
+from PyQt5.QtWidgets import QWidget, QPushButton
+
+from views.custom_widgets import QFlowLayout
+
+WIDTH = 350
+
+def make_layout(titles):
+    container = QWidget()
+    layout = QFlowLayout(container)
+    for title in titles:
+        layout.addWidget(QPushButton(title, container))
+    return container, layout
+
+def fresh_positions(layout):
+    """Positions of the items laid out from scratch in one pass, without the memoized line breaks."""
+    space_x, space_y = layout.spacing_between_items()
+    positions, x, y, line_height = [], 0, 0, 0
+    for index in range(layout.count()):
+        hint = layout.itemAt(index).sizeHint()
+        if x > 0 and x + hint.width() > WIDTH - 1:
+            x, y, line_height = 0, y + line_height + space_y, 0
+        positions.append((x, y))
+        x += hint.width() + space_x
+        line_height = max(line_height, hint.height())
+    return positions
+
+def test_removing_the_first_button_of_a_line_lets_the_next_one_move_up(qapp):
+    container, layout = make_layout(['aaaa', 'bbbb', 'cccc', 'a much longer page title', 'dd', 'ee'])
+    layout.state_for_width(WIDTH)
+    layout.takeAt(3).widget().deleteLater()
+
+    incremental = list(layout.state_for_width(WIDTH).positions)
+    assert incremental == fresh_positions(layout)
+    assert incremental[3][1] == 0  # "dd" fits at the end of the first line.
+
+def test_incremental_layout_matches_a_fresh_one(qapp):
+    rng = random.Random(12)
+    container, layout = make_layout([])
+
+    def random_title():
+        return 'x' * rng.choice([1, 2, 4, 8, 20, 40])
+
+    for step in range(300):
+        action = rng.random()
+        count = layout.count()
+        if action < 0.4 or count == 0:
+            layout.insert_widget(rng.randint(0, count), QPushButton(random_title(), container))
+        elif action < 0.7:
+            layout.takeAt(rng.randrange(count)).widget().deleteLater()
+        else:
+            index = rng.randrange(count)
+            layout.itemAt(index).widget().setText(random_title())
+            layout.update_item(index)
+
+        incremental = list(layout.state_for_width(WIDTH).positions)
+        assert incremental == fresh_positions(layout), f"step {step}"
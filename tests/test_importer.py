@@ -0,0 +1,86 @@
+import os
+import json
+
+import pytest
+
+from core import BookService, PageService
+from database import config
+from database.covers import CoverStore, is_key
+from database.database import configure, session_scope
+from database.exporter import export_library
+from database.importer import import_paths, iter_records
+from database.migrations import upgrade
+
+def library(session):
+    """Return {title: (stored cover image bytes or None, [(page title, content), ...])} of every book."""
+    store = CoverStore()
+    books = {}
+    for book in BookService(session).list():
+        cover = None
+        if book.cover_path:
+            with open(store.resolve(book.cover_path), 'rb') as file:
+                cover = file.read()
+        pages = PageService(session)
+        books[book.title] = (cover, [(page.title, pages.get(page.id).content) for page in pages.window(book.id)])
+    return books
+
+def test_import_text_markdown_and_jsonl(tmp_path, session):
+    source = tmp_path / 'source'
+    (source / 'Notes').mkdir(parents=True)
+    (source / 'Notes' / 'b.txt').write_text('second', encoding='utf-8')
+    (source / 'Notes' / 'a.md').write_text('first', encoding='utf-8')
+    (source / 'Diary.txt').write_text('monday\ftuesday', encoding='utf-8')
+    (source / 'Guide.md').write_text('intro\n# Setup\ninstall\n# Use\nrun\n', encoding='utf-8')
+    (source / 'extra.jsonl').write_text('\n'.join(json.dumps(record) for record in [
+        {'book': 'Notes', 'title': 'c', 'content': 'third'},
+        {'book': 'Empty'},
+    ]), encoding='utf-8')
+
+    paths = [str(source / name) for name in ('Notes', 'Diary.txt', 'Guide.md', 'extra.jsonl')]
+    result = import_paths(paths)
+    assert result == (4, 8)
+    assert library(session) == {
+        'Notes': (None, [('a', 'first'), ('b', 'second'), ('c', 'third')]),
+        'Diary': (None, [(None, 'monday'), (None, 'tuesday')]),
+        'Guide': (None, [(None, 'intro\n'), ('Setup', 'install\n'), ('Use', 'run\n')]),
+        'Empty': (None, []),
+    }
+
+def test_import_appends_to_a_book_with_the_same_title(tmp_path, session):
+    book = BookService(session).create('Notes')
+    PageService(session).append(book.id, 'old', 'kept')
+    (tmp_path / 'Notes.txt').write_text('new', encoding='utf-8')
+
+    assert import_paths([str(tmp_path / 'Notes.txt')]) == (0, 1)
+    assert library(session)['Notes'][1] == [('old', 'kept'), (None, 'new')]
+
+def test_invalid_jsonl_names_the_line(tmp_path):
+    path = tmp_path / 'broken.jsonl'
+    path.write_text('{"book": "A"}\n{"title": "no book"}\n', encoding='utf-8')
+    with pytest.raises(ValueError, match=r'broken\.jsonl:2'):
+        list(iter_records(str(path)))
+
+def test_zip_export_imports_into_another_library(tmp_path, write_image, session):
+    shared = write_image(tmp_path / 'shared.png')
+    for title, cover in (('First', shared), ('Second', shared), ('Third', write_image(tmp_path / 'blue.png', 'blue'))):
+        book = BookService(session).create(title, cover)
+        for number in range(1, 4):
+            PageService(session).append(book.id, f"{title} {number}", f"Page {number} of {title}")
+    BookService(session).create('No cover')
+    exported = library(session)
+    archive = str(tmp_path / 'library.zip')
+    export_library(archive)
+
+    other = tmp_path / 'other'
+    other.mkdir()
+    engine = configure(str(other / 'books.db'))
+    config.set_covers_path(str(other / 'covers'))
+    try:
+        upgrade(engine)
+        assert import_paths([archive], workers=1) == (4, 9)
+        with session_scope() as imported:
+            assert library(imported) == exported
+            assert all(is_key(book.cover_path) for book in BookService(imported).list() if book.title != 'No cover')
+        assert len(os.listdir(other / 'covers')) == 2  # The shared cover is stored once.
+    finally:
+        engine.dispose()
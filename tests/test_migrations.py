@@ -0,0 +1,57 @@
+import sqlite3
+
+from core import BookService, PageService
+from database.database import configure, session_scope
+from database.migrations import upgrade, latest_version
+
+def baseline_database(path):
+    """Write a books.db as the application created it before the schema was versioned."""
+    with sqlite3.connect(path) as connection:
+        connection.executescript(
+            "CREATE TABLE books (id INTEGER NOT NULL, title VARCHAR NOT NULL, cover_path VARCHAR, PRIMARY KEY (id));"
+            "CREATE TABLE pages (id INTEGER NOT NULL, number INTEGER NOT NULL, content VARCHAR NOT NULL,"
+            " title VARCHAR, book_id INTEGER NOT NULL, PRIMARY KEY (id), FOREIGN KEY(book_id) REFERENCES books (id));"
+            "INSERT INTO books (id, title) VALUES (1, 'Notes'), (2, 'Notes'), (3, 'Notes (2)'), (4, 'Diary');"
+            "INSERT INTO pages (id, number, content, title, book_id) VALUES"
+            " (1, 1, 'first note', 'a', 1), (2, 2, 'second note', 'b', 1),"
+            " (3, 1, 'copied note', 'c', 2), (4, 1, 'dear diary', 'd', 4),"
+            " (5, 1, 'orphaned page', 'e', 99),"  # Its book was deleted without it.
+            " (6, 5, 'gap before', 'f', 4), (7, 5, 'same number', 'g', 4);"
+        )
+    connection.close()
+
+def test_upgrade_from_the_unversioned_schema(tmp_path):
+    path = str(tmp_path / 'books.db')
+    baseline_database(path)
+    engine = configure(path)
+    try:
+        assert upgrade(engine) == list(range(1, latest_version() + 1))
+        assert upgrade(engine) == []  # Already up to date.
+
+        with session_scope() as session:
+            # Later duplicate titles get the first free suffix.
+            assert sorted((book.id, book.title) for book in BookService(session).list()) == [
+                (1, 'Notes'), (2, 'Notes (3)'), (3, 'Notes (2)'), (4, 'Diary')]
+
+            # Orphaned pages are dropped, the others kept and searchable.
+            pages = PageService(session)
+            assert pages.get(5) is None
+            assert [page.id for page in pages.window(1)] == [1, 2]
+
+            # Gaps and ties in the old numbering are closed, ties ordered by id.
+            assert [(page.id, page.number) for page in pages.window(4)] == [(4, 1), (6, 2), (7, 3)]
+            assert pages.get(7).number == 3
+            assert [hit.page_id for hit in pages.search('note')] == [1, 2, 3]
+
+            # Deleting a book now deletes its pages, and their search entries.
+            BookService(session).delete(1)
+            assert pages.get(1) is None
+            assert [hit.page_id for hit in pages.search('note')] == [3]
+    finally:
+        engine.dispose()
+
+def test_upgrade_creates_a_new_database(engine):
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql('PRAGMA user_version').scalar() == latest_version()
+        tables = {name for (name,) in connection.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert {'books', 'pages', 'pages_fts'} <= tables
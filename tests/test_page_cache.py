@@ -0,0 +1,62 @@
+from database.page_cache import CachedPage, PageCache
+
+def page(page_id, number, content='x' * 100, book_id=1):
+    return CachedPage(page_id, book_id, number, f"t{number}", content)
+
+def test_least_recently_used_pages_are_evicted_first():
+    cost = PageCache.cost('x' * 100)
+    cache = PageCache(max_bytes=3 * cost)
+    for number in (1, 2, 3):
+        cache.put(page(number, number))
+    assert cache.get(1, 1) is not None  # Page 2 is now the least recently used.
+
+    cache.put(page(4, 4))
+    assert (1, 2) not in cache and cache.get_by_id(2) is None
+    assert all((1, number) in cache for number in (1, 3, 4))
+    assert cache.size == 3 * cost
+
+def test_pages_bigger_than_the_budget_are_not_cached():
+    cache = PageCache(max_bytes=PageCache.cost('x' * 100))
+    cache.put(page(1, 1))
+    cache.put(page(2, 2, content='x' * 1000))
+    assert (1, 1) in cache and (1, 2) not in cache
+
+def test_put_replaces_a_page_by_id_and_by_number():
+    cache = PageCache()
+    cache.put(page(1, 1))
+    cache.put(page(1, 2))  # Same page, renumbered.
+    cache.put(page(3, 2, content='other'))  # Another page now has its number.
+    assert len(cache) == 1 and cache.get_by_id(1) is None
+    assert cache.get(1, 2).content == 'other'
+    assert cache.size == PageCache.cost('other')
+
+def test_invalidation():
+    cache = PageCache()
+    for number in range(1, 6):
+        cache.put(page(number, number))
+    cache.put(page(10, 1, book_id=2))
+
+    cache.invalidate(2)
+    cache.invalidate_book(1, from_number=4)
+    assert sorted(key for key in [(1, n) for n in range(1, 6)] + [(2, 1)] if key in cache) == [(1, 1), (1, 3), (2, 1)]
+
+    cache.invalidate_book(1)
+    assert len(cache) == 1 and (2, 1) in cache
+    cache.clear()
+    assert len(cache) == 0 and cache.size == 0
+
+def test_update_content_writes_through_cached_pages_only():
+    cache = PageCache()
+    cache.put(page(1, 1))
+    cache.update_content(1, 'new')
+    cache.update_content(2, 'never cached')
+    assert cache.get_by_id(1).content == 'new' and len(cache) == 1
+
+def test_stats_count_lookups_but_not_membership_tests():
+    cache = PageCache()
+    cache.put(page(1, 1))
+    (1, 1) in cache
+    cache.get(1, 1)
+    cache.get(1, 2)
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['hit_rate']) == (1, 1, 0.5)
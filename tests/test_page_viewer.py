@@ -0,0 +1,29 @@
+from core import BookService, PageService
+from views.db_worker import DatabaseWorker
+from views.page_viewer import PageViewer
+
+def wait(qapp, worker):
+    # Every delivered chunk may queue the next one, so drain until nothing is left.
+    while worker.pool.activeThreadCount() or worker._requests:
+        worker.wait_for_done()
+        qapp.processEvents()
+
+def test_scrolling_to_the_end_loads_every_chunk_once(qapp, session):
+    # Long lines: the scroll range counts lines, so a chunk barely moves it and the
+    # viewer stays near the end while the chunk is inserted.
+    content = ''.join(f"paragraph {i} " + "lorem ipsum dolor sit amet " * 40 + "\n" for i in range(300))
+    book = BookService(session).create('Long')
+    page = PageService(session).append(book.id, 'long', content)
+    session.commit()
+
+    worker = DatabaseWorker()
+    head = PageService(session).head(page.id, 4096)
+    viewer = PageViewer(worker, head, head.length, chunk_size=4096)
+    viewer.resize(400, 300)
+    viewer.show()
+    while not viewer.is_complete():
+        scroll_bar = viewer.verticalScrollBar()
+        scroll_bar.setValue(scroll_bar.maximum())
+        wait(qapp, worker)
+
+    assert viewer.toPlainText() == content
@@ -0,0 +1,46 @@
+from core import BookService, PageService, SNIPPET_START, SNIPPET_END, fts_query
+
+def test_fts_query_quotes_every_word_and_matches_the_last_as_a_prefix():
+    assert fts_query('walrus  carpenter') == '"walrus" "carpenter"*'
+    assert fts_query('say "hi" OR -x') == '"say" """hi""" "OR" "-x"*'
+    assert fts_query('   ') is None
+
+def add_pages(session, *pages):
+    book = BookService(session).create('Book')
+    return [PageService(session).append(book.id, title, content).id for title, content in pages]
+
+def test_title_matches_rank_above_content_matches(session):
+    in_content, in_title, elsewhere = add_pages(
+        session,
+        ('Shopping', 'Remember the walrus food and also a few other things for the week'),
+        ('Walrus', 'Notes about the animal'),
+        ('Other', 'Nothing to see'),
+    )
+    assert [hit.page_id for hit in PageService(session).search('walrus')] == [in_title, in_content]
+
+def test_search_matches_prefixes_punctuation_and_diacritics(session):
+    page_id, = add_pages(session, ('Café', 'The crème brûlée (a dessert) was "perfect".'))
+    service = PageService(session)
+    for query in ('creme brulee', 'des', 'cafe', '"perfect"', 'dessert)', 'brûl'):
+        assert [hit.page_id for hit in service.search(query)] == [page_id], query
+    assert service.search('perfection') == []
+    assert service.search('') == []
+
+def test_hits_carry_their_book_page_number_and_a_highlighted_snippet(session):
+    _, page_id = add_pages(session, ('First', 'nothing'), (None, 'a long text where the word walrus appears once'))
+    hit, = PageService(session).search('walrus')
+    assert (hit.book_title, hit.page_id, hit.page_number, hit.page_title) == ('Book', page_id, 2, None)
+    assert f"{SNIPPET_START}walrus{SNIPPET_END}" in hit.snippet
+
+def test_search_follows_edits_and_deletes(session):
+    page_id, = add_pages(session, ('Page', 'old words'))
+    service = PageService(session)
+    service.update_content(page_id, 'new words')
+    assert service.search('old') == []
+    assert [hit.page_id for hit in service.search('new')] == [page_id]
+    service.delete(page_id)
+    assert service.search('new') == []
+
+def test_search_limit(session):
+    add_pages(session, *[(f"p{n}", 'same word') for n in range(10)])
+    assert len(PageService(session).search('word', limit=3)) == 3
@@ -0,0 +1,60 @@
+import random
+
+import pytest
+
+from core import TitleIndex
+from core.title_index import fold
+
+WORDS = ['war', 'and', 'peace', 'warlock', 'a', 'an', 'anna', 'Dune', 'DUNES', 'pea', 'x', 'éclair', 'Straße']
+
+def brute_force(titles, query):
+    """The ids of the titles matching `query`, checking every title."""
+    words = fold(query).split()
+    if not words:
+        return None
+    return {
+        book_id for book_id, title in titles.items()
+        if all((word if len(word) >= 3 else ' ' + word) in ' ' + fold(title) for word in words)
+    }
+
+def random_title(rng):
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 4)))
+
+def random_query(rng):
+    word = fold(rng.choice(WORDS))
+    start = rng.randrange(len(word))
+    query = word[start:start + rng.randint(1, len(word))] if rng.random() < 0.5 else word
+    return query + (' ' + fold(rng.choice(WORDS))[:2] if rng.random() < 0.3 else '')
+
+@pytest.mark.parametrize('seed', range(4))
+def test_search_matches_brute_force(seed):
+    rng = random.Random(seed)
+    titles = {book_id: random_title(rng) for book_id in range(1, rng.choice([5, 200]))}  # Small ones get compacted.
+    index = TitleIndex(titles.items())
+    next_id = 200
+
+    for step in range(400):
+        action = rng.random()
+        if action < 0.2:
+            titles[next_id] = random_title(rng)
+            index.add(next_id, titles[next_id])
+            next_id += 1
+        elif action < 0.4 and titles:
+            book_id = rng.choice(list(titles))
+            del titles[book_id]
+            index.remove(book_id)
+        elif action < 0.5 and titles:
+            book_id = rng.choice(list(titles))  # Renamed.
+            titles[book_id] = random_title(rng)
+            index.add(book_id, titles[book_id])
+
+        query = random_query(rng)
+        expected = brute_force(titles, query)
+        assert index.search(query) == expected, (step, query)
+        for book_id in list(titles)[:20]:
+            assert index.matches(book_id, query) == (book_id in expected), (step, query, book_id)
+
+def test_empty_query_matches_everything():
+    index = TitleIndex([(1, 'War and Peace')])
+    assert index.search('  ') is None
+    assert index.search('zzz') == set()